@@ -0,0 +1,29 @@
+from django.contrib import admin
+from .models import CategoryDailySales, ProductDailySales, StatusDailySales
+
+
+class DailySalesAdmin(admin.ModelAdmin):
+    list_filter = ("date",)
+    date_hierarchy = "date"
+
+    # Maintained by analytics.rollups; `manage.py backfill_sales` rebuilds them.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StatusDailySales)
+class StatusDailySalesAdmin(DailySalesAdmin):
+    list_display = ("date", "status", "orders", "units", "revenue")
+
+
+@admin.register(ProductDailySales)
+class ProductDailySalesAdmin(DailySalesAdmin):
+    list_display = ("date", "product_id", "orders", "units", "revenue")
+
+
+@admin.register(CategoryDailySales)
+class CategoryDailySalesAdmin(DailySalesAdmin):
+    list_display = ("date", "category_id", "orders", "units", "revenue")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from analytics.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily sales rollups from Order/OrderItem, a range of "
+        "days per transaction. Defaults to the whole order history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="first day, YYYY-MM-DD")
+        parser.add_argument("--end", help="last day, YYYY-MM-DD")
+        parser.add_argument("--chunk-days", type=int, default=31)
+
+    def handle(self, *args, **options):
+        try:
+            first, last = (parse_date(options[name]) if options[name] else None for name in ("start", "end"))
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options["chunk_days"] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        def progress(start, end):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Rebuilt {start} .. {end}")
+
+        days = backfill(first, last, options["chunk_days"], on_progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups for {days} days"))
@@ -0,0 +1,106 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, DecimalField, F, Sum
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from analytics.rollups import backfill, day_bounds
+from orders.models import Order, OrderItem
+from products.bench import seed_products, seed_users, summarize, timed
+from products.models import Product
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed --orders orders spread over --days days, time the rollup "
+        "backfill, then compare the analytics endpoints with the same "
+        "reports aggregated straight from Order/OrderItem. Writes to the "
+        "configured database: use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=100_000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.seed(options["orders"], options["days"])
+
+        start = time.perf_counter()
+        days = backfill(chunk_days=31)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"backfill: {days} days in {elapsed:.2f}s")
+
+        admin = get_user_model().objects.get(username="bench-admin")
+        token = str(ClaimsTokenObtainPairSerializer.get_token(admin).access_token)
+        client = Client(headers={"Authorization": f"Bearer {token}"})
+
+        today = timezone.localdate()
+        ranges = (("last 30 days", today - timedelta(days=29)), ("whole history", today - timedelta(days=options["days"])))
+        for label, first in ranges:
+            query = f"?start={first}&end={today}"
+            with override_settings(METRICS_SAMPLE_RATE=0):
+                self.compare(label, "sales report", options["repeat"],
+                             lambda: client.get(f"/api/analytics/sales/{query}"),
+                             lambda: self.direct_sales(first, today))
+                self.compare(label, "top products", options["repeat"],
+                             lambda: client.get(f"/api/analytics/products/{query}"),
+                             lambda: self.direct_products(first, today))
+
+    def seed(self, count, days, batch_size=5000):
+        if not Product.objects.exists():
+            seed_products(10_000)
+        users = seed_users(1000)
+        products = list(Product.objects.values_list("pk", "price", "category_id")[:5000])
+        rng = random.Random(0)
+        now = timezone.now()
+        for offset in range(0, count, batch_size):
+            orders = Order.objects.bulk_create([
+                Order(user=rng.choice(users), status=rng.choice(("PLACED", "SHIPPED", "DELIVERED", "CANCELLED")))
+                for _ in range(min(batch_size, count - offset))
+            ])
+            items, totals = [], {}
+            for order in orders:
+                for pk, price, category_id in rng.sample(products, 3):
+                    quantity = rng.randint(1, 3)
+                    items.append(OrderItem(
+                        order=order, product_id=pk, price=price, quantity=quantity, category_id=category_id,
+                    ))
+                    totals[order.pk] = totals.get(order.pk, 0) + price * quantity
+            OrderItem.objects.bulk_create(items, batch_size=batch_size)
+            # auto_now_add stamps every order with now; spread them over the days.
+            for order in orders:
+                order.created_at = now - timedelta(days=rng.randrange(days))
+                order.total_amount = totals[order.pk]
+            Order.objects.bulk_update(orders, ["created_at", "total_amount"], batch_size=500)
+        self.stdout.write(f"seeded {count} orders over {days} days")
+
+    def direct_sales(self, first, last):
+        start, stop = day_bounds(first, last)
+        orders = Order.objects.filter(created_at__gte=start, created_at__lt=stop)
+        return (
+            list(orders.values("status").annotate(revenue=Sum("total_amount"), orders=Count("id"))),
+            orders.exclude(status="CANCELLED").aggregate(revenue=Sum("total_amount"), orders=Count("id")),
+        )
+
+    def direct_products(self, first, last):
+        start, stop = day_bounds(first, last)
+        revenue = Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2))
+        return list(
+            OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=stop)
+            .exclude(order__status="CANCELLED")
+            .values("product_id").annotate(revenue=revenue, units=Sum("quantity"))
+            .order_by("-revenue")[:20]
+        )
+
+    def compare(self, label, name, repeat, rollup, direct):
+        fast, slow = summarize(timed(rollup, repeat)), summarize(timed(direct, max(1, repeat // 4)))
+        self.stdout.write(
+            f"{label:14} {name:13} rollups p50={fast['p50']:8.2f}ms  "
+            f"order tables p50={slow['p50']:9.2f}ms  ({slow['p50'] / fast['p50']:.0f}x)"
+        )
@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class DailySales(models.Model):
+    """
+    One day's sales for one key, maintained by analytics.rollups. Keys are
+    plain ids rather than foreign keys so the history survives deletions.
+    """
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.IntegerField(default=0)
+    orders = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class ProductDailySales(DailySales):
+    """Sales of a product; cancelled orders are not counted."""
+    product_id = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ("date", "product_id")
+
+
+class CategoryDailySales(DailySales):
+    """Sales of a category's products; cancelled orders are not counted."""
+    # 0 for products without a category (or no longer in the catalog).
+    category_id = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ("date", "category_id")
+
+
+class StatusDailySales(DailySales):
+    """Orders placed on `date`, by their current status."""
+    status = models.CharField(max_length=20)
+
+    class Meta:
+        unique_together = ("date", "status")
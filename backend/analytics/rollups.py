@@ -0,0 +1,177 @@
+"""
+Daily sales rollups.
+
+Revenue, units and orders are kept per day (the order's placement date in
+TIME_ZONE) for every product, category and order status, so reports read
+a few hundred small rows instead of scanning Order/OrderItem. Placing an
+order adds it (record_order, from OrderSerializer.create) and status
+changes move it between statuses (analytics.signals); product and
+category rows leave cancelled orders out. Sales count towards the
+category a product had when the order was placed (OrderItem.category_id),
+wherever it has moved since. Rows are incremented in the
+database, so concurrent orders never overwrite each other.
+
+`manage.py backfill_sales` rebuilds the rollups from the order tables,
+one range of days per transaction.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from .models import CategoryDailySales, ProductDailySales, StatusDailySales
+
+# Orders in these statuses don't count towards product and category sales.
+EXCLUDED_STATUSES = ("CANCELLED",)
+UNCATEGORIZED = 0
+
+
+def _add(bucket, key, revenue, units, orders):
+    row = bucket.setdefault(key, [Decimal(0), 0, 0])
+    row[0] += revenue
+    row[1] += units
+    row[2] += orders
+
+
+def _increment(model, key_fields, bucket):
+    """
+    Add {key: [revenue, units, orders]} to rollup rows: insert missing
+    rows at 0, then increment in the database.
+    """
+    bucket = {key: row for key, row in bucket.items() if any(row)}
+    if not bucket:
+        return
+    keys = [dict(zip(key_fields, key)) for key in bucket]
+    model.objects.bulk_create([model(**key) for key in keys], ignore_conflicts=True)
+    match = Q()
+    for key in keys:
+        match |= Q(**key)
+
+    def shift(field, index):
+        return Case(*[
+            When(Q(**key), then=F(field) + Value(row[index])) for key, row in zip(keys, bucket.values())
+        ], output_field=model._meta.get_field(field))
+
+    model.objects.filter(match).update(
+        revenue=shift("revenue", 0), units=shift("units", 1), orders=shift("orders", 2)
+    )
+
+
+def _record(order, items, status, sign, products=True):
+    """Add (sign=1) or remove (sign=-1) one order under `status`."""
+    day = timezone.localdate(order.created_at)
+    units = sum(quantity for _, _, quantity, _ in items)
+    _increment(StatusDailySales, ("date", "status"), {
+        (day, status): [sign * order.total_amount, sign * units, sign]
+    })
+    if not products or status in EXCLUDED_STATUSES:
+        return
+    by_product, by_category = {}, {}
+    for product_id, category_id, quantity, price in items:
+        revenue = sign * price * quantity
+        if product_id is not None:
+            _add(by_product, (day, product_id), revenue, sign * quantity, 0)
+        _add(by_category, (day, category_id or UNCATEGORIZED), revenue, sign * quantity, 0)
+    # An order counts once per product and category, however many lines.
+    for bucket in (by_product, by_category):
+        for row in bucket.values():
+            row[2] = sign
+    _increment(ProductDailySales, ("date", "product_id"), by_product)
+    _increment(CategoryDailySales, ("date", "category_id"), by_category)
+
+
+def order_lines(order):
+    return list(OrderItem.objects.filter(order=order).values_list(
+        "product_id", "category_id", "quantity", "price"
+    ))
+
+
+def record_order(order, items):
+    """
+    Add a newly placed order; `items` are (product_id, category_id,
+    quantity, price) tuples. Call inside the order's transaction.
+    """
+    _record(order, items, order.status, 1)
+
+
+def record_status_change(order, old, new):
+    """Move an order between statuses, in and out of product/category sales."""
+    items = order_lines(order)
+    counted_before, counted_after = old not in EXCLUDED_STATUSES, new not in EXCLUDED_STATUSES
+    # Product and category rows only change when the order enters or leaves them.
+    _record(order, items, old, -1, products=counted_before and not counted_after)
+    _record(order, items, new, 1, products=counted_after and not counted_before)
+
+
+def day_bounds(first, last):
+    """Aware datetimes covering the local days first..last."""
+    zone = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(first, time.min), zone),
+        timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min), zone),
+    )
+
+
+def _rebuild(first, last):
+    start, stop = day_bounds(first, last)
+    for model in (ProductDailySales, CategoryDailySales, StatusDailySales):
+        model.objects.filter(date__range=(first, last)).delete()
+
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=stop)
+    items = OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=stop)
+    line_revenue = Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+    units = {
+        (row["day"], row["order__status"]): row["units"]
+        for row in items.annotate(day=TruncDate("order__created_at"))
+        .values("day", "order__status").annotate(units=Sum("quantity"))
+    }
+    StatusDailySales.objects.bulk_create([
+        StatusDailySales(
+            date=row["day"], status=row["status"], revenue=row["revenue"],
+            units=units.get((row["day"], row["status"]), 0), orders=row["orders"],
+        )
+        for row in orders.annotate(day=TruncDate("created_at")).values("day", "status")
+        .annotate(revenue=Sum("total_amount"), orders=Count("id"))
+    ], batch_size=1000)
+
+    counted = items.exclude(order__status__in=EXCLUDED_STATUSES).annotate(day=TruncDate("order__created_at"))
+    ProductDailySales.objects.bulk_create([
+        ProductDailySales(date=row["day"], product_id=row["product_id"], revenue=row["revenue"],
+                          units=row["units"], orders=row["orders"])
+        for row in counted.filter(product__isnull=False).values("day", "product_id")
+        .annotate(revenue=line_revenue, units=Sum("quantity"), orders=Count("order_id", distinct=True))
+    ], batch_size=1000)
+    CategoryDailySales.objects.bulk_create([
+        CategoryDailySales(date=row["day"], category_id=row["category"], revenue=row["revenue"],
+                           units=row["units"], orders=row["orders"])
+        for row in counted.annotate(category=Coalesce("category_id", UNCATEGORIZED))
+        .values("day", "category")
+        .annotate(revenue=line_revenue, units=Sum("quantity"), orders=Count("order_id", distinct=True))
+    ], batch_size=1000)
+
+
+def backfill(first=None, last=None, chunk_days=31, on_progress=None):
+    """
+    Rebuild the rollups for local days first..last (all order history by
+    default), `chunk_days` at a time, each range in its own transaction.
+    Returns the number of days processed.
+    """
+    bounds = Order.objects.aggregate(first=Min("created_at"), last=Max("created_at"))
+    if bounds["first"] is None and (first is None or last is None):
+        return 0
+    first = first or timezone.localdate(bounds["first"])
+    last = last or timezone.localdate(bounds["last"])
+    day = first
+    while day <= last:
+        end = min(day + timedelta(days=chunk_days - 1), last)
+        with transaction.atomic():
+            _rebuild(day, end)
+        if on_progress:
+            on_progress(day, end)
+        day = end + timedelta(days=1)
+    return (last - first).days + 1
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from orders.models import Order
+from .rollups import record_status_change
+
+
+@receiver(pre_save, sender=Order)
+def remember_stored_status(sender, instance, **kwargs):
+    # As for Product categories: from_db records it for loaded instances.
+    if instance.pk is None or hasattr(instance, "_loaded_status"):
+        return
+    instance._loaded_status = Order.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def move_order_between_statuses(sender, instance, created, update_fields=None, **kwargs):
+    # New orders are recorded with their items by OrderSerializer.create.
+    if created or (update_fields is not None and "status" not in update_fields):
+        return
+    old = instance._loaded_status
+    if old is not None and old != instance.status:
+        record_status_change(instance, old, instance.status)
+    instance._loaded_status = instance.status
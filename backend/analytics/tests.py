@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.models import Order
+from products.models import Category
+from products.tests import make_product
+from .models import CategoryDailySales, ProductDailySales, StatusDailySales
+from .rollups import backfill
+
+User = get_user_model()
+
+
+def snapshot():
+    return {
+        model.__name__: sorted(model.objects.filter(orders__gt=0).values_list(*fields, "revenue", "units", "orders"))
+        for model, fields in (
+            (ProductDailySales, ("date", "product_id")),
+            (CategoryDailySales, ("date", "category_id")),
+            (StatusDailySales, ("date", "status")),
+        )
+    }
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.shoes = Category.objects.create(name="Shoes", slug="shoes")
+        self.boot = make_product(self.shoes, price="20.00")
+        self.sock = make_product(None, price="2.50")
+
+    def place(self, *lines):
+        return self.client.post("/api/orders/", {
+            "shipping_address": "x",
+            "items_write": [{"product_id": p.pk, "quantity": q} for p, q in lines],
+        }, format="json").json()["id"]
+
+    def test_placement_and_cancellation_update_the_rollups(self):
+        first = self.place((self.boot, 2), (self.sock, 4))
+        self.place((self.boot, 1))
+        today = timezone.localdate()
+        boot = ProductDailySales.objects.get(date=today, product_id=self.boot.pk)
+        self.assertEqual((boot.revenue, boot.units, boot.orders), (60, 3, 2))
+        self.assertEqual(CategoryDailySales.objects.get(category_id=0).revenue, 10)
+
+        order = Order.objects.get(pk=first)
+        order.status = "PLACED"
+        order.save()
+        self.client.post(f"/api/orders/{first}/cancel/")
+        boot.refresh_from_db()
+        self.assertEqual((boot.revenue, boot.units, boot.orders), (20, 1, 1))
+        self.assertEqual(
+            dict(StatusDailySales.objects.values_list("status", "orders")),
+            {"PENDING": 1, "PLACED": 0, "CANCELLED": 1},
+        )
+
+        # A rebuild from the order tables gives the same rows.
+        incremental = snapshot()
+        self.assertEqual(backfill(chunk_days=1), 1)
+        self.assertEqual(snapshot(), incremental)
+
+    def test_sales_stay_with_the_category_at_placement(self):
+        order = Order.objects.get(pk=self.place((self.boot, 1)))
+        self.boot.category = Category.objects.create(name="Hats", slug="hats")
+        self.boot.save()
+        order.status = "CANCELLED"
+        order.save()
+        self.assertEqual(
+            list(CategoryDailySales.objects.values_list("category_id", "revenue", "orders")),
+            [(self.shoes.pk, 0, 0)],
+        )
+        incremental = snapshot()
+        backfill()
+        self.assertEqual(snapshot(), incremental)
+
+    def test_reports_are_staff_only(self):
+        self.place((self.boot, 2), (self.sock, 1))
+        self.assertEqual(self.client.get("/api/analytics/sales/").status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(username="staff", password="pass", is_staff=True))
+        sales = self.client.get("/api/analytics/sales/").json()
+        self.assertEqual(sales["totals"], {"revenue": "42.50", "units": 3, "orders": 1})
+        self.assertEqual(len(sales["days"]), 1)
+        products = self.client.get("/api/analytics/products/?order=units&limit=1").json()["results"]
+        self.assertEqual([(p["product_id"], p["units"]) for p in products], [(self.boot.pk, 2)])
+        categories = self.client.get("/api/analytics/categories/").json()["results"]
+        self.assertEqual([(c["name"], c["revenue"]) for c in categories], [("Shoes", "40.00"), (None, "2.50")])
+        self.assertEqual(self.client.get("/api/analytics/sales/?start=2024-02-30").status_code, 400)
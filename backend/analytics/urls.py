@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import CategorySalesView, ProductSalesView, SalesReportView
+
+urlpatterns = [
+    path('sales/', SalesReportView.as_view(), name='analytics-sales'),
+    path('products/', ProductSalesView.as_view(), name='analytics-products'),
+    path('categories/', CategorySalesView.as_view(), name='analytics-categories'),
+]
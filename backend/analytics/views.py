@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from products.models import Category, Product
+from .models import CategoryDailySales, ProductDailySales, StatusDailySales
+from .rollups import EXCLUDED_STATUSES
+
+DEFAULT_DAYS = 30
+MAX_LIMIT = 100
+ORDERINGS = ("revenue", "units", "orders")
+
+
+def money(value):
+    return f"{value or 0:.2f}"
+
+
+def totals(rows):
+    return {"revenue": money(rows["revenue"]), "units": rows["units"] or 0, "orders": rows["orders"] or 0}
+
+
+class RollupView(APIView):
+    """Staff-only reports over local days `?start=YYYY-MM-DD&end=YYYY-MM-DD` (default: the last 30)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        end = request.query_params.get("end")
+        start = request.query_params.get("start")
+        try:
+            end = parse_date(end) if end else timezone.localdate()
+            start = parse_date(start) if start else end - timedelta(days=DEFAULT_DAYS - 1)
+        except ValueError:
+            end = start = None
+        if start is None or end is None or start > end:
+            return Response({"error": "start and end must be dates (YYYY-MM-DD), start <= end"}, status=400)
+        try:
+            report = self.report(request, start, end)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        return Response({"start": start, "end": end, **report})
+
+
+class SalesReportView(RollupView):
+    """Totals, totals per status and a daily series; cancelled orders excluded from the series."""
+
+    def report(self, request, start, end):
+        rows = StatusDailySales.objects.filter(date__range=(start, end))
+        counted = rows.exclude(status__in=EXCLUDED_STATUSES)
+        days = counted.values("date").annotate(
+            revenue=Sum("revenue"), units=Sum("units"), orders=Sum("orders")
+        ).order_by("date")
+        by_status = rows.values("status").annotate(
+            revenue=Sum("revenue"), units=Sum("units"), orders=Sum("orders")
+        ).order_by("status")
+        return {
+            "totals": totals(counted.aggregate(revenue=Sum("revenue"), units=Sum("units"), orders=Sum("orders"))),
+            "by_status": {row.pop("status"): totals(row) for row in by_status},
+            "days": [{"date": row.pop("date"), **totals(row)} for row in days],
+        }
+
+
+class RankingView(RollupView):
+    model = key = named = None
+
+    def ranked(self, request, start, end):
+        """Rows per `self.key`, ordered by `?order=` (revenue), at most `?limit=` (20) of them."""
+        order = request.query_params.get("order", "revenue")
+        if order not in ORDERINGS:
+            raise ValueError(f"order must be one of {ORDERINGS}")
+        limit = request.query_params.get("limit", "20")
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+        rows = self.model.objects.filter(date__range=(start, end)).values(self.key).annotate(
+            revenue=Sum("revenue"), units=Sum("units"), orders=Sum("orders")
+        )
+        return list(rows.order_by(f"-{order}", self.key)[:int(limit)])
+
+    def report(self, request, start, end):
+        rows = self.ranked(request, start, end)
+        names = dict(self.named.objects.filter(pk__in=[row[self.key] for row in rows]).values_list("pk", "name"))
+        return {"results": [
+            {self.key: row[self.key], "name": names.get(row[self.key]), **totals(row)} for row in rows
+        ]}
+
+
+class ProductSalesView(RankingView):
+    """Best-selling products in the range."""
+    model, key, named = ProductDailySales, "product_id", Product
+
+
+class CategorySalesView(RankingView):
+    """Sales per category in the range; category_id 0 is uncategorized."""
+    model, key, named = CategoryDailySales, "category_id", Category
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import async_views
+
+urlpatterns = [
+    path('', async_views.cart_list, name='async-cart-list'),
+    path('add/', async_views.cart_add, name='async-cart-add'),
+    path('update/<int:pk>/', async_views.cart_update, name='async-cart-update'),
+    path('remove/<int:pk>/', async_views.cart_remove, name='async-cart-delete'),
+    path('clear/', async_views.cart_clear, name='async-cart-clear'),
+]
@@ -0,0 +1,138 @@
+"""
+Async cart endpoints for the ASGI deployment, mirroring CartListView,
+CartAddView, CartUpdateView, CartDeleteView and CartClearView.
+Authentication builds the user from the bearer JWT's claims
+(users.authentication), so it normally needs no query at all.
+
+A write changes the cart line and its stock hold in one transaction, so
+it runs in the sync thread, under the request's Idempotency-Key like
+the sync views (idempotency.keys.respond_once).
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST, require_http_methods
+from rest_framework.exceptions import AuthenticationFailed
+from config.instrumentation import timed_serialization
+from users.authentication import ClaimsJWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+
+from idempotency.keys import respond_once
+from inventory.holds import OutOfStock
+from products.models import Product
+from products.representations import cart_item_rows, cart_items_data
+from .models import CartItem
+from .views import add_to_cart, clear_cart, out_of_stock_data, remove_cart_item, update_cart_item
+
+_jwt = ClaimsJWTAuthentication()
+
+
+async def authenticate(request):
+    header = _jwt.get_header(request)
+    raw = _jwt.get_raw_token(header) if header else None
+    if raw is None:
+        return None
+    try:
+        token = _jwt.get_validated_token(raw)
+    except (TokenError, AuthenticationFailed):
+        return None
+    try:
+        # Claims-only user; queries only for legacy tokens or a revocation miss.
+        return await sync_to_async(_jwt.get_user)(token)
+    except (AuthenticationFailed, TokenError):
+        return None
+
+
+def unauthorized():
+    return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+
+@require_GET
+async def cart_list(request):
+    user = await authenticate(request)
+    if user is None:
+        return unauthorized()
+    rows = cart_item_rows(CartItem.objects.filter(cart__user=user).order_by("id"))
+    with timed_serialization():
+        data = cart_items_data([row async for row in rows])
+    return JsonResponse(data, safe=False)
+
+
+def parse_body(request):
+    try:
+        return json.loads(request.body or b"{}"), None
+    except ValueError as exc:
+        return None, JsonResponse({"detail": f"JSON parse error - {exc}"}, status=400)
+
+
+def add_line(request, user):
+    payload, error = parse_body(request)
+    if error:
+        return error
+    try:
+        product_id = int(payload["product_id"])
+        quantity = int(payload.get("quantity", 1))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({"detail": "product_id and an integer quantity are required."}, status=400)
+    product = Product.objects.filter(pk=product_id).only("id").first() if quantity >= 1 else None
+    if product is None:
+        return JsonResponse({"detail": "Invalid product or quantity."}, status=400)
+    try:
+        item = add_to_cart(user, product, quantity)
+    except OutOfStock:
+        return JsonResponse(out_of_stock_data(user, [product_id]), status=409)
+    row = cart_item_rows(CartItem.objects.filter(pk=item.pk)).get()
+    return JsonResponse(cart_items_data([row])[0], status=201)
+
+
+def update_line(request, user, pk):
+    payload, error = parse_body(request)
+    if error:
+        return error
+    data, status = update_cart_item(user, pk, payload)
+    return JsonResponse(data, status=status)
+
+
+def remove_line(user, pk):
+    if not remove_cart_item(user, pk):
+        return JsonResponse({"error": "Item not found"}, status=404)
+    return HttpResponse(status=204)
+
+
+def clear(user):
+    clear_cart(user)
+    return JsonResponse({"detail": "Cart cleared successfully"})
+
+
+async def write(request, handler):
+    """Authenticate, then run `handler(user)` in the sync thread under the Idempotency-Key."""
+    user = await authenticate(request)
+    if user is None:
+        return unauthorized()
+    return await sync_to_async(respond_once)(request, user.pk, lambda: handler(user))
+
+
+@csrf_exempt
+@require_POST
+async def cart_add(request):
+    return await write(request, lambda user: add_line(request, user))
+
+
+@csrf_exempt
+@require_http_methods(["PUT"])
+async def cart_update(request, pk):
+    return await write(request, lambda user: update_line(request, user, pk))
+
+
+@csrf_exempt
+@require_http_methods(["DELETE"])
+async def cart_remove(request, pk):
+    return await write(request, lambda user: remove_line(user, pk))
+
+
+@csrf_exempt
+@require_POST
+async def cart_clear(request):
+    return await write(request, clear)
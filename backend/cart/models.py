@@ -7,6 +7,9 @@ User = settings.AUTH_USER_MODEL
 class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped by every change to the cart's items (cart.views.bump_cart_version);
+    # the cart summary ETag is built from it.
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"Cart of {self.user.username}"
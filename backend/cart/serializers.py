@@ -10,7 +10,25 @@ class CartItemSerializer(serializers.ModelSerializer):
         write_only=True,
         source='product'
     )
+    select_related_fields = ("product__category",)
 
     class Meta:
         model = CartItem
         fields = ['id', 'product', 'product_id', 'quantity']
+
+
+class CartOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=500)
+
+    def validate_operations(self, operations):
+        ids = {op['product_id'] for op in operations}
+        found = set(Product.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        if ids - found:
+            raise serializers.ValidationError(f"Invalid product ids: {sorted(ids - found)}")
+        return operations
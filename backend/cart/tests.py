@@ -1,3 +1,255 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from products.cache import get_cache
+from products.models import Category
+from products.tests import ExplainMixin, QueryCountMixin, make_product
+from products.representations import cart_item_rows, cart_items_data
+from users.serializers import ClaimsTokenObtainPairSerializer
+from inventory.models import StockHold
+from .models import Cart, CartItem
+from .serializers import CartItemSerializer
+from .views import fold_operations
+
+User = get_user_model()
+
+
+class CartQueryCountTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+
+    def add_item(self):
+        n = Category.objects.count()
+        category = Category.objects.create(name=f"Cat {n}", slug=f"cat-{n}")
+        CartItem.objects.create(cart=self.cart, product=make_product(category), quantity=2)
+
+    def test_cart_list(self):
+        self.assertConstantQueries("/api/cart/", self.add_item)
+
+
+class CartQueryPlanTests(ExplainMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(User(username=f"user{i}") for i in range(200))
+        carts = Cart.objects.bulk_create(Cart(user=user) for user in users)
+        products = [make_product(None) for _ in range(10)]
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product) for cart in carts for product in products
+        )
+        cls.user = users[7]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_cart_list(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.assertIndexed("/api/cart/")
+
+
+class CartItemRepresentationTests(TestCase):
+    def test_fast_path_matches_serializer(self):
+        user = User.objects.create_user(username="alice", password="pass")
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=make_product(None), quantity=3)
+        items = CartItem.objects.order_by("id")
+        self.assertEqual(
+            CartItemSerializer(items, many=True).data,
+            cart_items_data(cart_item_rows(items)),
+        )
+
+
+class CartSummaryTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.boot = make_product(None, price="12.50")
+        self.hat = make_product(None, price="3.00")
+
+    def test_summary_aggregates_items(self):
+        self.assertEqual(
+            self.client.get("/api/cart/summary/").json(),
+            {"item_count": 0, "total_quantity": 0, "subtotal": "0.00"},
+        )
+        self.client.post("/api/cart/batch/", {"operations": [
+            {"op": "add", "product_id": self.boot.id, "quantity": 2},
+            {"op": "add", "product_id": self.hat.id, "quantity": 3},
+        ]}, format="json")
+        self.assertEqual(
+            self.client.get("/api/cart/summary/").json(),
+            {"item_count": 2, "total_quantity": 5, "subtotal": "34.00"},
+        )
+
+    def test_unchanged_cart_revalidates_with_one_query(self):
+        self.client.post("/api/cart/add/", {"product_id": self.boot.id}, format="json")
+        etag = self.client.get("/api/cart/summary/")["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/cart/summary/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        item = CartItem.objects.get()
+        self.client.put(f"/api/cart/update/{item.id}/", {"quantity": 4}, format="json")
+        response = self.client.get("/api/cart/summary/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()["total_quantity"]), (200, 4))
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.boot.price = 20
+            self.boot.save()
+        response = self.client.get("/api/cart/summary/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()["subtotal"], "80.00")
+
+
+class CartBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.boot = make_product(None, stock=5)
+        self.hat = make_product(None, stock=5)
+
+    def batch(self, *operations, client=None):
+        return (client or self.client).post("/api/cart/batch/", {"operations": [
+            {"op": op, "product_id": product.id, "quantity": quantity} for op, product, quantity in operations
+        ]}, format="json")
+
+    def quantities(self):
+        return dict(CartItem.objects.values_list("product_id", "quantity"))
+
+    def test_fold_operations(self):
+        def op(kind, quantity=1):
+            return {"op": kind, "product_id": 1, "quantity": quantity}
+
+        self.assertEqual(fold_operations([op("add", 2), op("add", 3)]), {1: ("add", 5)})
+        self.assertEqual(fold_operations([op("set", 2), op("add", 3)]), {1: ("set", 5)})
+        self.assertEqual(fold_operations([op("remove"), op("add", 3)]), {1: ("set", 3)})
+        self.assertEqual(fold_operations([op("add", 3), op("set", 0)]), {1: ("remove", 0)})
+        self.assertEqual(fold_operations([op("remove"), op("add", 0)]), {1: ("remove", 0)})
+
+    def test_batch_applies_final_quantities(self):
+        response = self.batch(("add", self.boot, 2), ("add", self.hat, 1), ("add", self.boot, 1))
+        self.assertEqual(response.json()["total_quantity"], 4)
+        self.batch(("remove", self.hat, 1), ("add", self.hat, 0), ("set", self.boot, 1))
+        self.assertEqual(self.quantities(), {self.boot.id: 1})
+        self.assertEqual(self.client.get("/api/cart/summary/").json()["item_count"], 1)
+
+    def test_out_of_stock_rolls_back_the_whole_batch(self):
+        self.batch(("add", self.boot, 1))
+        response = self.batch(("add", self.boot, 1), ("set", self.hat, 6))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["available"][str(self.hat.id)], 5)
+        self.assertEqual(self.quantities(), {self.boot.id: 1})
+        self.assertEqual(list(StockHold.objects.values_list("product_id", "quantity")), [(self.boot.id, 1)])
+
+    def test_operation_limit(self):
+        self.assertEqual(self.batch(*[("add", self.boot, 0)] * 501).status_code, 400)
+        self.assertEqual(self.batch(*[("add", self.boot, 0)] * 500).status_code, 200)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        products = [make_product(None) for _ in range(20)]
+
+        def count(user, products):
+            client = APIClient()
+            client.force_authenticate(user)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.batch(*[("add", product, 1) for product in products], client=client)
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        bob, carol = (User.objects.create_user(username=name, password="pass") for name in ("bob", "carol"))
+        self.assertEqual(count(bob, products[:2]), count(carol, products))
+
+
+class AsyncCartTests(TestCase):
+    """The async cart views under /api/async/cart/ answer like the sync ones."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pass")
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.boot = make_product(None, stock=3)
+
+    async def test_responses_match_the_sync_views(self):
+        client = AsyncClient()
+        response = await client.post(
+            "/api/async/cart/add/", {"product_id": self.boot.pk, "quantity": 2},
+            content_type="application/json", headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        added = response.json()
+        sync = await sync_to_async(APIClient().get)("/api/cart/", headers=self.headers)
+        self.assertEqual([added], sync.json())
+        self.assertEqual((await client.get("/api/async/cart/", headers=self.headers)).json(), sync.json())
+
+        response = await client.post(
+            "/api/async/cart/add/", {"product_id": self.boot.pk, "quantity": 2},
+            content_type="application/json", headers=self.headers,
+        )
+        self.assertEqual((response.status_code, response.json()["available"]), (409, {str(self.boot.pk): 3}))
+
+    async def test_writes_match_the_sync_views(self):
+        client, sync = AsyncClient(), APIClient()
+        add = sync_to_async(sync.post)
+        item = (await add("/api/cart/add/", {"product_id": self.boot.pk}, format="json", headers=self.headers)).json()
+
+        response = await client.put(
+            f"/api/async/cart/update/{item['id']}/", {"quantity": 2},
+            content_type="application/json", headers=self.headers,
+        )
+        listed = await sync_to_async(sync.get)("/api/cart/", headers=self.headers)
+        self.assertEqual((response.status_code, [response.json()]), (200, listed.json()))
+        response = await client.put(
+            f"/api/async/cart/update/{item['id']}/", {"quantity": 4},
+            content_type="application/json", headers=self.headers,
+        )
+        self.assertEqual((response.status_code, response.json()["available"]), (409, {str(self.boot.pk): 3}))
+        response = await client.put(
+            "/api/async/cart/update/999999/", {"quantity": 1}, content_type="application/json", headers=self.headers,
+        )
+        self.assertEqual((response.status_code, response.json()), (404, {"error": "Item not found"}))
+
+        response = await client.delete(f"/api/async/cart/remove/{item['id']}/", headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual((await client.delete(f"/api/async/cart/remove/{item['id']}/", headers=self.headers)).status_code, 404)
+        self.assertFalse(await StockHold.objects.filter(user=self.user).aexists())
+
+        await add("/api/cart/add/", {"product_id": self.boot.pk}, format="json", headers=self.headers)
+        response = await client.post("/api/async/cart/clear/", headers=self.headers)
+        self.assertEqual(response.json(), {"detail": "Cart cleared successfully"})
+        self.assertFalse(await CartItem.objects.filter(cart__user=self.user).aexists())
+
+    async def test_idempotency_keys_are_honoured(self):
+        client = AsyncClient()
+        headers = {**self.headers, "Idempotency-Key": "add-1"}
+
+        async def post(quantity):
+            return await client.post(
+                "/api/async/cart/add/", {"product_id": self.boot.pk, "quantity": quantity},
+                content_type="application/json", headers=headers,
+            )
+
+        first, retry = await post(1), await post(1)
+        self.assertEqual((retry.status_code, retry.content), (first.status_code, first.content))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        quantities = CartItem.objects.filter(cart__user=self.user).values_list("quantity", flat=True)
+        self.assertEqual([q async for q in quantities], [1])
+        self.assertEqual((await post(2)).status_code, 422)
+
+    async def test_anonymous_requests_are_refused_like_the_sync_views(self):
+        client = AsyncClient()
+        sync = await sync_to_async(APIClient().get)("/api/cart/")
+        for response in (
+            await client.get("/api/async/cart/"),
+            await client.get("/api/async/cart/", headers={"Authorization": "Bearer not-a-token"}),
+            await client.post("/api/async/cart/add/", {"product_id": self.boot.pk}, content_type="application/json"),
+        ):
+            self.assertEqual((response.status_code, response.json()), (401, sync.json()))
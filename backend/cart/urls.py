@@ -1,9 +1,12 @@
 from django.urls import path
-from .views import CartListView, CartAddView, CartUpdateView, CartDeleteView, CartClearView
+from .views import CartListView, CartAddView, CartUpdateView, CartDeleteView, CartClearView, CartBatchView, CartSummaryView, CartCheckoutView
 
 urlpatterns = [
     path('', CartListView.as_view(), name='cart-list'),
     path('add/', CartAddView.as_view(), name='cart-add'),
+    path('batch/', CartBatchView.as_view(), name='cart-batch'),
+    path('summary/', CartSummaryView.as_view(), name='cart-summary'),
+    path('checkout/', CartCheckoutView.as_view(), name='cart-checkout'),
     path('update/<int:pk>/', CartUpdateView.as_view(), name='cart-update'), 
     path('remove/<int:pk>/', CartDeleteView.as_view(), name='cart-delete'),
     path('clear/', CartClearView.as_view(), name='cart-clear'),
@@ -1,75 +1,287 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from .models import Cart, CartItem
-from .serializers import CartItemSerializer
+from .serializers import CartItemSerializer, CartBatchSerializer
+from inventory.holds import OutOfStock, available_stock, hold_stock, release_holds
+from config.instrumentation import timed_serialization
+from idempotency.keys import IdempotentMixin
+from inventory.models import StockHold
+from products.cache import get_versions
 from products.models import Product
+from products.queryplan import plan_queryset
+from products.representations import cart_item_rows, cart_items_data
 
 def get_user_cart(user):
     cart, created = Cart.objects.get_or_create(user=user)
     return cart
 
+def user_cart_items(user):
+    # Reads and per-item edits go through the user join; no cart row needed.
+    return CartItem.objects.filter(cart__user=user)
+
+def bump_cart_version(user):
+    # One UPDATE, no read: concurrent changes each get their own bump.
+    Cart.objects.filter(user=user).update(version=F('version') + 1)
+
+def cart_summary_etag(user):
+    """
+    Cart version plus the catalog version: the subtotal uses live prices,
+    so a product edit must also change the tag. No join, no aggregate.
+    """
+    version = Cart.objects.filter(user=user).values_list('version', flat=True).first() or 0
+    catalog, = get_versions(['products'])
+    return f'"{version}-{catalog:.6f}"'
+
+def cart_summary(user):
+    """Item count, total quantity and subtotal in one aggregate query."""
+    summary = user_cart_items(user).aggregate(
+        item_count=Count('id'),
+        total_quantity=Coalesce(Sum('quantity'), 0),
+        subtotal=Coalesce(
+            Sum(F('quantity') * F('product__price'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+            Value(Decimal(0)),
+        ),
+    )
+    summary['subtotal'] = f"{summary['subtotal']:.2f}"
+    return summary
+
+def out_of_stock_data(user, product_ids):
+    # What the user could have instead, their own holds included.
+    return {"error": "Not enough stock", "available": available_stock(product_ids, user.pk)}
+
+def out_of_stock(user, product_ids):
+    return Response(out_of_stock_data(user, product_ids), status=status.HTTP_409_CONFLICT)
+
+def add_to_cart(user, product, quantity):
+    """
+    Add `quantity` to the user's line for `product` and hold the line's
+    new total; raises OutOfStock with the cart unchanged.
+    """
+    cart = get_user_cart(user)
+    with transaction.atomic():
+        # Insert at 0, then increment in the database (writes first, and
+        # double clicks must not overwrite each other).
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=0)], ignore_conflicts=True)
+        cart.items.filter(product=product).update(quantity=F('quantity') + quantity)
+        item = cart.items.get(product=product)
+        hold_stock(user.pk, {product.pk: item.quantity})
+        bump_cart_version(user)
+    item.product = product
+    return item
+
+def update_cart_item(user, pk, data):
+    """
+    Apply a partial CartItemSerializer update to one of the user's lines
+    and hold its new quantity. Returns (body, status), shared by
+    CartUpdateView and cart.async_views.
+    """
+    try:
+        item = user_cart_items(user).get(pk=pk)
+    except CartItem.DoesNotExist:
+        return {"error": "Item not found"}, status.HTTP_404_NOT_FOUND
+    previous = item.product_id
+    serializer = CartItemSerializer(item, data=data, partial=True)
+    if not serializer.is_valid():
+        return serializer.errors, status.HTTP_400_BAD_REQUEST
+    quantities = {previous: 0}  # released if the line moved to another product
+    try:
+        with transaction.atomic():
+            item = serializer.save()
+            quantities[item.product_id] = item.quantity
+            hold_stock(user.pk, quantities)
+            bump_cart_version(user)
+    except OutOfStock:
+        return out_of_stock_data(user, [item.product_id]), status.HTTP_409_CONFLICT
+    return serializer.data, status.HTTP_200_OK
+
+def remove_cart_item(user, pk):
+    """Delete one of the user's lines and release what it held; False if missing."""
+    with transaction.atomic():
+        deleted, _ = user_cart_items(user).filter(pk=pk).delete()
+        if not deleted:
+            return False
+        # Whatever is held for products no longer in the cart.
+        release_holds(StockHold.objects.filter(user=user).exclude(
+            product_id__in=user_cart_items(user).values('product_id')
+        ))
+        bump_cart_version(user)
+    return True
+
+def clear_cart(user):
+    with transaction.atomic():
+        deleted, _ = user_cart_items(user).delete()
+        release_holds(StockHold.objects.filter(user=user))
+        if deleted:
+            bump_cart_version(user)
+
+def fold_operations(operations):
+    """
+    Collapse a list of add/set/remove operations into one final action per
+    product: ('add', n) for a relative change, ('set', n) or ('remove', 0).
+    """
+    final = {}
+    for op in operations:
+        product_id, kind, quantity = op['product_id'], op['op'], op['quantity']
+        previous = final.get(product_id)
+        if kind == 'add' and previous is not None:
+            if previous[0] == 'remove':
+                final[product_id] = ('set', quantity)
+            else:
+                final[product_id] = (previous[0], previous[1] + quantity)
+        elif kind == 'set' and quantity == 0:
+            final[product_id] = ('remove', 0)
+        else:
+            final[product_id] = (kind, quantity)
+    # remove + add 0 lands on ('set', 0): drop the line rather than keep it empty.
+    return {pid: ('remove', 0) if action == ('set', 0) else action for pid, action in final.items()}
+
+def apply_cart_operations(cart, operations):
+    """Apply folded operations with at most four statements, atomically."""
+    final = fold_operations(operations)
+    removes = [pid for pid, (kind, _) in final.items() if kind == 'remove']
+    sets = {pid: qty for pid, (kind, qty) in final.items() if kind == 'set'}
+    adds = {pid: qty for pid, (kind, qty) in final.items() if kind == 'add' and qty}
+
+    with transaction.atomic():
+        if removes:
+            cart.items.filter(product_id__in=removes).delete()
+        if sets:
+            CartItem.objects.bulk_create(
+                [CartItem(cart=cart, product_id=pid, quantity=qty) for pid, qty in sets.items()],
+                update_conflicts=True,
+                unique_fields=['cart', 'product'],
+                update_fields=['quantity'],
+            )
+        if adds:
+            # Insert missing rows at 0, then increment in the database so
+            # concurrent adds of the same product are never lost.
+            CartItem.objects.bulk_create(
+                [CartItem(cart=cart, product_id=pid, quantity=0) for pid in adds],
+                ignore_conflicts=True,
+            )
+            cart.items.filter(product_id__in=adds).update(quantity=Case(
+                *[When(product_id=pid, then=F('quantity') + qty) for pid, qty in adds.items()]
+            ))
+        if final:
+            # Hold the final quantity of every product touched (0 releases).
+            quantities = dict.fromkeys(final, 0)
+            quantities.update(cart.items.filter(product_id__in=final).values_list('product_id', 'quantity'))
+            hold_stock(cart.user_id, quantities)
+            bump_cart_version(cart.user_id)
+
+def cart_payload(items):
+    with timed_serialization():
+        data = CartItemSerializer(items, many=True).data
+    return {
+        'items': data,
+        'total_quantity': sum(item.quantity for item in items),
+        'subtotal': f"{sum((item.product.price * item.quantity for item in items), Decimal(0)):.2f}",
+    }
+
 class CartListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cart = get_user_cart(request.user)
-        serializer = CartItemSerializer(cart.items.all(), many=True)
-        return Response(serializer.data)
+        rows = cart_item_rows(user_cart_items(request.user).order_by('id'))
+        with timed_serialization():
+            data = cart_items_data(rows)
+        return Response(data)
 
-class CartAddView(APIView):
+class CartAddView(IdempotentMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        cart = get_user_cart(request.user)
         serializer = CartItemSerializer(data=request.data)
         if serializer.is_valid():
             product = serializer.validated_data['product']
-            quantity = serializer.validated_data.get('quantity', 1)
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                product=product,
-                defaults={'quantity': quantity}
-            )
-            if not created:
-                cart_item.quantity += quantity
-                cart_item.save()
+            try:
+                cart_item = add_to_cart(request.user, product, serializer.validated_data.get('quantity', 1))
+            except OutOfStock:
+                return out_of_stock(request.user, [product.pk])
             return Response(CartItemSerializer(cart_item).data, status=201)
         return Response(serializer.errors, status=400)
 
-class CartUpdateView(APIView):
+class CartBatchView(IdempotentMixin, APIView):
+    """Apply a list of add/set/remove operations in one request and transaction."""
     permission_classes = [IsAuthenticated]
 
-    def put(self, request, pk):
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
         cart = get_user_cart(request.user)
+        operations = serializer.validated_data['operations']
         try:
-            item = CartItem.objects.get(pk=pk, cart=cart)
-        except CartItem.DoesNotExist:
-            return Response({"error": "Item not found"}, status=404)
-        serializer = CartItemSerializer(item, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=400)
+            apply_cart_operations(cart, operations)
+        except OutOfStock:
+            return out_of_stock(request.user, {op['product_id'] for op in operations})
+        items = list(plan_queryset(cart.items.all(), CartItemSerializer))
+        return Response(cart_payload(items))
+
+class CartUpdateView(IdempotentMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, pk):
+        data, code = update_cart_item(request.user, pk, request.data)
+        return Response(data, status=code)
 
-class CartDeleteView(APIView):
+class CartDeleteView(IdempotentMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, pk):
-        cart = get_user_cart(request.user)
-        try:
-            item = CartItem.objects.get(pk=pk, cart=cart)
-            item.delete()
-            return Response(status=204)
-        except CartItem.DoesNotExist:
+        if not remove_cart_item(request.user, pk):
             return Response({"error": "Item not found"}, status=404)
+        return Response(status=204)
 
-class CartClearView(APIView):
+class CartClearView(IdempotentMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        cart = get_user_cart(request.user)
-        # Delete all items in the cart
-        cart.items.all().delete()
-        return Response({"detail": "Cart cleared successfully"})
\ No newline at end of file
+        clear_cart(request.user)
+        return Response({"detail": "Cart cleared successfully"})
+
+class CartCheckoutView(IdempotentMixin, APIView):
+    """
+    Start checkout: hold the whole cart for CHECKOUT_HOLD_TTL seconds, so
+    nothing sells out while the buyer fills in the form. 409 with the
+    quantities still available when part of the cart can't be held.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        quantities = dict(user_cart_items(request.user).values_list('product_id', 'quantity'))
+        if not quantities:
+            return Response({"error": "Cart is empty"}, status=400)
+        try:
+            expires_at = hold_stock(request.user.pk, quantities, ttl=settings.CHECKOUT_HOLD_TTL)
+        except OutOfStock:
+            return out_of_stock(request.user, quantities)
+        return Response({"held": quantities, "expires_at": expires_at})
+
+class CartSummaryView(APIView):
+    """
+    Item count, total quantity and subtotal for the header badge. Polls
+    with If-None-Match cost one indexed lookup of the cart version and
+    get a 304 while nothing changed.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        etag = cart_summary_etag(request.user)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is None:
+            response = Response(cart_summary(request.user))
+        else:
+            response = not_modified
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
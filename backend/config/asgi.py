@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Deployment profile: run under an ASGI server, e.g.
+
+    uvicorn config.asgi:application --workers 4 --no-access-log
+
+The native async views are mounted under /api/async/ (products.async_urls,
+cart.async_urls); the DRF views keep working and run in a thread each.
+`manage.py bench_asgi` compares both paths.
 """
 
 import os
@@ -0,0 +1,294 @@
+"""
+Per-request performance instrumentation.
+
+InstrumentationMiddleware records, for a sampled share of requests
+(METRICS_SAMPLE_RATE), the wall time, the number of SQL queries and the
+time spent in them, the time spent building the response data
+(serialization) and rendering it, and the response size. Figures go into in-process histograms grouped by URL name (or the
+route pattern for unnamed URLs) and are sent back in a Server-Timing
+header. `metrics` serves the histograms as Prometheus text, or JSON with
+`?format=json`.
+
+Query time is collected by a database execute wrapper that reads the
+current request from a context variable, so queries run through
+sync_to_async by the async views are counted too. Serialization time
+is what the views spend inside `timed_serialization`: serializer `.data`
+(TimedSerializationMixin) and the products.representations rows, less
+the SQL run meanwhile by lazy querysets. Render time is the JSON
+encoding by TimedJSONRenderer (DRF responses only).
+
+`metrics` is open to staff users; METRICS_ALLOWED_IPS additionally lets
+listed REMOTE_ADDRs in, which is only safe when REMOTE_ADDR is the real
+client (not a local reverse proxy).
+"""
+import bisect
+import contextlib
+import contextvars
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name: (help, buckets)
+HISTOGRAMS = {
+    "request_duration_seconds": ("Wall time from middleware entry to response", SECONDS_BUCKETS),
+    "db_query_duration_seconds": ("Time spent executing SQL per request", SECONDS_BUCKETS),
+    "db_queries": ("SQL queries per request", QUERY_BUCKETS),
+    "serialize_duration_seconds": ("Time spent building the response data, SQL excluded", SECONDS_BUCKETS),
+    "render_duration_seconds": ("Time spent JSON-encoding the response data", SECONDS_BUCKETS),
+    "response_size_bytes": ("Response body size", BYTES_BUCKETS),
+}
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """Histograms per (metric, route), plus request counts per status."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.requests = {}
+
+    def record(self, route, status, values):
+        with self.lock:
+            key = (route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for name, value in values.items():
+                histogram = self.histograms.get((name, route))
+                if histogram is None:
+                    histogram = self.histograms[(name, route)] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.requests.clear()
+
+    def as_dict(self):
+        with self.lock:
+            routes = {}
+            for (route, status), count in sorted(self.requests.items()):
+                routes.setdefault(route, {"requests": {}})["requests"][str(status)] = count
+            for (name, route), histogram in sorted(self.histograms.items()):
+                routes.setdefault(route, {"requests": {}})[name] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "buckets": {str(bound): count for bound, count in histogram.cumulative()},
+                }
+            return routes
+
+    def as_prometheus(self):
+        lines = ["# HELP django_requests_total Requests by route and status",
+                 "# TYPE django_requests_total counter"]
+        with self.lock:
+            for (route, status), count in sorted(self.requests.items()):
+                lines.append(f'django_requests_total{{route="{route}",status="{status}"}} {count}')
+            by_name = {}
+            for (name, route), histogram in sorted(self.histograms.items()):
+                by_name.setdefault(name, []).append((route, histogram))
+            for name, entries in by_name.items():
+                metric = f"django_{name}"
+                lines += [f"# HELP {metric} {HISTOGRAMS[name][0]}", f"# TYPE {metric} histogram"]
+                for route, histogram in entries:
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{route="{route}",le="{bound}"}} {count}')
+                    lines.append(f'{metric}_sum{{route="{route}"}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{route="{route}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db", "serialize", "serializing", "render")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serializing = False
+        self.render = 0.0
+
+
+def time_queries(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    # Fires on every (re)connect of the same wrapper object.
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+connection_created.connect(install_query_timer)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timings.render += time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def timed_serialization():
+    """Counts the block as serialization time; nested blocks count once."""
+    timings = _current.get()
+    if timings is None or timings.serializing:
+        yield
+        return
+    timings.serializing = True
+    start, db = time.perf_counter(), timings.db
+    try:
+        yield
+    finally:
+        timings.serializing = False
+        timings.serialize += time.perf_counter() - start - (timings.db - db)
+
+
+class TimedSerializationMixin:
+    """DRF's generic list and retrieve, with serializer `.data` timed."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        with timed_serialization():
+            data = self.get_serializer(queryset if page is None else page, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        with timed_serialization():
+            data = self.get_serializer(instance).data
+        return Response(data)
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    # Unnamed URLs would otherwise be labelled with the view's import path.
+    return match.view_name if match.url_name else match.route
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+        # Connections opened before this module was imported.
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection=connection)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def finish(self, request, response, timings, elapsed):
+        values = {
+            "request_duration_seconds": elapsed,
+            "db_query_duration_seconds": timings.db,
+            "db_queries": timings.queries,
+            "serialize_duration_seconds": timings.serialize,
+            "render_duration_seconds": timings.render,
+        }
+        if not response.streaming:
+            values["response_size_bytes"] = len(response.content)
+        registry.record(route_name(request), response.status_code, values)
+        response["Server-Timing"] = (
+            f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries", '
+            f"serialize;dur={timings.serialize * 1000:.2f}, "
+            f"render;dur={timings.render * 1000:.2f}, "
+            f"total;dur={elapsed * 1000:.2f}"
+        )
+        return response
+
+
+def metrics(request):
+    """Histograms as Prometheus text, or JSON with ?format=json."""
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS and not (
+        request.user.is_authenticated and request.user.is_staff
+    ):
+        return HttpResponseForbidden()
+    if request.GET.get("format") == "json":
+        return JsonResponse(registry.as_dict())
+    return HttpResponse(registry.as_prometheus(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,182 @@
+"""
+Read-replica routing.
+
+ReplicaRouter sends the reads of opted-in views (ReplicaReadsMixin: the
+catalog and order-history GETs) to one of DATABASE_REPLICAS and
+everything else to the primary. A request reads from one replica
+throughout, chosen at its first query among those that accept a
+connection.
+
+Read-your-writes: once a request writes, or opens a transaction, its
+remaining reads go to the primary. ReplicaMiddleware then pins the user
+to the primary for REPLICA_STICKY_SECONDS, the replication lag allowed
+for. Pins live in the default cache, which has to be shared by all
+processes for them to hold across processes. products.cache does not
+store a replica read of a version younger than that, so a lagging
+replica is never cached under the new version.
+
+A replica that refuses connections or fails a query is skipped for
+REPLICA_RETRY_SECONDS; a read that failed on it is run again on the
+primary.
+"""
+import contextvars
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_PREFIX = "replica-pin:"
+SAFE_METHODS = ("GET", "HEAD")
+
+_current = contextvars.ContextVar("replica_state", default=None)
+_down_until = {}
+
+
+class RequestState:
+    __slots__ = ("reads", "wrote", "failed", "alias")
+
+    def __init__(self):
+        self.reads = False  # set by ReplicaReadsMixin
+        self.wrote = False
+        self.failed = False
+        self.alias = None
+
+
+def pin_primary(user_id):
+    """Send the user's reads to the primary for REPLICA_STICKY_SECONDS."""
+    cache.set(f"{PIN_PREFIX}{user_id}", True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(f"{PIN_PREFIX}{user_id}", False)
+
+
+def read_from_replica():
+    """Whether the current request has read from a replica."""
+    state = _current.get()
+    return state is not None and state.alias is not None and not state.failed
+
+
+def mark_down(alias):
+    _down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+    connections[alias].close()
+
+
+def healthy_replica():
+    """A replica that accepts a connection, or None when all are down."""
+    now = time.monotonic()
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if _down_until.get(alias, 0) <= now]
+    random.shuffle(candidates)
+    for alias in candidates:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            mark_down(alias)
+            continue
+        return alias
+    return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not state.reads or state.wrote or state.failed:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads inside a transaction must see its writes.
+            state.wrote = True
+            return DEFAULT_DB_ALIAS
+        if state.alias is None:
+            state.alias = healthy_replica()
+            if state.alias is None:
+                state.failed = True
+                return DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Tracks each request's writes and pins its user to the primary after one."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RequestState()
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            self.pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        state = RequestState()
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            # request.user may be the session's lazy user, which queries.
+            await sync_to_async(self.pin_writer)(request)
+        return response
+
+    def pin_writer(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_primary(user.pk)
+
+
+class ReplicaReadsMixin:
+    """
+    Lets a view's GET and HEAD requests read from a replica, unless the
+    requesting user is pinned to the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        state = _current.get()
+        if state is None or not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except DatabaseError:
+            if state.alias is None or state.wrote:
+                raise
+            mark_down(state.alias)
+        state.failed, state.alias = True, None
+        return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = _current.get()
+        if state is not None and settings.DATABASE_REPLICAS and request.method in SAFE_METHODS:
+            user = request.user
+            state.reads = not (user.is_authenticated and is_pinned(user.pk))
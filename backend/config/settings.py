@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +50,10 @@ INSTALLED_APPS = [
     'products',
     'cart',
     'orders',
+    'inventory',
+    'analytics',
+    'idempotency',
+    'jobs',
 
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -55,18 +61,21 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.instrumentation.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 ROOT_URLCONF = 'config.urls'
 
@@ -95,9 +104,58 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # On disk rather than in memory so threaded tests share one database.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Read replicas (config.replicas): catalog and order-history reads go to
+# one of DATABASE_REPLICAS. SQLITE_REPLICAS=2 adds two read-only SQLite
+# copies of the primary for local testing; `manage.py sync_replicas`
+# refreshes them. Reads stay on the primary for REPLICA_STICKY_SECONDS
+# after a write, and a failing replica is skipped for REPLICA_RETRY_SECONDS.
+DATABASE_ROUTERS = ['config.replicas.ReplicaRouter']
+DATABASE_REPLICAS = []
+for n in range(1, int(os.environ.get('SQLITE_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{n}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / f'db_replica{n}.sqlite3'}?mode=ro",
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{n}')
+REPLICA_STICKY_SECONDS = 5
+REPLICA_RETRY_SECONDS = 30
+
+
+# Cache
+# Local memory is per process: invalidation only reaches the process that
+# handled the write. Multi-process deployments should point this at a
+# shared backend (FileBasedCache, Redis, Memcached).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalog',
+    }
+}
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 300
+
+# Job queue (jobs.queue): JOBS_EAGER runs jobs inline when enqueued, for
+# tests and development without `manage.py runworker`. Failed jobs retry
+# after JOBS_RETRY_BASE seconds, doubling up to JOBS_RETRY_MAX; a job
+# claimed longer than JOBS_LOCK_TIMEOUT ago is handed to another worker.
+JOBS_EAGER = False
+JOBS_WORKER_CONCURRENCY = 2
+JOBS_RETRY_BASE = 10
+JOBS_RETRY_MAX = 60 * 60
+JOBS_LOCK_TIMEOUT = 10 * 60
+
+# Order confirmations are printed until a real backend is configured.
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'orders@example.com'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -144,14 +202,35 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'config.instrumentation.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ClaimsTokenObtainPairSerializer',
+}
+
+# How long a process trusts its "refresh token not blacklisted" answer.
+JWT_REVOCATION_CACHE_TTL = 30
+
+# Share of requests timed by config.instrumentation (0..1). /api/metrics/
+# is staff-only; METRICS_ALLOWED_IPS opts client addresses in, but behind
+# a reverse proxy on the same host every request comes from 127.0.0.1.
+METRICS_SAMPLE_RATE = 1.0
+METRICS_ALLOWED_IPS = []
+
+# Seconds stock stays held for a cart line, and for a started checkout.
+STOCK_HOLD_TTL = 15 * 60
+CHECKOUT_HOLD_TTL = 10 * 60
+
+# Seconds a response stays replayable under its Idempotency-Key.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
@@ -20,9 +20,12 @@ from django.urls import include
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
+    TokenBlacklistView,
 )
 from django.conf import settings
 from django.conf.urls.static import static
+from config.instrumentation import metrics
+from products.views import image_variant
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,9 +34,21 @@ urlpatterns = [
     path('api/products/', include('products.urls')),
     path('api/cart/', include('cart.urls')),
     path('api/orders/', include('orders.urls')),
+    path('api/inventory/', include('inventory.urls')),
+    path('api/analytics/', include('analytics.urls')),
+
+    # native async views, see config/asgi.py
+    path('api/async/products/', include('products.async_urls')),
+    path('api/async/cart/', include('cart.async_urls')),
 
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
+    path('api/metrics/', metrics, name='metrics'),
+
+    # Resized images are generated on first request when missing; the web
+    # server should try MEDIA_ROOT first and fall back to this route.
+    path(f"{settings.MEDIA_URL.strip('/')}/variants/<str:variant>/<path:path>", image_variant, name='image-variant'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "key", "status_code", "created_at", "expires_at")
+    search_fields = ("user__username", "key")
+    raw_id_fields = ("user",)
+    readonly_fields = ("user", "key", "fingerprint", "status_code", "content_type", "body", "created_at", "expires_at")
@@ -0,0 +1,171 @@
+"""
+Idempotency keys for unsafe requests.
+
+A client that retries a request after a timeout sends the same
+`Idempotency-Key` header again: the first request runs, and every retry
+gets its stored response without touching carts, products or stock.
+
+The key row is the first write of the request's transaction and the
+response is stored before it commits, so a concurrent duplicate waits on
+the (user, key) unique index and replays the outcome once the first one
+commits; no lock is taken. A request that fails (an exception or a 5xx)
+rolls its key back with everything else, so it can be retried. Reusing a
+key for a different method, path or body is refused with 422.
+
+IdempotentMixin does this for DRF views; `respond_once` for the plain
+views of the ASGI deployment (cart.async_views).
+
+Keys are kept for IDEMPOTENCY_KEY_TTL seconds; `manage.py
+sweep_idempotency_keys` deletes expired ones in batches.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+BAD_KEY = f"must be 1 to {MAX_KEY_LENGTH} characters"
+REUSED_KEY = f"{HEADER} was already used for a different request"
+
+
+class Replay(Exception):
+    """Raised from a view's initial() to answer with `response` instead of the handler."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+def fingerprint(request):
+    """SHA-256 of the method, path with query string and body."""
+    digest = hashlib.sha256(f"{request.method} {request.get_full_path()}\n".encode())
+    digest.update(request.body)
+    return digest.digest()
+
+
+def claim(user_id, key, digest):
+    """
+    (row, created): insert the key for a new request, or return the row
+    stored by an earlier one. Call inside the request's transaction.
+    """
+    fields = {"fingerprint": digest, "expires_at": timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)}
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user_id=user_id, key=key, **fields), True
+    except IntegrityError:
+        pass
+    stored = IdempotencyKey.objects.filter(user_id=user_id, key=key, expires_at__gt=timezone.now()).first()
+    if stored is not None:
+        return stored, False
+    # Expired but not swept yet: the key is free again.
+    IdempotencyKey.objects.filter(user_id=user_id, key=key).delete()
+    return IdempotencyKey.objects.create(user_id=user_id, key=key, **fields), True
+
+
+def store(row, response):
+    if hasattr(response, "render"):
+        response.render()  # DRF responses render lazily
+    row.status_code = response.status_code
+    row.content_type = response.get("Content-Type", "")
+    row.body = response.content
+    row.save(update_fields=["status_code", "content_type", "body"])
+
+
+def replay(row, digest):
+    if bytes(row.fingerprint) != digest:
+        return Response({"error": REUSED_KEY}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    response = HttpResponse(bytes(row.body), status=row.status_code, content_type=row.content_type)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def sweep_expired(batch_size=1000, now=None):
+    """Delete keys that expired before `now`, oldest first, in batches; returns how many."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        batch = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now).order_by("expires_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        deleted, _ = IdempotencyKey.objects.filter(pk__in=batch).delete()
+        total += deleted
+        if len(batch) < batch_size:
+            return total
+
+
+def respond_once(request, user_id, handler):
+    """
+    Run `handler()`, a sync callable returning an HttpResponse, at most
+    once per Idempotency-Key, like IdempotentMixin does for DRF views.
+    Call it from the sync thread.
+    """
+    if request.method not in IDEMPOTENT_METHODS or HEADER not in request.headers:
+        return handler()
+    key = request.headers[HEADER]
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return JsonResponse({HEADER: [BAD_KEY]}, status=status.HTTP_400_BAD_REQUEST)
+    digest = fingerprint(request)
+    with transaction.atomic():
+        row, created = claim(user_id, key, digest)
+        if not created:
+            if bytes(row.fingerprint) != digest:
+                return JsonResponse({"error": REUSED_KEY}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            return replay(row, digest)
+        response = handler()
+        if response.status_code >= 500:
+            transaction.set_rollback(True)
+        else:
+            store(row, response)
+    return response
+
+
+class IdempotentMixin:
+    """
+    Honours the Idempotency-Key header on `idempotent_methods` of an
+    authenticated view; requests without the header run as before.
+    Replayed responses carry `Idempotent-Replayed: true`.
+    """
+    idempotent_methods = IDEMPOTENT_METHODS
+
+    def keyed(self, request):
+        return request.method in self.idempotent_methods and HEADER in request.headers
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.keyed(request):
+            return super().dispatch(request, *args, **kwargs)
+        self._idempotency_key = None
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+            elif self._idempotency_key is not None:
+                store(self._idempotency_key, response)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self.keyed(request):
+            return
+        key = request.headers[HEADER]
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: BAD_KEY})
+        digest = fingerprint(request)
+        row, created = claim(request.user.pk, key, digest)
+        if not created:
+            raise Replay(replay(row, digest))
+        self._idempotency_key = row
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Replay):
+            return exc.response
+        return super().handle_exception(exc)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from idempotency.keys import sweep_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired idempotency keys, oldest first, in batches. "
+        "Run from cron, or keep running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--loop", action="store_true", help="keep sweeping every --interval seconds")
+        parser.add_argument("--interval", type=float, default=300)
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = sweep_expired(options["batch_size"])
+            if deleted or options["verbosity"] > 1:
+                self.stdout.write(f"Deleted {deleted} expired idempotency keys")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
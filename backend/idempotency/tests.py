@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cart.models import CartItem
+from orders.models import Order
+from products.tests import make_product
+from .keys import sweep_expired
+from .models import IdempotencyKey
+
+User = get_user_model()
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.product = make_product(None, stock=10)
+
+    def order(self, key, quantity=2):
+        return self.client.post("/api/orders/", {
+            "shipping_address": "x",
+            "items_write": [{"product_id": self.product.pk, "quantity": quantity}],
+        }, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_order_without_touching_stock(self):
+        first = self.order("order-1")
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as ctx:
+            retry = self.order("order-1")
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse([q for q in ctx.captured_queries if "products_product" in q["sql"]])
+        self.product.refresh_from_db()
+        self.assertEqual((Order.objects.count(), self.product.stock), (1, 8))
+
+        self.assertEqual(self.order("order-1", quantity=3).status_code, 422)
+        self.assertEqual(self.order("order-2").status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_cart_add_is_applied_once(self):
+        for _ in range(3):
+            response = self.client.post(
+                "/api/cart/add/", {"product_id": self.product.pk, "quantity": 2},
+                format="json", HTTP_IDEMPOTENCY_KEY="add-1",
+            )
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 2)
+        # Without a key every request runs.
+        self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": 2}, format="json")
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 4)
+
+    def test_expired_keys_are_free_again_and_swept_in_batches(self):
+        for i in range(5):
+            self.order(f"order-{i}", quantity=1)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        retry = self.order("order-0", quantity=1)
+        self.assertNotIn("Idempotent-Replayed", retry)
+        self.assertEqual(Order.objects.count(), 6)
+        self.assertEqual(sweep_expired(batch_size=2), 4)
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["order-0"])
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    """Parallel identical requests place one order and all get its response."""
+
+    def test_parallel_duplicates_place_one_order(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a database shared across threads")
+        user = User.objects.create_user(username="alice", password="pass")
+        product = make_product(None, stock=100)
+        retries = 10
+        barrier = threading.Barrier(retries)
+
+        def place(_):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                response = client.post("/api/orders/", {
+                    "shipping_address": "x",
+                    "items_write": [{"product_id": product.pk, "quantity": 1}],
+                }, format="json", HTTP_IDEMPOTENCY_KEY="flaky-network")
+                return response.status_code, response.json()["id"]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=retries) as pool:
+            results = list(pool.map(place, range(retries)))
+
+        order = Order.objects.get()
+        self.assertEqual(results, [(201, order.pk)] * retries)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 99)
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import StockHold
+
+
+@admin.register(StockHold)
+class StockHoldAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "product", "quantity", "expires_at", "created_at")
+    search_fields = ("user__username", "product__name")
+    raw_id_fields = ("user", "product")
+    # Holds move Product.reserved; edit them through inventory.holds only.
+    readonly_fields = ("user", "product", "quantity", "expires_at", "created_at")
@@ -0,0 +1,174 @@
+"""
+Time-limited stock holds.
+
+A StockHold sets `quantity` units of a product aside for one user until
+`expires_at`. Product.reserved is the sum of a product's holds, so the
+stock anyone can still take is `stock - reserved`, read straight off the
+product row. Adding to the cart holds the line's quantity for
+STOCK_HOLD_TTL, starting checkout re-holds the whole cart for
+CHECKOUT_HOLD_TTL, and placing an order consumes the buyer's holds.
+Every change to `reserved` is one conditional UPDATE over the products
+involved, so two buyers can never hold the same unit, and a sold-out item
+is turned away at the cart instead of at order placement.
+
+Holds are removed with DELETE ... RETURNING (SQLite 3.35+, PostgreSQL):
+the quantities credited back are exactly the rows deleted, so a hold
+released by a request and by the sweeper at the same time only counts
+once. Expired holds are returned to stock by `manage.py sweep_holds`.
+"""
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from products.cache import bump_versions
+from products.models import Product
+from .models import StockHold
+
+
+class OutOfStock(Exception):
+    pass
+
+
+def _db():
+    return router.db_for_write(StockHold)
+
+
+def _delete_returning(holds):
+    """Delete the StockHolds in a queryset; returns the deleted (product_id, quantity) rows."""
+    db = _db()
+    sql, params = holds.using(db).values("id").query.sql_with_params()
+    connection = connections[db]
+    table = connection.ops.quote_name(StockHold._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({sql}) RETURNING product_id, quantity", params)
+        return cursor.fetchall()
+
+
+def _shift_reserved(deltas, check=True):
+    """
+    Add {product_id: delta} to Product.reserved in one UPDATE. With
+    `check`, increments only apply while stock covers them; returns False
+    if any product was left out.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return True
+    rows = Q()
+    for pk, delta in deltas.items():
+        rows |= Q(pk=pk, stock__gte=F("reserved") + delta) if check and delta > 0 else Q(pk=pk)
+    # Clamped at zero: drift (see recount_reserved) must not break releases.
+    reserved = Case(*[When(pk=pk, then=Greatest(F("reserved") + delta, Value(0))) for pk, delta in deltas.items()])
+    return Product.objects.filter(rows).update(reserved=reserved) == len(deltas)
+
+
+def hold_stock(user_id, quantities, ttl=None):
+    """
+    Hold {product_id: quantity} for a user, replacing their holds on those
+    products (a quantity of 0 releases). Raises OutOfStock, with nothing
+    changed, if the stock other buyers have not taken or held falls short.
+    Returns the expiry time of the new holds.
+    """
+    ttl = settings.STOCK_HOLD_TTL if ttl is None else ttl
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    with transaction.atomic(using=_db()):
+        # Write first: on SQLite the DELETE takes the write lock up front.
+        previous = dict(_delete_returning(StockHold.objects.filter(user_id=user_id, product_id__in=quantities)))
+        deltas = {pk: quantity - previous.get(pk, 0) for pk, quantity in quantities.items()}
+        if not _shift_reserved(deltas):
+            raise OutOfStock
+        StockHold.objects.bulk_create([
+            StockHold(user_id=user_id, product_id=pk, quantity=quantity, expires_at=expires_at)
+            for pk, quantity in quantities.items() if quantity > 0
+        ])
+    return expires_at
+
+
+def release_holds(holds):
+    """Delete the StockHolds in a queryset and return their stock; returns how many."""
+    with transaction.atomic(using=_db()):
+        released = {}
+        rows = _delete_returning(holds)
+        for product_id, quantity in rows:
+            released[product_id] = released.get(product_id, 0) - quantity
+        _shift_reserved(released, check=False)
+    return len(rows)
+
+
+def consume_holds(user_id, quantities):
+    """
+    Take {product_id: quantity} out of stock for an order, using up the
+    user's holds on those products. Call inside the order's transaction:
+    raises OutOfStock if stock not held by other buyers falls short, and
+    the caller must then roll back.
+    """
+    held = dict(_delete_returning(StockHold.objects.filter(user_id=user_id, product_id__in=quantities)))
+    enough = Q()
+    for pk, quantity in quantities.items():
+        enough |= Q(pk=pk, stock__gte=F("reserved") - held.get(pk, 0) + quantity)
+    updated = Product.objects.filter(enough).update(
+        stock=Case(*[When(pk=pk, then=F("stock") - quantity) for pk, quantity in quantities.items()]),
+        reserved=Case(*[
+            When(pk=pk, then=Greatest(F("reserved") - held.get(pk, 0), Value(0))) for pk in quantities
+        ]),
+    )
+    if updated != len(quantities):
+        raise OutOfStock
+    # Queryset updates skip post_save, so invalidate cached catalog pages here.
+    transaction.on_commit(partial(
+        bump_versions, "products", *(f"product:{pk}" for pk in quantities)
+    ), using=_db())
+
+
+def sweep_expired(batch_size=1000, now=None):
+    """Release holds that expired before `now`, oldest first, in batches; returns how many."""
+    now = now or timezone.now()
+    total = 0
+    while True:
+        batch = StockHold.objects.filter(expires_at__lte=now).order_by("expires_at")[:batch_size]
+        released = release_holds(batch)
+        total += released
+        if released < batch_size:
+            return total
+
+
+def available_stock(product_ids, user_id=None):
+    """
+    {product_id: units still available} in one query. With `user_id`, the
+    user's own holds count as available to them.
+    """
+    available = F("stock") - F("reserved")
+    if user_id is not None:
+        own = StockHold.objects.filter(user_id=user_id, product=OuterRef("pk")).values("quantity")
+        available = available + Coalesce(Subquery(own), 0)
+    return dict(
+        Product.objects.filter(pk__in=product_ids)
+        .annotate(available=Greatest(available, Value(0), output_field=IntegerField()))
+        .values_list("pk", "available")
+    )
+
+
+def recount_reserved(product_ids=None, fix=True):
+    """
+    Compare Product.reserved with the sum of the holds and return the
+    drifted products as [(product_id, stored, actual)]; repairs them when `fix`.
+    """
+    actual = Coalesce(
+        Subquery(
+            StockHold.objects.filter(product=OuterRef("pk")).values("product")
+            .annotate(total=Sum("quantity")).values("total")
+        ),
+        0,
+    )
+    products = Product.objects.annotate(actual=actual).exclude(reserved=F("actual"))
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    drift = list(products.values_list("pk", "reserved", "actual"))
+    if fix and drift:
+        # Recomputed in the UPDATE itself, so holds placed since the read count.
+        Product.objects.filter(pk__in=[pk for pk, _, _ in drift]).update(reserved=actual)
+    return drift
@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rest_framework.test import APIClient
+
+from cart.models import CartItem
+from inventory.models import StockHold
+from orders.models import Order
+from products.bench import seed_users, summarize
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a flash sale on one hot SKU: --buyers threads released at "
+        "once against --stock units. `direct` checks stock only at order "
+        "placement; `held` adds to the cart first (placing a hold) and then "
+        "orders. Reports where buyers were turned away, the latency of each "
+        "step and whether anything oversold. Needs a database shared across "
+        "threads; the sale's orders, holds and product are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=50)
+        parser.add_argument("--stock", type=int, default=10)
+        parser.add_argument("--quantity", type=int, default=1, help="units each buyer wants")
+        parser.add_argument("--mode", choices=["direct", "held", "both"], default="both")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            raise CommandError("The threads need a shared database, not in-memory SQLite")
+        users = seed_users(options["buyers"])[:options["buyers"]]
+        modes = ["direct", "held"] if options["mode"] == "both" else [options["mode"]]
+        for mode in modes:
+            self.run_sale(mode, users, options["stock"], options["quantity"])
+
+    def run_sale(self, mode, users, stock, quantity):
+        product = Product.objects.create(name=f"Hot SKU ({mode})", price=10, stock=stock)
+        barrier = threading.Barrier(len(users))
+        body = {"shipping_address": "1 Bench Street", "items_write": [{"product_id": product.pk, "quantity": quantity}]}
+
+        def buyer(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            timings = {}
+            barrier.wait()
+            try:
+                if mode == "held":
+                    start = time.perf_counter()
+                    added = client.post("/api/cart/add/", {"product_id": product.pk, "quantity": quantity}, format="json")
+                    timings["cart"] = (time.perf_counter() - start) * 1000
+                    if added.status_code != 201:
+                        return "cart", added.status_code, timings, None
+                start = time.perf_counter()
+                placed = client.post("/api/orders/", body, format="json")
+                timings["order"] = (time.perf_counter() - start) * 1000
+                order = placed.json().get("id") if placed.status_code == 201 else None
+                return "order", placed.status_code, timings, order
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            results = list(pool.map(buyer, users))
+        wall = time.perf_counter() - start
+
+        product.refresh_from_db()
+        orders = [order for _, _, _, order in results if order]
+        at_cart = sum(1 for step, code, _, _ in results if step == "cart" and code == 409)
+        at_order = sum(1 for step, code, _, _ in results if step == "order" and code == 400)
+        other = len(results) - len(orders) - at_cart - at_order
+        sold = stock - product.stock
+        oversold = sold != len(orders) * quantity or product.stock < 0
+
+        self.stdout.write(
+            f"{mode:7} {len(orders)} orders, {at_cart} turned away at cart, {at_order} at order placement, "
+            f"{other} errors; {sold}/{stock} sold, reserved left {product.reserved}; {wall * 1000:.0f}ms"
+        )
+        for step in ("cart", "order"):
+            samples = [timings[step] for _, _, timings, _ in results if step in timings]
+            if samples:
+                stats = summarize(samples)
+                self.stdout.write(f"        {step:5} p50={stats['p50']:.1f}ms p95={stats['p95']:.1f}ms max={stats['max']:.1f}ms")
+        if oversold:
+            self.stdout.write(self.style.ERROR("        OVERSOLD"))
+
+        Order.objects.filter(pk__in=orders).delete()
+        CartItem.objects.filter(product=product).delete()
+        StockHold.objects.filter(product=product).delete()
+        product.delete()
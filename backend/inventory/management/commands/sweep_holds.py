@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.holds import recount_reserved, sweep_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Return expired stock holds to stock, oldest first, in batches. "
+        "Run from cron, or keep running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--loop", action="store_true", help="keep sweeping every --interval seconds")
+        parser.add_argument("--interval", type=float, default=30)
+        parser.add_argument(
+            "--recount", action="store_true",
+            help="also repair Product.reserved where it drifted from the holds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = sweep_expired(options["batch_size"])
+            if released or options["verbosity"] > 1:
+                self.stdout.write(f"Released {released} expired holds")
+            if options["recount"]:
+                for pk, stored, actual in recount_reserved():
+                    self.stdout.write(f"product {pk}: reserved={stored} actual={actual}")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import models
+
+from products.models import Product
+
+
+class StockHold(models.Model):
+    """
+    Stock set aside for one user's cart or checkout until `expires_at`.
+    Product.reserved is the sum of a product's holds; see inventory.holds.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="stock_holds")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="holds")
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "product")
+        indexes = [
+            # the sweeper takes the oldest expired holds first
+            models.Index(fields=["expires_at"], name="stockhold_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held for {self.user_id}"
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import Category
+from products.tests import make_product
+from .holds import OutOfStock, available_stock, consume_holds, hold_stock, recount_reserved, sweep_expired
+from .models import StockHold
+
+User = get_user_model()
+
+
+class StockHoldTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        self.product = make_product(None, stock=5)
+
+    def reserved(self):
+        self.product.refresh_from_db()
+        return self.product.reserved
+
+    def test_holds_reduce_availability(self):
+        hold_stock(self.alice.pk, {self.product.pk: 3})
+        self.assertEqual(self.reserved(), 3)
+        self.assertEqual(available_stock([self.product.pk]), {self.product.pk: 2})
+        self.assertEqual(available_stock([self.product.pk], self.alice.pk), {self.product.pk: 5})
+
+        # Holding again replaces the hold instead of adding to it.
+        hold_stock(self.alice.pk, {self.product.pk: 1})
+        self.assertEqual(self.reserved(), 1)
+        hold_stock(self.alice.pk, {self.product.pk: 0})
+        self.assertEqual((self.reserved(), StockHold.objects.count()), (0, 0))
+
+    def test_hold_fails_when_others_hold_the_stock(self):
+        other = make_product(None, stock=5)
+        hold_stock(self.alice.pk, {self.product.pk: 4})
+        with self.assertRaises(OutOfStock):
+            hold_stock(self.bob.pk, {other.pk: 1, self.product.pk: 2})
+        # Nothing of the failed hold remains, including the product that had stock.
+        self.assertEqual(StockHold.objects.filter(user=self.bob).count(), 0)
+        other.refresh_from_db()
+        self.assertEqual((self.reserved(), other.reserved), (4, 0))
+
+    def test_order_consumes_the_buyers_own_hold(self):
+        hold_stock(self.alice.pk, {self.product.pk: 4})
+        with self.assertRaises(OutOfStock):
+            consume_holds(self.bob.pk, {self.product.pk: 2})
+        consume_holds(self.alice.pk, {self.product.pk: 4})
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved), (1, 0))
+        self.assertFalse(StockHold.objects.exists())
+
+    def test_sweep_releases_expired_holds_in_batches(self):
+        for user in (self.alice, self.bob):
+            hold_stock(user.pk, {self.product.pk: 2})
+        StockHold.objects.filter(user=self.alice).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(sweep_expired(batch_size=1), 1)
+        self.assertEqual(self.reserved(), 2)
+        self.assertEqual(list(StockHold.objects.values_list("user", flat=True)), [self.bob.pk])
+
+    def test_full_save_keeps_reserved_and_recount_repairs_drift(self):
+        stale = type(self.product).objects.get(pk=self.product.pk)
+        hold_stock(self.alice.pk, {self.product.pk: 2})
+        stale.stock = 8
+        stale.save()
+        self.assertEqual(self.reserved(), 2)
+
+        type(self.product).objects.filter(pk=self.product.pk).update(reserved=7)
+        self.assertEqual(recount_reserved(), [(self.product.pk, 7, 2)])
+        self.assertEqual(self.reserved(), 2)
+
+
+class CartHoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.product = make_product(Category.objects.create(name="Hot", slug="hot"), stock=3)
+
+    def test_cart_add_holds_stock_and_rejects_sold_out_items(self):
+        response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": 2}, format="json")
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": 2}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["available"], {str(self.product.pk): 3})
+        self.assertEqual(StockHold.objects.get().quantity, 2)
+
+        self.client.post("/api/cart/clear/")
+        self.assertFalse(StockHold.objects.exists())
+
+    def test_checkout_holds_the_cart_and_order_consumes_it(self):
+        self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": 3}, format="json")
+        response = self.client.post("/api/cart/checkout/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(StockHold.objects.get().expires_at, timezone.now())
+
+        response = self.client.post("/api/orders/", {
+            "shipping_address": "x", "items_write": [{"product_id": self.product.pk, "quantity": 3}],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.reserved), (0, 0))
+
+    def test_availability_for_a_page_in_one_query(self):
+        others = [make_product(None, stock=4) for _ in range(3)]
+        ids = ",".join(str(p.pk) for p in [self.product, *others])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/inventory/availability/?ids={ids}")
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(response.json()[str(others[0].pk)], 4)
+        self.assertEqual(self.client.get("/api/inventory/availability/?ids=x").status_code, 400)
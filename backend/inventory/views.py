@@ -0,0 +1,26 @@
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .holds import available_stock
+
+MAX_IDS = 100
+
+
+class AvailabilityView(APIView):
+    """
+    Units available for a page of products, `?ids=1,2,3`, in one query.
+    Not cached: it moves with every hold. Signed-in users see their own
+    holds as available.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            ids = {int(pk) for pk in request.query_params.get("ids", "").split(",") if pk.strip()}
+        except ValueError:
+            return Response({"error": "ids must be a comma-separated list of product ids"}, status=400)
+        if not ids or len(ids) > MAX_IDS:
+            return Response({"error": f"Pass between 1 and {MAX_IDS} product ids"}, status=400)
+        user_id = request.user.pk if request.user.is_authenticated else None
+        return Response(available_stock(ids, user_id))
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.action(description="Retry selected jobs now")
+def retry_now(modeladmin, request, queryset):
+    queryset.update(status=Job.QUEUED, attempts=0, run_at=timezone.now(), claimed_by="", claimed_at=None)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "status", "priority", "attempts", "run_at", "created_at")
+    list_filter = ("status", "task")
+    readonly_fields = ("task", "kwargs", "attempts", "claimed_by", "claimed_at", "last_error", "created_at")
+    actions = [retry_now]
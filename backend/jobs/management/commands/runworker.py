@@ -0,0 +1,83 @@
+import multiprocessing
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import queue_stats, requeue_stale
+from jobs.worker import WorkerStats, work, worker_name
+
+
+def run_threads(concurrency, batch, interval, drain, stats_interval, write):
+    stats, stop = WorkerStats(), threading.Event()
+    threads = [
+        threading.Thread(target=work, args=(worker_name(i), stats, stop, batch, interval, drain), daemon=True)
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        last = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(min(interval, 1))
+            if time.monotonic() - last >= stats_interval:
+                requeue_stale()
+                for line in stats.lines():
+                    write(line)
+                last = time.monotonic()
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    for line in stats.lines():
+        write(line)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued jobs (jobs.queue) on a pool of threads, or of processes "
+        "with --pool process, until interrupted. --drain exits once the "
+        "queue is empty; --stats prints the queue and exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=settings.JOBS_WORKER_CONCURRENCY)
+        parser.add_argument("--pool", choices=("thread", "process"), default="thread")
+        parser.add_argument("--batch-size", type=int, default=1, help="jobs claimed at a time per worker")
+        parser.add_argument("--interval", type=float, default=1.0, help="seconds between polls when idle")
+        parser.add_argument("--stats-interval", type=float, default=60, help="seconds between metrics lines")
+        parser.add_argument("--drain", action="store_true")
+        parser.add_argument("--stats", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            for (task, status), (jobs, waited) in sorted(queue_stats().items()):
+                self.stdout.write(f"{task:32} {status:8} {jobs:7}  oldest {waited:.0f}s")
+            return
+
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} jobs of dead workers")
+        args = (options["batch_size"], options["interval"], options["drain"], options["stats_interval"])
+        if options["pool"] == "thread":
+            run_threads(options["concurrency"], *args, self.stdout.write)
+            return
+
+        # One single-threaded worker per process, for CPU-bound tasks;
+        # forked children must not share the parent's connections.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(target=run_threads, args=(1, *args, self.stdout.write))
+            for _ in range(options["concurrency"])
+        ]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.join()
@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    One queued call of a registered task; see jobs.queue. Finished jobs
+    are deleted, so the table only holds pending, running and failed work.
+    """
+    QUEUED, RUNNING, FAILED = "queued", "running", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (FAILED, "Failed")]
+
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict)
+    # Lower runs first.
+    priority = models.SmallIntegerField(default=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # workers take due jobs in (priority, run_at) order
+            models.Index(fields=["status", "priority", "run_at"], name="job_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,135 @@
+"""
+Database-backed job queue for slow side effects.
+
+Invoice rendering, e-mails and image variants run in `manage.py
+runworker` instead of the request. Tasks are plain functions registered
+with @task in an app's tasks.py and called with JSON keyword arguments.
+enqueue() adds the job once the current transaction commits, like the
+cache bumps in products.signals: a rolled-back request queues nothing and
+a worker never picks up a job for rows it can't see yet.
+
+Workers claim due jobs, lowest priority number first. Where the database
+has SELECT ... FOR UPDATE SKIP LOCKED, workers skip each other's rows; on
+SQLite, whose writers are serialized anyway, one UPDATE claims the jobs
+under a claim token. Failures are retried with exponential backoff up to
+max_attempts, then kept as failed; finished jobs are deleted. Jobs of a
+worker that died are requeued after JOBS_LOCK_TIMEOUT seconds, or failed
+when that was their last attempt.
+"""
+import random
+import traceback
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import Job
+
+DEFAULT_PRIORITY = 100
+DONE, RETRIED, FAILED = "done", "retried", "failed"
+
+Task = namedtuple("Task", "func priority max_attempts")
+TASKS = {}
+
+
+def task(name, priority=DEFAULT_PRIORITY, max_attempts=5):
+    """Register a function as task `name`."""
+    def register(func):
+        TASKS[name] = Task(func, priority, max_attempts)
+        return func
+    return register
+
+
+def _add(name, priority, delay, kwargs):
+    spec = TASKS[name]
+    if settings.JOBS_EAGER:
+        spec.func(**kwargs)
+        return
+    Job.objects.create(
+        task=name, kwargs=kwargs,
+        priority=spec.priority if priority is None else priority,
+        max_attempts=spec.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def enqueue(name, /, priority=None, delay=0, **kwargs):
+    """
+    Queue task `name` with `kwargs` once the current transaction commits
+    (at once outside one). JOBS_EAGER runs it then instead.
+    """
+    if name not in TASKS:
+        raise LookupError(f"Unknown task {name!r}")
+    transaction.on_commit(partial(_add, name, priority, delay, kwargs))
+
+
+def claim(worker, limit=1, now=None):
+    """Mark up to `limit` due jobs as running for `worker` and return them."""
+    now = now or timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by("priority", "run_at", "pk")
+    token = f"{worker}:{uuid.uuid4().hex[:12]}"
+    claimed = {"status": Job.RUNNING, "claimed_by": token, "claimed_at": now, "attempts": F("attempts") + 1}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list("pk", flat=True)[:limit])
+            Job.objects.filter(pk__in=ids).update(**claimed)
+    else:
+        Job.objects.filter(pk__in=due.values("pk")[:limit]).update(**claimed)
+    return list(Job.objects.filter(status=Job.RUNNING, claimed_by=token).order_by("priority", "run_at", "pk"))
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt: doubling from JOBS_RETRY_BASE, with jitter."""
+    delay = min(settings.JOBS_RETRY_BASE * 2 ** (attempts - 1), settings.JOBS_RETRY_MAX)
+    return delay * random.uniform(0.5, 1)
+
+
+def run(job):
+    """Run a claimed job; returns DONE, RETRIED or FAILED."""
+    try:
+        TASKS[job.task].func(**job.kwargs)
+    except Exception as exc:
+        error = "".join(traceback.format_exception(exc))[-4000:]
+        jobs = Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by)
+        if job.attempts < job.max_attempts:
+            jobs.update(
+                status=Job.QUEUED, claimed_by="", claimed_at=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+            return RETRIED
+        jobs.update(status=Job.FAILED, last_error=error)
+        return FAILED
+    # By claim token: a run outlasting JOBS_LOCK_TIMEOUT must not delete the rerun's claim.
+    Job.objects.filter(pk=job.pk, claimed_by=job.claimed_by).delete()
+    return DONE
+
+
+def requeue_stale(now=None):
+    """
+    Put back jobs claimed more than JOBS_LOCK_TIMEOUT seconds ago; returns
+    how many. Those out of attempts fail instead, so a job that keeps
+    killing its worker is not retried forever.
+    """
+    now = now or timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, claimed_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    )
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, last_error="Worker stopped before the job finished, on its last attempt."
+    )
+    return stale.update(status=Job.QUEUED, claimed_by="", claimed_at=None)
+
+
+def queue_stats(now=None):
+    """{(task, status): (jobs, seconds the oldest due one has waited)}."""
+    now = now or timezone.now()
+    rows = Job.objects.values("task", "status").annotate(jobs=Count("pk"), oldest=Min("run_at")).order_by()
+    return {
+        (row["task"], row["status"]): (row["jobs"], max((now - row["oldest"]).total_seconds(), 0))
+        for row in rows
+    }
@@ -0,0 +1,166 @@
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.invoices import invoice_path
+from orders.models import Order
+from products.tests import make_product
+from .models import Job
+from .queue import DONE, FAILED, RETRIED, claim, enqueue, queue_stats, requeue_stale, run, task
+from .worker import WorkerStats, work
+
+User = get_user_model()
+calls = Counter()
+calls_lock = threading.Lock()
+
+
+@task("tests.record")
+def record(name):
+    with calls_lock:
+        calls[name] += 1
+
+
+@task("tests.flaky", max_attempts=2)
+def flaky():
+    raise RuntimeError("boom")
+
+
+def drain():
+    # work() without its connection handling, which would end the test's transaction.
+    while jobs := claim("test", limit=10):
+        for job in jobs:
+            run(job)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_are_queued_on_commit_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue("tests.record", name="kept")
+            self.assertFalse(Job.objects.exists())
+        try:
+            with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                enqueue("tests.record", name="rolled back")
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(list(Job.objects.values_list("kwargs", flat=True)), [{"name": "kept"}])
+        with self.assertRaises(LookupError):
+            enqueue("tests.missing")
+
+    def test_claims_by_priority_and_runs_each_job_once(self):
+        Job.objects.create(task="tests.record", kwargs={"name": "low"}, priority=200)
+        Job.objects.create(task="tests.record", kwargs={"name": "high"}, priority=1)
+        Job.objects.create(task="tests.record", kwargs={"name": "later"}, run_at=timezone.now() + timedelta(hours=1))
+        first, = claim("a")
+        self.assertEqual((first.kwargs, first.attempts), ({"name": "high"}, 1))
+        second, = claim("b", limit=5)
+        self.assertEqual(second.kwargs, {"name": "low"})
+        self.assertEqual(claim("c"), [])
+        self.assertEqual((run(first), run(second)), (DONE, DONE))
+        self.assertEqual(calls, {"high": 1, "low": 1})
+        self.assertEqual(list(Job.objects.values_list("kwargs", flat=True)), [{"name": "later"}])
+
+    def test_failures_back_off_then_fail(self):
+        job = Job.objects.create(task="tests.flaky", max_attempts=2)
+        self.assertEqual(run(claim("a")[0]), RETRIED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        self.assertEqual(claim("a"), [])  # not due yet
+        self.assertEqual(run(claim("a", now=job.run_at)[0]), FAILED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(queue_stats()[("tests.flaky", Job.FAILED)][0], 1)
+
+    def test_jobs_of_dead_workers_are_requeued(self):
+        Job.objects.create(task="tests.record", kwargs={"name": "x"})
+        claim("dead")
+        self.assertEqual(requeue_stale(), 0)
+        self.assertEqual(requeue_stale(now=timezone.now() + timedelta(hours=1)), 1)
+        drain()
+        self.assertEqual(calls, {"x": 1})
+
+    def test_an_overrun_does_not_delete_the_rerun(self):
+        Job.objects.create(task="tests.record", kwargs={"name": "slow"})
+        first, = claim("a")
+        requeue_stale(now=timezone.now() + timedelta(hours=1))
+        second, = claim("b")
+        self.assertEqual(run(first), DONE)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.claimed_by), (Job.RUNNING, second.claimed_by))
+        self.assertEqual(run(second), DONE)
+        self.assertFalse(Job.objects.exists())
+
+    def test_stale_jobs_out_of_attempts_fail(self):
+        job = Job.objects.create(task="tests.record", kwargs={"name": "fatal"}, max_attempts=2)
+        later = timezone.now() + timedelta(hours=1)
+        claim("a")
+        self.assertEqual(requeue_stale(now=later), 1)
+        claim("b")
+        self.assertEqual(requeue_stale(now=later), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn("Worker stopped", job.last_error)
+
+
+class OrderSideEffectTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = override_settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_order_placement_queues_confirmation_and_invoice(self):
+        user = User.objects.create_user(username="alice", password="pass", email="alice@example.com")
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/orders/", {
+                "shipping_address": "x",
+                "items_write": [{"product_id": make_product(None).pk, "quantity": 1}],
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            list(Job.objects.order_by("priority").values_list("task", flat=True)),
+            ["orders.send_confirmation", "orders.render_invoice"],
+        )
+
+        drain()
+        self.assertEqual(mail.outbox[0].to, ["alice@example.com"])
+        self.assertTrue(invoice_path(Order.objects.get()).exists())
+        self.assertFalse(Job.objects.exists())
+
+
+class ConcurrentWorkerTests(TransactionTestCase):
+    """Workers draining the queue in parallel never run a job twice."""
+
+    def test_parallel_workers_claim_disjoint_jobs(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a database shared across threads")
+        calls.clear()
+        Job.objects.bulk_create(Job(task="tests.record", kwargs={"name": str(i)}) for i in range(60))
+        stats, stop = WorkerStats(), threading.Event()
+        threads = [threading.Thread(target=work, args=(f"w{i}", stats, stop, 3, 0.01, True)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, {str(i): 1 for i in range(60)})
+        self.assertFalse(Job.objects.exists())
+        self.assertIn("tests.record: done=60", next(stats.lines()))
@@ -0,0 +1,70 @@
+"""
+The claim/run loop behind `manage.py runworker`, and its metrics.
+
+Each loop claims `batch` jobs at a time, runs them and sleeps `interval`
+seconds when nothing is due. WorkerStats counts outcomes and keeps a
+duration histogram per task (the buckets of config.instrumentation).
+"""
+import os
+import socket
+import threading
+import time
+
+from django.db import close_old_connections, connections
+
+from config.instrumentation import SECONDS_BUCKETS, Histogram
+from .queue import DONE, FAILED, RETRIED, claim, run
+
+
+def worker_name(index):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class WorkerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outcomes = {}
+        self.durations = {}
+
+    def record(self, task, outcome, seconds):
+        with self.lock:
+            counts = self.outcomes.setdefault(task, dict.fromkeys((DONE, RETRIED, FAILED), 0))
+            counts[outcome] += 1
+            histogram = self.durations.get(task)
+            if histogram is None:
+                histogram = self.durations[task] = Histogram(SECONDS_BUCKETS)
+            histogram.observe(seconds)
+
+    def lines(self):
+        with self.lock:
+            for task, counts in sorted(self.outcomes.items()):
+                histogram = self.durations[task]
+                p95 = next(
+                    (bound for bound, total in histogram.cumulative() if total >= 0.95 * histogram.count), "+Inf"
+                )
+                yield (
+                    f"{task}: done={counts[DONE]} retried={counts[RETRIED]} failed={counts[FAILED]} "
+                    f"mean={histogram.sum / histogram.count * 1000:.1f}ms p95<={p95}s"
+                )
+
+
+def work(name, stats, stop, batch=1, interval=1.0, drain=False):
+    """
+    Claim and run jobs until `stop` is set; with `drain`, also return
+    once nothing is due.
+    """
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            jobs = claim(name, batch)
+            if not jobs:
+                if drain:
+                    return
+                stop.wait(interval)
+                continue
+            for job in jobs:
+                start = time.perf_counter()
+                outcome = run(job)
+                stats.record(job.task, outcome, time.perf_counter() - start)
+    finally:
+        connections.close_all()
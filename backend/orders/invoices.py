@@ -0,0 +1,119 @@
+import hashlib
+import os
+import re
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from .models import Order
+
+INVOICE_DIR = "invoices"
+TOP = 800
+BOTTOM = 60
+LINE_HEIGHT = 20
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def invoice_hash(order):
+    """
+    Fingerprint of everything the invoice shows. Items are snapshots and
+    never change after placement, so the order row alone decides it.
+    """
+    key = f"{order.pk}|{order.status}|{order.total_amount}|{order.updated_at.isoformat()}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def invoice_path(order):
+    return Path(settings.MEDIA_ROOT) / INVOICE_DIR / str(order.pk) / f"{invoice_hash(order)}.pdf"
+
+
+def render_invoice(order, items):
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    page = 1
+
+    def header():
+        p.drawString(100, TOP, f"Invoice for Order #{order.id}")
+        p.drawString(450, TOP, f"Page {page}")
+        if page == 1:
+            p.drawString(100, TOP - 30, f"Status: {order.status}")
+            p.drawString(100, TOP - 60, f"Total: ₹ {order.total_amount}")
+            return TOP - 100
+        return TOP - 40
+
+    y = header()
+    for item in items:
+        if y < BOTTOM:
+            p.showPage()
+            page += 1
+            y = header()
+        name = item.product.name if item.product else "(product no longer available)"
+        p.drawString(100, y, f"{name} x {item.quantity} = ₹ {item.price * item.quantity}")
+        y -= LINE_HEIGHT
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def ensure_invoice(order):
+    """Return the stored invoice for `order`, rendering it first if needed."""
+    path = invoice_path(order)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    items = order.items.select_related("product").order_by("id")
+    content = render_invoice(order, items)
+    # Write then rename, so concurrent readers never see a partial file.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+    for stale in path.parent.glob("*.pdf"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def render_invoices(order_ids):
+    """Process-pool entry point for the prerender_invoices command."""
+    count = 0
+    for order in Order.objects.filter(pk__in=order_ids):
+        ensure_invoice(order)
+        count += 1
+    return count
+
+
+def invoice_response(request, path, filename):
+    """Stream `path`, honouring a single `Range: bytes=a-b` request."""
+    size = path.stat().st_size
+    match = RANGE_RE.match(request.headers.get("Range", ""))
+    if not match or match.groups() == ("", ""):
+        response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename,
+                                content_type="application/pdf")
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:  # suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start + 1)
+    response = HttpResponse(body, status=206, content_type="application/pdf")
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,35 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from orders.invoices import render_invoices
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Render and store invoices for existing orders across a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+        parser.add_argument("--chunk-size", type=int, default=200)
+        parser.add_argument("--status", nargs="*", help="only orders in these statuses")
+
+    def handle(self, *args, **options):
+        orders = Order.objects.order_by("pk")
+        if options["status"]:
+            orders = orders.filter(status__in=options["status"])
+        ids = list(orders.values_list("pk", flat=True))
+        size = options["chunk_size"]
+        chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        done = 0
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=options["workers"], mp_context=context) as pool:
+            for count in pool.map(render_invoices, chunks):
+                done += count
+                self.stdout.write(f"{done}/{len(ids)} invoices")
+        self.stdout.write(self.style.SUCCESS(f"Rendered {done} invoices"))
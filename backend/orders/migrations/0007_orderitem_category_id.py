@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:35
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def record_categories(apps, schema_editor):
+    # Earlier orders didn't record it; today's category is the best guess.
+    OrderItem = apps.get_model("orders", "OrderItem")
+    Product = apps.get_model("products", "Product")
+    OrderItem.objects.filter(product__isnull=False).update(
+        category_id=Subquery(Product.objects.filter(pk=OuterRef("product_id")).values("category_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_order_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='category_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(record_categories, migrations.RunPython.noop),
+    ]
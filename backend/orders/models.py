@@ -21,9 +21,25 @@ class Order(models.Model):
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default='PENDING'
     )
+    class Meta:
+        indexes = [
+            # order history: newest first per user
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_created_idx"),
+            # date ranges (analytics backfill, admin date filter)
+            models.Index(fields=["created_at"], name="order_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so post_save can see transitions.
+        if "status" in instance.__dict__:
+            instance._loaded_status = instance.status
+        return instance
+
 class OrderItem(models.Model):
     order = models.ForeignKey(
         Order,
@@ -32,6 +48,8 @@ class OrderItem(models.Model):
     )
     product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)  # snapshot
+    # The product's category when the order was placed (analytics.rollups).
+    category_id = models.BigIntegerField(null=True, blank=True)
     quantity = models.PositiveIntegerField()
 
     def subtotal(self):
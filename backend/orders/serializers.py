@@ -1,10 +1,20 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from .models import Order, OrderItem
 from products.serializers import ProductSerializer
 from products.models import Product
+from products.queryplan import prefetch_lookups
+from inventory.holds import OutOfStock, available_stock, consume_holds
+from analytics.rollups import record_order
+from jobs.queue import enqueue
+
+SUMMARY_ADDRESS_LENGTH = 40
+
 
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
+    select_related_fields = ("product__category",)
 
     class Meta:
         model = OrderItem
@@ -12,14 +22,26 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
 
 class OrderItemCreateSerializer(serializers.ModelSerializer):
-    product_id = serializers.PrimaryKeyRelatedField(
-        queryset=Product.objects.all(),
-        source='product'
-    )
+    # Resolved in bulk by OrderSerializer.validate instead of one query per item.
+    product_id = serializers.IntegerField()
 
     class Meta:
         model = OrderItem
         fields = ['product_id', 'quantity']
+        extra_kwargs = {'quantity': {'min_value': 1}}
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Order history row: no nested items, only their count, and the first
+    SUMMARY_ADDRESS_LENGTH characters of the shipping address (annotated).
+    """
+    item_count = serializers.IntegerField(read_only=True)
+    shipping_address = serializers.CharField(source='shipping_address_start', read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'status', 'total_amount', 'item_count', 'shipping_address', 'created_at']
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -27,6 +49,7 @@ class OrderSerializer(serializers.ModelSerializer):
     items_write = OrderItemCreateSerializer(
         source='items', many=True, write_only=True
     )  # POST
+    prefetch_related_fields = {"items": OrderItemSerializer}
 
     class Meta:
         model = Order
@@ -44,33 +67,78 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user', 'created_at']
 
+    def validate(self, attrs):
+        items = attrs.get('items')
+        if not items:
+            raise serializers.ValidationError({'items_write': 'At least one item is required.'})
+        ids = {item['product_id'] for item in items}
+        products = Product.objects.in_bulk(ids)
+        missing = ids - products.keys()
+        if missing:
+            raise serializers.ValidationError(
+                {'items_write': f"Invalid product ids: {sorted(missing)}"}
+            )
+        for item in items:
+            item['product'] = products[item.pop('product_id')]
+        return attrs
+
     def create(self, validated_data):
-        print("validated_data:", validated_data)
         items_data = validated_data.pop('items')
         user = self.context['request'].user
-        order = Order.objects.create(
-            user=user,
-            shipping_address=validated_data["shipping_address"],
-            phone=validated_data["phone"],
-            total_amount=0
-        )
-        total = 0
+
+        quantities = {}
         for item_data in items_data:
             product = item_data['product']
-            quantity = item_data.get('quantity', 1)
-            if product.stock < quantity:
-                raise serializers.ValidationError(
-                    f"Not enough stock for {product.name}"
+            quantities[product.pk] = quantities.get(product.pk, 0) + item_data['quantity']
+        total = sum(item['product'].price * item['quantity'] for item in items_data)
+
+        try:
+            with transaction.atomic():
+                # Stock first: on SQLite this takes the write lock up front.
+                # The buyer's own holds count towards what they can take.
+                consume_holds(user.pk, quantities)
+                order = Order.objects.create(
+                    user=user,
+                    shipping_address=validated_data.get("shipping_address", ""),
+                    phone=validated_data.get("phone"),
+                    total_amount=total
                 )
-            product.stock -= quantity
-            product.save()
-            total += item_data['product'].price * item_data.get('quantity', 1)
-            OrderItem.objects.create(
-                order=order,
-                product=item_data['product'],
-                quantity=item_data.get('quantity', 1),
-                price=item_data['product'].price
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product=item_data['product'],
+                        quantity=item_data['quantity'],
+                        price=item_data['product'].price,
+                        category_id=item_data['product'].category_id,
+                    )
+                    for item_data in items_data
+                ])
+                record_order(order, [
+                    (item['product'].pk, item['product'].category_id, item['quantity'], item['product'].price)
+                    for item in items_data
+                ])
+                # Side effects run in the job worker once the order commits.
+                enqueue("orders.send_confirmation", order_id=order.pk)
+                enqueue("orders.render_invoice", order_id=order.pk)
+        except OutOfStock:
+            available = available_stock(quantities, user.pk)
+            names = list(dict.fromkeys(
+                item['product'].name for item in items_data
+                if available.get(item['product'].pk, 0) < quantities[item['product'].pk]
+            ))
+            raise serializers.ValidationError(
+                f"Not enough stock for {', '.join(names) or 'some items'}"
             )
-        order.total_amount = total
-        order.save()
+
+        prefetch_related_objects([order], *prefetch_lookups(type(self)))
         return order
+
+
+class OrderDetailSerializer(OrderSerializer):
+    """OrderSerializer without the items; OrderDetailView adds them from .values() rows."""
+    items = None
+    items_write = None
+    prefetch_related_fields = {}
+
+    class Meta(OrderSerializer.Meta):
+        fields = [name for name in OrderSerializer.Meta.fields if name not in ('items', 'items_write')]
@@ -0,0 +1,26 @@
+from django.core.mail import send_mail
+
+from jobs.queue import task
+from .invoices import ensure_invoice
+from .models import Order
+
+
+@task("orders.render_invoice", priority=50)
+def render_invoice(order_id):
+    """Store the invoice ahead of the first download."""
+    order = Order.objects.filter(pk=order_id).first()
+    if order is not None:
+        ensure_invoice(order)
+
+
+@task("orders.send_confirmation", priority=10)
+def send_confirmation(order_id):
+    order = Order.objects.select_related("user").filter(pk=order_id).first()
+    if order is None or not order.user.email:
+        return
+    send_mail(
+        f"Order #{order.pk} placed",
+        f"Thanks for your order of ₹ {order.total_amount}. We'll let you know when it ships.",
+        None,
+        [order.user.email],
+    )
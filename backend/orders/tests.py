@@ -1,3 +1,245 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from products.models import Category
+from products.tests import ExplainMixin, QueryCountMixin, make_product
+from products.representations import order_item_rows, order_items_data
+from .invoices import invoice_path
+from .models import Order, OrderItem
+from .serializers import OrderItemSerializer, OrderSerializer
+
+User = get_user_model()
+
+
+class OrderQueryCountTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+
+    def add_order(self):
+        order = Order.objects.create(user=self.user, status="PLACED")
+        for _ in range(5):
+            n = Category.objects.count()
+            category = Category.objects.create(name=f"Cat {n}", slug=f"cat-{n}")
+            product = make_product(category)
+            OrderItem.objects.create(order=order, product=product, price=product.price, quantity=1)
+        return order
+
+    def test_order_list(self):
+        self.assertConstantQueries("/api/orders/", self.add_order)
+
+    def test_order_detail(self):
+        order = self.add_order()
+        self.assertConstantQueries(f"/api/orders/{order.id}/", lambda: OrderItem.objects.create(
+            order=order, product=make_product(None), price=1, quantity=1
+        ))
+
+
+class OrderPlacementTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name="Shoes", slug="shoes")
+
+    def place(self, products, quantity=1):
+        return self.client.post("/api/orders/", {
+            "shipping_address": "1 Main St",
+            "phone": "123",
+            "items_write": [{"product_id": p.id, "quantity": quantity} for p in products],
+        }, format="json")
+
+    def test_places_order_and_decrements_stock(self):
+        a, b = make_product(self.category, price=5, stock=3), make_product(self.category, price=7, stock=3)
+        response = self.place([a, b], quantity=2)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data["total_amount"], "24.00")
+        self.assertEqual(len(response.data["items"]), 2)
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual((a.stock, b.stock), (1, 1))
+
+    def test_out_of_stock_rolls_back_everything(self):
+        a, b = make_product(self.category, stock=5), make_product(self.category, name="Rare", stock=1)
+        response = self.place([a, b], quantity=2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Rare", str(response.data))
+        a.refresh_from_db()
+        self.assertEqual(a.stock, 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_query_count_is_constant_in_line_items(self):
+        def queries(n):
+            products = [make_product(self.category) for _ in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.place(products).status_code, 201)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(2), queries(10))
+
+
+class OrderSummaryTests(TestCase):
+    def test_list_is_a_compact_paginated_summary(self):
+        user = User.objects.create_user(username="alice", password="pass")
+        product = make_product(None)
+        for n in range(3):
+            order = Order.objects.create(user=user, status="PLACED", total_amount=n, shipping_address=f"{n} " * 30)
+            for _ in range(n):
+                OrderItem.objects.create(order=order, product=product, price=1, quantity=2)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        page = client.get("/api/orders/?page_size=2").json()
+        self.assertEqual([o["item_count"] for o in page["results"]], [2, 1])
+        self.assertEqual(set(page["results"][0]), {"id", "status", "total_amount", "item_count", "shipping_address", "created_at"})
+        self.assertEqual(page["results"][0]["shipping_address"], "2 " * 20)  # cut to SUMMARY_ADDRESS_LENGTH
+        rest = client.get(page["next"]).json()
+        self.assertEqual(([o["item_count"] for o in rest["results"]], rest["next"]), ([0], None))
+        default = client.get("/api/orders/").json()
+        self.assertEqual((len(default["results"]), default["next"]), (3, None))
+
+
+class InvoiceTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = override_settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.client.force_authenticate(self.user)
+        self.product = make_product(None, name="Boot")
+        self.order = Order.objects.create(user=self.user, status="PLACED", total_amount=20)
+        OrderItem.objects.create(order=self.order, product=self.product, price=10, quantity=2)
+        self.url = f"/api/orders/{self.order.id}/invoice/"
+
+    def download(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_stored_once_and_rerendered_on_status_change(self):
+        response, pdf = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.order.refresh_from_db()
+        first = invoice_path(self.order)
+        mtime = first.stat().st_mtime_ns
+        self.download()
+        self.assertEqual(first.stat().st_mtime_ns, mtime)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post(f"/api/orders/{self.order.id}/cancel/")
+        self.order.refresh_from_db()
+        response, _ = self.download(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(invoice_path(self.order).exists())
+        self.assertFalse(first.exists())  # the stale render is removed
+        self.assertEqual(len(list(first.parent.iterdir())), 1)
+
+    def test_ranges(self):
+        _, pdf = self.download()
+        size = len(pdf)
+        response, body = self.download(HTTP_RANGE="bytes=0-99")
+        self.assertEqual((response.status_code, body), (206, pdf[:100]))
+        self.assertEqual(response["Content-Range"], f"bytes 0-99/{size}")
+        response, body = self.download(HTTP_RANGE="bytes=-50")
+        self.assertEqual((response.status_code, body), (206, pdf[-50:]))
+        self.assertEqual(response["Content-Range"], f"bytes {size - 50}-{size - 1}/{size}")
+        response, _ = self.download(HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual((response.status_code, response["Content-Range"]), (416, f"bytes */{size}"))
+
+    def test_deleted_product(self):
+        self.product.delete()
+        response, pdf = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Parallel checkouts against limited stock must never oversell."""
+
+    def test_parallel_checkouts_do_not_oversell(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a database shared across threads")
+        stock, buyers = 5, 20
+        product = make_product(Category.objects.create(name="Hot", slug="hot"), stock=stock)
+        users = [User.objects.create_user(username=f"buyer{i}", password="pass") for i in range(buyers)]
+        barrier = threading.Barrier(buyers)
+
+        def checkout(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                return client.post("/api/orders/", {
+                    "shipping_address": "x",
+                    "items_write": [{"product_id": product.id, "quantity": 1}],
+                }, format="json").status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=buyers) as pool:
+            codes = list(pool.map(checkout, users))
+
+        product.refresh_from_db()
+        self.assertEqual(codes.count(201), stock)
+        self.assertEqual(codes.count(400), buyers - stock)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(OrderItem.objects.filter(product=product).count(), stock)
+
+
+class OrderQueryPlanTests(ExplainMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create(User(username=f"user{i}") for i in range(20))
+        product = make_product(None)
+        orders = Order.objects.bulk_create(
+            Order(user=cls.users[i % 20], status="PLACED") for i in range(2000)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, price=1, quantity=1) for order in orders
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_order_history(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[3])
+        self.assertIndexed("/api/orders/")
+        order = Order.objects.filter(user=self.users[3]).first()
+        self.assertIndexed(f"/api/orders/{order.id}/")
+
+
+class OrderItemRepresentationTests(TestCase):
+    def test_fast_path_matches_serializer(self):
+        user = User.objects.create_user(username="alice", password="pass")
+        order = Order.objects.create(user=user)
+        product = make_product(Category.objects.create(name="Shoes", slug="shoes"), price="3.10")
+        OrderItem.objects.create(order=order, product=product, price="3.10", quantity=2)
+        OrderItem.objects.create(order=order, product=None, price="1", quantity=1)
+        items = OrderItem.objects.order_by("id")
+        self.assertEqual(
+            OrderItemSerializer(items, many=True).data,
+            order_items_data(order_item_rows(items)),
+        )
+
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(f"/api/orders/{order.id}/")
+        self.assertEqual(response.json(), json.loads(json.dumps(
+            OrderSerializer(order, context={"request": response.wsgi_request}).data
+        )))
@@ -1,26 +1,79 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
 from rest_framework.generics import ListCreateAPIView, RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
-from .models import Order
-from .serializers import OrderSerializer
+from .models import Order, OrderItem
+from .serializers import SUMMARY_ADDRESS_LENGTH, OrderDetailSerializer, OrderSerializer, OrderSummarySerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.http import HttpResponse
-from reportlab.pdfgen import canvas
+from rest_framework.pagination import CursorPagination
+from products.pagination import ProductCursorPagination
+from products.queryplan import QueryPlanMixin
+from products.representations import order_item_rows, order_items_data
+from config.instrumentation import TimedSerializationMixin, timed_serialization
+from config.replicas import ReplicaReadsMixin
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from idempotency.keys import IdempotentMixin
+from .invoices import ensure_invoice, invoice_hash, invoice_response
 
-class OrderListCreateView(ListCreateAPIView):
-    serializer_class = OrderSerializer
+class OrderCursorPagination(ProductCursorPagination):
+    # Same (created_at, id) keyset, but always paged: order history has no
+    # callers that expect the plain list.
+    page_size = 20
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return CursorPagination.paginate_queryset(self, queryset, request, view)
+
+
+class OrderListCreateView(IdempotentMixin, ReplicaReadsMixin, QueryPlanMixin, TimedSerializationMixin, ListCreateAPIView):
+    """
+    GET lists compact order summaries, newest first, walking the
+    (user, -created_at, -id) index; the items are only served by
+    OrderDetailView. POST places an order and returns it in full; send
+    an Idempotency-Key to retry it safely.
+    """
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
+
+    def get_serializer_class(self):
+        return OrderSerializer if self.request.method == 'POST' else OrderSummarySerializer
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        # Counted per order on the page, not grouped over the whole history.
+        item_count = (
+            OrderItem.objects.filter(order=OuterRef('pk')).order_by()
+            .values('order').annotate(n=Count('pk')).values('n')
+        )
+        return (
+            Order.objects.filter(user=self.request.user)
+            .only('id', 'status', 'total_amount', 'created_at')
+            .annotate(
+                item_count=Coalesce(Subquery(item_count), 0),
+                shipping_address_start=Substr('shipping_address', 1, SUMMARY_ADDRESS_LENGTH),
+            )
+            .order_by('-created_at', '-id')
+        )
 
     def get_serializer_context(self):
         return {'request': self.request}
 
-class OrderDetailView(RetrieveAPIView):
-    serializer_class = OrderSerializer
+class OrderDetailView(ReplicaReadsMixin, QueryPlanMixin, RetrieveAPIView):
+    """
+    The order as OrderSerializer renders it, with the items built from
+    .values() rows (products.representations) instead of nested serializers.
+    """
+    serializer_class = OrderDetailSerializer
     permission_classes = [IsAuthenticated]
 
+    def retrieve(self, request, *args, **kwargs):
+        order = self.get_object()
+        rows = order_item_rows(order.items.order_by('id'))
+        with timed_serialization():
+            data = self.get_serializer(order).data
+            data['items'] = order_items_data(rows, request)
+        return Response(data)
+
     def get_queryset(self):
         # critical: prevents accessing others' orders
         return Order.objects.filter(user=self.request.user)
@@ -45,25 +98,13 @@ class CancelOrderView(APIView):
     
 class InvoiceView(APIView):
     def get(self, request, pk):
-        order = Order.objects.get(pk=pk, user=request.user)
-
-        response = HttpResponse(content_type="application/pdf")
-        response["Content-Disposition"] = f'attachment; filename="invoice_{order.id}.pdf"'
-
-        p = canvas.Canvas(response)
-        p.drawString(100, 800, f"Invoice for Order #{order.id}")
-        p.drawString(100, 770, f"Status: {order.status}")
-        p.drawString(100, 740, f"Total: ₹ {order.total_amount}")
-
-        y = 700
-        for item in order.items.all():
-            p.drawString(
-                100,
-                y,
-                f"{item.product.name} x {item.quantity} = ₹ {item.price * item.quantity}"
-            )
-            y -= 20
-
-        p.showPage()
-        p.save()
+        order = get_object_or_404(Order, pk=pk, user=request.user)
+        # The hash names the stored file, so a revalidation needs neither.
+        etag = f'"{invoice_hash(order)}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            path = ensure_invoice(order)
+            response = invoice_response(request, path, f"invoice_{order.id}.pdf")
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, max-age=0, must-revalidate"
         return response
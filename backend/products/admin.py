@@ -4,7 +4,7 @@ from .models import Category, Product
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "slug")
+    list_display = ("id", "name", "slug", "product_count")
     search_fields = ("name",)
     prepopulated_fields = {"slug": ("name",)}
     list_editable = ("slug","name")
@@ -18,10 +18,11 @@ class ProductAdmin(admin.ModelAdmin):
         "category",
         "price",
         "stock",
+        "reserved",
         "featured",
         "trending",
         "created_at",
     )
     list_filter = ("category", "featured", "trending")
-    search_fields = ("name", "description")
+    search_fields = ("sku", "name", "description")
     list_editable = ("price", "stock", "featured", "trending")
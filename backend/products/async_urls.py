@@ -0,0 +1,11 @@
+from django.urls import path
+from django.views.decorators.http import require_safe
+
+from . import async_views
+
+urlpatterns = [
+    path('', require_safe(async_views.product_list), name='async-product-list'),
+    path('<int:pk>/', require_safe(async_views.product_detail), name='async-product-detail'),
+    path("categories/", require_safe(async_views.category_list), name="async-categories"),
+    path("category/<slug:slug>/", require_safe(async_views.category_products), name="async-category-products"),
+]
@@ -0,0 +1,57 @@
+"""
+Native async twins of the catalog read endpoints, served under /api/async/
+by the ASGI deployment (see config/asgi.py). They share filtering, search
+and the fast read path with products.views but query through Django's
+async ORM; responses match the sync endpoints.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from rest_framework.request import Request
+
+from config.instrumentation import timed_serialization
+
+from .models import Category, Product
+from .pagination import ProductCursorPagination
+from .representations import category_from_row, category_rows, product_from_row, product_rows
+from .search import search_products
+from .views import filter_products
+
+
+async def _product_listing(request, queryset):
+    if request.GET.get("search"):
+        queryset = search_products(queryset, request.GET["search"])
+    rows = product_rows(queryset)
+
+    paginator = ProductCursorPagination()
+    params = request.GET
+    if paginator.cursor_query_param in params or paginator.page_size_query_param in params:
+        # DRF's paginator is sync; it runs one LIMIT query in a thread.
+        page = await sync_to_async(paginator.paginate_queryset)(rows, Request(request))
+        with timed_serialization():
+            data = [product_from_row(row, request) for row in page]
+        return JsonResponse(paginator.get_paginated_response(data).data)
+
+    with timed_serialization():
+        data = [product_from_row(row, request) async for row in rows]
+    return JsonResponse(data, safe=False)
+
+
+async def product_list(request):
+    return await _product_listing(request, filter_products(Product.objects.all(), request.GET))
+
+
+async def category_products(request, slug):
+    # Like CategoryProductsView: search only, no price/flag filters.
+    return await _product_listing(request, Product.objects.filter(category__slug=slug))
+
+
+async def product_detail(request, pk):
+    row = await product_rows(Product.objects.filter(pk=pk)).afirst()
+    if row is None:
+        raise Http404("No Product matches the given query.")
+    return JsonResponse(product_from_row(row, request))
+
+
+async def category_list(request):
+    rows = category_rows(Category.objects.all())
+    return JsonResponse([category_from_row(row, request) async for row in rows], safe=False)
@@ -0,0 +1,149 @@
+"""Helpers shared by the benchmark management commands."""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from cart.models import Cart, CartItem
+from orders.models import Order, OrderItem
+
+from .models import Category, Product, Wishlist
+
+BENCH_PASSWORD = "bench-pass"
+ORDER_STATUSES = ("PLACED", "SHIPPED", "DELIVERED", "CANCELLED")
+
+WORDS = (
+    "classic slim cotton leather running wireless smart organic steel vintage "
+    "portable premium compact waterproof ceramic wooden bluetooth denim silk "
+    "shirt shoes watch lamp chair bottle jacket phone speaker kettle backpack "
+    "headphones mug sofa table camera bag sneakers hoodie charger blender"
+).split()
+
+
+def seed_categories(count=20):
+    categories = [
+        Category(name=f"Bench category {i}", slug=f"bench-category-{i}")
+        for i in range(count)
+    ]
+    Category.objects.bulk_create(categories, ignore_conflicts=True)
+    return list(Category.objects.filter(slug__startswith="bench-category-"))
+
+
+def seed_products(count, batch_size=5000, seed=0):
+    """
+    Bulk-insert `count` deterministic products. bulk_create skips model
+    signals, so callers rebuild derived data (search index...) afterwards.
+    """
+    rng = random.Random(seed)
+    categories = seed_categories()
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            name = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+            batch.append(Product(
+                name=f"{name} {rng.randint(10_000, 99_999)}",
+                description=" ".join(rng.choice(WORDS) for _ in range(20)),
+                price=rng.randint(100, 100000) / 100,
+                stock=rng.randint(0, 500),
+                category=rng.choice(categories),
+                featured=rng.random() < 0.05,
+                trending=rng.random() < 0.05,
+            ))
+        Product.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def timed(fn, repeat):
+    """Run `fn` `repeat` times and return latencies in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        "max": ordered[-1],
+    }
+
+
+def seed_users(count, seed=0):
+    """
+    Create bench-user-<n> accounts up to `count` (all sharing
+    BENCH_PASSWORD, hashed once) plus the staff account bench-admin.
+    """
+    User = get_user_model()
+    password = make_password(BENCH_PASSWORD)
+    existing = User.objects.filter(username__startswith="bench-user-").count()
+    User.objects.bulk_create(
+        [User(username=f"bench-user-{i}", email=f"bench-user-{i}@example.com", password=password)
+         for i in range(existing, count)],
+        batch_size=5000,
+    )
+    User.objects.get_or_create(
+        username="bench-admin", defaults={"password": password, "is_staff": True, "is_superuser": True}
+    )
+    return list(User.objects.filter(username__startswith="bench-user-").order_by("pk"))
+
+
+def seed_shopping(users, cart_items=5, wishlist_items=5, orders=3, items_per_order=3, seed=0):
+    """
+    Give each user without a cart a cart, a wishlist and an order
+    history of random products. Products must be seeded first.
+    """
+    rng = random.Random(seed)
+    first = Product.objects.order_by("pk").values_list("pk", flat=True).first()
+    last = Product.objects.order_by("-pk").values_list("pk", flat=True).first()
+    has_cart = set(Cart.objects.values_list("user_id", flat=True))
+    users = [user for user in users if user.pk not in has_cart]
+
+    def sample(k):
+        # Bulk-seeded ids are contiguous; stray gaps are dropped by in_bulk.
+        return {rng.randint(first, last) for _ in range(k)}
+
+    for start in range(0, len(users), 1000):
+        batch = users[start:start + 1000]
+        carts = Cart.objects.bulk_create([Cart(user=user) for user in batch])
+        products = Product.objects.only("pk", "price", "category_id").in_bulk(
+            sample(len(batch) * (cart_items + wishlist_items + orders * items_per_order))
+        )
+        ids = list(products)
+
+        def pick(k):
+            return rng.sample(ids, min(k, len(ids)))
+
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product_id=pk, quantity=rng.randint(1, 3)) for cart in carts for pk in pick(cart_items)]
+        )
+        Wishlist.objects.bulk_create(
+            [Wishlist(user=user, product_id=pk) for user in batch for pk in pick(wishlist_items)]
+        )
+        placed = []
+        for user in batch:
+            for n in range(orders):
+                lines = [(pk, rng.randint(1, 3)) for pk in pick(items_per_order)]
+                total = sum(products[pk].price * quantity for pk, quantity in lines)
+                # The latest order is still open, as in a live shop.
+                status = "PLACED" if n == orders - 1 else rng.choice(ORDER_STATUSES)
+                placed.append((Order(
+                    user=user, total_amount=total, status=status,
+                    shipping_address="1 Bench Street", phone="5550100",
+                ), lines))
+        Order.objects.bulk_create([order for order, _ in placed])
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=order, product_id=pk, price=products[pk].price, quantity=quantity,
+                       category_id=products[pk].category_id)
+             for order, lines in placed for pk, quantity in lines],
+            batch_size=5000,
+        )
+    return len(users)
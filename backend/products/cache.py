@@ -0,0 +1,99 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from config.replicas import read_from_replica
+
+VERSION_PREFIX = "catalog:v:"
+RESPONSE_PREFIX = "catalog:resp:"
+
+
+def get_cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def get_versions(names):
+    """
+    Current version of each invalidation namespace. A version is the time
+    of the last change, so it doubles as the Last-Modified value.
+    """
+    cache = get_cache()
+    keys = [VERSION_PREFIX + name for name in names]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    if missing:
+        for key, value in missing.items():
+            # add() so two racing requests settle on the same version
+            if not cache.add(key, value, timeout=None):
+                missing[key] = cache.get(key, value)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump_versions(*names):
+    get_cache().set_many({VERSION_PREFIX + name: time.time() for name in names}, timeout=None)
+
+
+class CachedResponseMixin:
+    """
+    Caches rendered GET responses of anonymous catalog views.
+
+    Keys combine the absolute URL (path + all query params), the Accept
+    header and the versions of `cache_dependencies`, so a version bump
+    from products.signals orphans every affected entry at once. Responses
+    carry ETag/Last-Modified and conditional requests get a 304.
+    Dependencies may use URL kwargs, e.g. "product:{pk}". Requests with
+    any of `uncached_params` (per-user variants) bypass the cache.
+    """
+    cache_dependencies = ("products", "categories")
+    uncached_params = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or any(p in request.GET for p in self.uncached_params):
+            return super().dispatch(request, *args, **kwargs)
+
+        names = [name.format(**kwargs) for name in self.cache_dependencies]
+        versions = get_versions(names)
+        fingerprint = hashlib.md5(
+            f"{request.build_absolute_uri()}|{request.headers.get('Accept', '')}".encode()
+        ).hexdigest()
+        key = "{}{}:{}:{}".format(
+            RESPONSE_PREFIX, type(self).__name__, fingerprint,
+            ":".join(f"{v:.6f}" for v in versions),
+        )
+
+        cache = get_cache()
+        entry = cache.get(key)
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.render()
+            entry = {
+                "content": response.content,
+                "headers": [(k, v) for k, v in response.items() if k.lower() != "content-length"],
+                "etag": '"%s"' % hashlib.md5(response.content).hexdigest(),
+                "last_modified": max(versions),
+            }
+            # A replica may not have caught up with a recent bump yet; don't
+            # keep what it served under the new version.
+            if not (read_from_replica() and time.time() - max(versions) < settings.REPLICA_STICKY_SECONDS):
+                cache.set(key, entry, getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+
+        response = HttpResponse(entry["content"])
+        for header, value in entry["headers"]:
+            response[header] = value
+        response["ETag"] = entry["etag"]
+        response["Last-Modified"] = http_date(entry["last_modified"])
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return get_conditional_response(
+            request,
+            etag=entry["etag"],
+            last_modified=int(entry["last_modified"]),
+            response=response,
+        )
@@ -0,0 +1,213 @@
+"""
+Streaming bulk import/export of the product catalog (CSV or JSON Lines).
+
+Feeds are read row by row and written in chunks: each chunk is upserted
+by SKU with a single bulk_create(update_conflicts=True) in its own
+transaction, so memory stays bounded by the chunk
+size. Bulk writes bypass model signals, so the search index, category
+and facet counts and catalog cache are brought up to date explicitly.
+"""
+import csv
+import io
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .cache import bump_versions
+from .counters import recount_categories
+from .facets import apply_deltas, facet_key
+from .models import FACET_FIELDS, Category, Product
+from .search import reindex_batch
+
+FEED_FIELDS = ("sku", "name", "description", "price", "stock", "category", "featured", "trending")
+UPDATE_FIELDS = ["name", "description", "price", "stock", "category", "featured", "trending", "updated_at"]
+FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 1000
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def guess_format(name):
+    return "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def read_feed(stream, fmt):
+    """Yield (line number, raw dict) from a text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield number, exc
+                continue
+            yield number, row
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}, expected one of {FORMATS}")
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+def parse_row(raw, categories):
+    """Validate one feed row into Product field values; raises ValueError."""
+    if isinstance(raw, Exception):
+        raise ValueError(f"invalid JSON: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError("row must be a JSON object")
+    sku = str(raw.get("sku") or "").strip()
+    name = str(raw.get("name") or "").strip()
+    if not sku or not name:
+        raise ValueError("sku and name are required")
+    if len(sku) > 64 or len(name) > 200:
+        raise ValueError("sku or name too long")
+    try:
+        price = Decimal(str(raw.get("price"))).quantize(Decimal("0.01"))
+        if not price.is_finite():  # NaN survives quantize and fails comparisons
+            raise ValueError
+        stock = int(raw.get("stock") or 0)
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError("price must be a decimal and stock an integer")
+    if price < 0 or stock < 0 or price >= Decimal("1e8"):
+        raise ValueError("price and stock must be non-negative")
+    slug = str(raw.get("category") or "").strip()
+    if slug and slug not in categories:
+        raise ValueError(f"unknown category {slug!r}")
+    return {
+        "sku": sku,
+        "name": name,
+        "description": str(raw.get("description") or ""),
+        "price": price,
+        "stock": stock,
+        "category_id": categories.get(slug),
+        "featured": _flag(raw.get("featured")),
+        "trending": _flag(raw.get("trending")),
+    }
+
+
+def _write_chunk(rows, report, touched_categories):
+    skus = list(rows)
+    with transaction.atomic():
+        # Old categories are needed for the recount and old text to skip
+        # unchanged products when reindexing; the lookup also splits the
+        # report into created/updated.
+        existing = {
+            sku: (category_id, name, description, (category_id, price, featured, trending))
+            for sku, category_id, name, description, price, featured, trending
+            in Product.objects.filter(sku__in=skus).values_list(
+                "sku", "category_id", "name", "description", "price", "featured", "trending"
+            )
+        }
+        # One INSERT ... ON CONFLICT (sku) DO UPDATE per batch; bulk_update's
+        # CASE WHEN statements grow quadratically with the chunk size.
+        Product.objects.bulk_create(
+            [Product(**values) for values in rows.values()],
+            update_conflicts=True, unique_fields=["sku"], update_fields=UPDATE_FIELDS, batch_size=500,
+        )
+        stale = [
+            sku for sku, values in rows.items()
+            if sku not in existing or existing[sku][1:3] != (values["name"], values["description"])
+        ]
+        if stale:
+            reindex_batch(list(Product.objects.filter(sku__in=stale).only("id", "name", "description")))
+        deltas = Counter()
+        for sku, values in rows.items():
+            if sku in existing:
+                deltas[facet_key(existing[sku][3])] -= 1
+            deltas[facet_key([values[name] for name in FACET_FIELDS])] += 1
+        apply_deltas(deltas)
+    touched_categories.update(category_id for category_id, *_ in existing.values())
+    touched_categories.update(values["category_id"] for values in rows.values())
+    report.created += len(rows) - len(existing)
+    report.updated += len(existing)
+
+
+def import_feed(stream, fmt, chunk_size=1000, on_progress=None):
+    """Upsert products from a CSV/JSONL text stream; returns an ImportReport."""
+    categories = dict(Category.objects.values_list("slug", "id"))
+    report = ImportReport()
+    touched_categories = set()
+    chunk = {}
+    for line, raw in read_feed(stream, fmt):
+        report.rows += 1
+        try:
+            values = parse_row(raw, categories)
+        except ValueError as exc:
+            report.add_error(line, str(exc))
+            continue
+        chunk[values["sku"]] = values  # a later row for the same SKU wins
+        if len(chunk) >= chunk_size:
+            _write_chunk(chunk, report, touched_categories)
+            chunk = {}
+            if on_progress:
+                on_progress(report)
+    if chunk:
+        _write_chunk(chunk, report, touched_categories)
+        if on_progress:
+            on_progress(report)
+
+    touched_categories.discard(None)
+    if touched_categories:
+        recount_categories(touched_categories)
+    if report.created or report.updated:
+        transaction.on_commit(lambda: bump_versions("products", "categories"))
+    return report
+
+
+def export_feed(queryset, fmt, chunk_size=2000):
+    """Yield the catalog as CSV or JSONL text, one chunk of rows at a time."""
+    columns = ("sku", "name", "description", "price", "stock", "category__slug", "featured", "trending")
+    rows = queryset.order_by("pk").values_list(*columns).iterator(chunk_size=chunk_size)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(FEED_FIELDS)
+    pending = 0
+    for row in rows:
+        record = dict(zip(FEED_FIELDS, row))
+        record["price"] = str(record["price"])
+        if writer:
+            writer.writerow(record.values())
+        else:
+            buffer.write(json.dumps(record) + "\n")
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,36 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .cache import bump_versions
+from .models import Category
+
+
+def invalidate_counts():
+    # Category responses, and product details nesting their category,
+    # depend on "categories"; a queryset update sends no signal.
+    transaction.on_commit(partial(bump_versions, "categories"))
+
+
+def adjust_product_count(category_id, delta):
+    if category_id is not None and delta:
+        Category.objects.filter(pk=category_id).update(product_count=F("product_count") + delta)
+        invalidate_counts()
+
+
+def recount_categories(category_ids=None, fix=True):
+    """
+    Compare stored product counts with a real COUNT and return the drifted
+    categories as [(category, stored, actual)]; repairs them when `fix`.
+    """
+    categories = Category.objects.annotate(actual=Count("products"))
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    drift = [(c, c.product_count, c.actual) for c in categories if c.product_count != c.actual]
+    if fix and drift:
+        for category, _, actual in drift:
+            category.product_count = actual
+        Category.objects.bulk_update([c for c, _, _ in drift], ["product_count"], batch_size=500)
+        invalidate_counts()
+    return drift
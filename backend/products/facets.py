@@ -0,0 +1,146 @@
+"""
+Facet counts for the product listings (`?facets=1`).
+
+Counts per category, per price bucket and for the featured and trending
+flags, under the request's filters. A filtered listing groups the
+matching products by (category, price bucket, featured, trending) in one
+query and folds the groups in Python. The unfiltered catalog reads the
+same groups from FacetCount instead: products.signals adjusts it as
+products are saved and deleted, catalog imports per chunk, and
+`manage.py rebuild_facet_counts` repairs drift.
+"""
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Category, FacetCount, Product
+
+# Upper bounds (exclusive) of the price buckets; the last one is open.
+PRICE_BUCKETS = tuple(Decimal(bound) for bound in (10, 25, 50, 100, 250, 500, 1000))
+UNCATEGORIZED = 0
+KEY_FIELDS = ("category_id", "price_bucket", "featured", "trending")
+
+
+def price_bucket(price):
+    return bisect_right(PRICE_BUCKETS, Decimal(price))
+
+
+def facet_key(values):
+    """FacetCount key of a product's (category_id, price, featured, trending)."""
+    category_id, price, featured, trending = values
+    return (category_id or UNCATEGORIZED, price_bucket(price), bool(featured), bool(trending))
+
+
+def grouped_counts(queryset):
+    """{facet key: products} for `queryset`, in one grouped query."""
+    bucket = Case(
+        *[When(price__lt=bound, then=Value(i)) for i, bound in enumerate(PRICE_BUCKETS)],
+        default=Value(len(PRICE_BUCKETS)), output_field=IntegerField(),
+    )
+    rows = (
+        queryset.order_by()
+        .values_list(Coalesce("category_id", UNCATEGORIZED), bucket, "featured", "trending")
+        .annotate(n=Count("pk"))
+    )
+    return {tuple(row[:4]): row[4] for row in rows}
+
+
+def stored_counts():
+    return {
+        tuple(row[:4]): row[4]
+        for row in FacetCount.objects.filter(count__gt=0).values_list(*KEY_FIELDS, "count")
+    }
+
+
+def apply_deltas(deltas):
+    """
+    Add {facet key: delta} to FacetCount: insert missing rows at 0, then
+    increment in the database, so concurrent saves never overwrite each other.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    keys = [dict(zip(KEY_FIELDS, key)) for key in deltas]
+    FacetCount.objects.bulk_create([FacetCount(**key) for key in keys], ignore_conflicts=True)
+    match = Q()
+    for key in keys:
+        match |= Q(**key)
+    FacetCount.objects.filter(match).update(count=Case(
+        *[When(Q(**key), then=F("count") + delta) for key, delta in zip(keys, deltas.values())],
+        output_field=IntegerField(),
+    ))
+
+
+def move(old_values, new_values):
+    """Move one product between facet rows; None for a created or deleted product."""
+    deltas = {}
+    if old_values is not None:
+        deltas[facet_key(old_values)] = -1
+    if new_values is not None:
+        new = facet_key(new_values)
+        deltas[new] = deltas.get(new, 0) + 1
+    apply_deltas(deltas)
+
+
+def uncategorize(category_id):
+    """A deleted category's products are now uncategorized (SET_NULL skips signals)."""
+    rows = list(FacetCount.objects.filter(category_id=category_id).values_list(*KEY_FIELDS, "count"))
+    deltas = {}
+    for _, bucket, featured, trending, n in rows:
+        key = (UNCATEGORIZED, bucket, featured, trending)
+        deltas[key] = deltas.get(key, 0) + n
+    FacetCount.objects.filter(category_id=category_id).delete()
+    apply_deltas(deltas)
+
+
+def recount_facets(fix=True):
+    """
+    Compare FacetCount with the catalog and return the drifted keys as
+    [(key, stored, actual)]; rewrites the table when `fix`.
+    """
+    stored, actual = stored_counts(), grouped_counts(Product.objects.all())
+    drift = [
+        (key, stored.get(key, 0), actual.get(key, 0))
+        for key in sorted(stored.keys() | actual.keys())
+        if stored.get(key, 0) != actual.get(key, 0)
+    ]
+    if fix and drift:
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            [FacetCount(**dict(zip(KEY_FIELDS, key)), count=n) for key, n in actual.items()], batch_size=500
+        )
+    return drift
+
+
+def facets(queryset, filtered=True):
+    """The facet counts of `queryset`, from FacetCount when not `filtered`."""
+    counts = grouped_counts(queryset) if filtered else stored_counts()
+    by_category, by_bucket = {}, [0] * (len(PRICE_BUCKETS) + 1)
+    featured = trending = total = 0
+    for (category_id, bucket, is_featured, is_trending), n in counts.items():
+        by_category[category_id] = by_category.get(category_id, 0) + n
+        by_bucket[bucket] += n
+        featured += n if is_featured else 0
+        trending += n if is_trending else 0
+        total += n
+    names = {
+        pk: {"id": pk, "slug": slug, "name": name}
+        for pk, slug, name in Category.objects.filter(pk__in=by_category).values_list("pk", "slug", "name")
+    }
+    uncategorized = {"id": None, "slug": None, "name": None}
+    bounds = (Decimal(0),) + PRICE_BUCKETS + (None,)
+    return {
+        "total": total,
+        "categories": [
+            {**names.get(pk, uncategorized), "count": n}
+            for pk, n in sorted(by_category.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        "price": [
+            {"min": f"{bounds[i]}", "max": None if bounds[i + 1] is None else f"{bounds[i + 1]}", "count": n}
+            for i, n in enumerate(by_bucket)
+        ],
+        "featured": featured,
+        "trending": trending,
+    }
@@ -0,0 +1,119 @@
+"""
+Resized variants of product and category images.
+
+Every uploaded image gets a fixed set of bounded-size variants in WebP
+and JPEG under MEDIA_ROOT/variants/<variant>/<original name>.<ext>.
+Variant URLs are derived from the original's name alone, so serializers
+never touch the filesystem. Files are generated by a queued job after an
+upload commits (products.tasks), by `build_image_variants` for existing
+images, or on the first request for a missing one (`image_variant`
+view); the web server serves them as plain media files afterwards.
+"""
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from jobs.queue import enqueue
+
+VARIANT_DIR = "variants"
+# Longest edge in pixels; aspect ratio is kept and images are never upscaled.
+VARIANTS = {"thumb": 160, "card": 480, "large": 1200}
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+# Only uploads are resized, never other media such as invoices.
+SOURCE_DIRS = ("products/", "categories/")
+
+
+def variant_name(name, variant, fmt):
+    return f"{VARIANT_DIR}/{variant}/{name}.{fmt}"
+
+
+def variant_path(name, variant, fmt):
+    return Path(settings.MEDIA_ROOT) / variant_name(name, variant, fmt)
+
+
+def variant_urls(name, request=None):
+    """{variant: {format: url}} for an image name; None without an image."""
+    if not name:
+        return None
+    urls = {}
+    for variant in VARIANTS:
+        urls[variant] = {}
+        for fmt in FORMATS:
+            url = default_storage.url(variant_name(name, variant, fmt))
+            urls[variant][fmt] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def is_source(name):
+    return bool(name) and name.startswith(SOURCE_DIRS) and ".." not in Path(name).parts
+
+
+def encode(image, fmt):
+    pil_format, options = FORMATS[fmt]
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def write_variant(path, content):
+    # Write then rename, so concurrent readers never see a partial file.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def ensure_variants(name, only=None):
+    """
+    Generate the missing variants of image `name` (all of them, or just
+    the (variant, format) pairs in `only`). Returns how many were written.
+    """
+    wanted = only or [(variant, fmt) for variant in VARIANTS for fmt in FORMATS]
+    missing = [(v, f) for v, f in wanted if not variant_path(name, v, f).exists()]
+    if not missing:
+        return 0
+    largest = max(VARIANTS[variant] for variant, _ in missing)
+    with Image.open(Path(settings.MEDIA_ROOT) / name) as source:
+        # Large JPEGs decode straight at 1/2..1/8 scale via DCT scaling.
+        source.draft("RGB", (largest * 2, largest * 2))
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    if image.mode in ("P", "CMYK", "I;16"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    # Largest first, each downscaled in place from the previous one:
+    # cheaper than resampling the full-size original every time.
+    for variant in sorted({variant for variant, _ in missing}, key=VARIANTS.get, reverse=True):
+        size = VARIANTS[variant]
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt in FORMATS:
+            if (variant, fmt) in missing:
+                write_variant(variant_path(name, variant, fmt), encode(image, fmt))
+    return len(missing)
+
+
+def ensure_many(names):
+    """Process-pool entry point for the build_image_variants command."""
+    written = 0
+    for name in names:
+        try:
+            written += ensure_variants(name)
+        except (OSError, Image.DecompressionBombError):
+            continue  # unreadable or missing original
+    return written
+
+
+def schedule_variants(name):
+    """Queue variant generation for `name` once the current transaction commits."""
+    if is_source(name):
+        enqueue("products.image_variants", names=[name])
@@ -0,0 +1,257 @@
+import io
+import itertools
+import json
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from cart.models import CartItem
+from orders.models import Order
+from products.bench import summarize
+from products.models import Category, Product, Wishlist
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+User = get_user_model()
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+# Latency differences below this are noise, whatever the ratio.
+NOISE_FLOOR_MS = 1.0
+
+
+@contextmanager
+def rolled_back():
+    # Writes are measured but undone, so every run sees the same dataset.
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def endpoints(ctx):
+    """(name, method, path, body, role, writes, requests factor) for every API route."""
+    product, slug, order, item = ctx["product"], ctx["category"], ctx["order"], ctx["cart_item"]
+    order_body = {
+        "shipping_address": "1 Bench Street", "phone": "5550100",
+        "items_write": [{"product_id": pk, "quantity": 1} for pk in ctx["in_stock"]],
+    }
+    feed = "sku,name,price,stock\n" + "".join(f"BENCH-FEED-{i},Feed product {i},9.99,5\n" for i in range(100))
+    return [
+        # products.urls
+        ("product-list", "GET", "/api/products/?page_size=24", None, None, False, 1),
+        ("product-list search", "GET", "/api/products/?search=leath+sho&page_size=24", None, None, False, 1),
+        ("product-list filtered", "GET", f"/api/products/?category={slug}&min_price=10&max_price=200&page_size=24",
+         None, None, False, 1),
+        ("product-list unpaginated", "GET", f"/api/products/?category={slug}&featured=true", None, None, False, 1),
+        ("product-list facets", "GET", "/api/products/?facets=1", None, None, False, 1),
+        ("product-list facets filtered", "GET", f"/api/products/?facets=1&category={slug}&min_price=10",
+         None, None, False, 1),
+        ("product-detail", "GET", f"/api/products/{product}/", None, None, False, 1),
+        ("categories", "GET", "/api/products/categories/", None, None, False, 1),
+        ("category-products", "GET", f"/api/products/category/{slug}/?page_size=24", None, None, False, 1),
+        ("wishlist", "GET", "/api/products/wishlist/", None, "user", False, 1),
+        ("wishlist add", "POST", "/api/products/wishlist/add/", {"product_id": ctx["not_wishlisted"]}, "user", True, 1),
+        ("wishlist remove", "DELETE", f"/api/products/wishlist/remove/{ctx['wishlisted']}/", None, "user", True, 1),
+        ("wishlist count", "GET", "/api/products/wishlist/count/", None, "user", False, 1),
+        ("wishlist ids", "GET", "/api/products/wishlist/ids/", None, "user", False, 1),
+        ("product-list with_wishlist", "GET", "/api/products/?page_size=24&with_wishlist=1", None, "user", False, 1),
+        ("product-import", "POST", "/api/products/import/", {"file": ("feed.csv", feed)}, "admin", True, 0.2),
+        ("product-export", "GET", "/api/products/export/", None, "admin", False, 0.05),
+        # cart.urls
+        ("cart-list", "GET", "/api/cart/", None, "user", False, 1),
+        ("cart-add", "POST", "/api/cart/add/", {"product_id": product, "quantity": 1}, "user", True, 1),
+        ("cart-batch", "POST", "/api/cart/batch/",
+         {"operations": [{"op": "add", "product_id": pk, "quantity": 1} for pk in ctx["in_stock"]]}, "user", True, 1),
+        ("cart-update", "PUT", f"/api/cart/update/{item}/", {"quantity": 2}, "user", True, 1),
+        ("cart-delete", "DELETE", f"/api/cart/remove/{item}/", None, "user", True, 1),
+        ("cart-clear", "POST", "/api/cart/clear/", None, "user", True, 1),
+        ("cart-checkout", "POST", "/api/cart/checkout/", None, "user", True, 1),
+        # inventory.urls
+        ("availability", "GET", f"/api/inventory/availability/?ids={','.join(map(str, ctx['page']))}",
+         None, None, False, 1),
+        # orders.urls
+        ("order-list", "GET", "/api/orders/", None, "user", False, 1),
+        ("order-create", "POST", "/api/orders/", order_body, "user", True, 1),
+        ("order-detail", "GET", f"/api/orders/{order}/", None, "user", False, 1),
+        ("order-cancel", "POST", f"/api/orders/{order}/cancel/", None, "user", True, 1),
+        ("order-invoice", "GET", f"/api/orders/{order}/invoice/", None, "user", False, 1),
+        # analytics.urls
+        ("analytics-sales", "GET", "/api/analytics/sales/", None, "admin", False, 1),
+        ("analytics-products", "GET", "/api/analytics/products/", None, "admin", False, 1),
+        ("analytics-categories", "GET", "/api/analytics/categories/", None, "admin", False, 1),
+        # users.urls
+        ("register", "POST", "/api/users/register/",
+         lambda n: {"username": f"bench-register-{n}", "email": "", "password": "bench-pass"}, None, True, 0.2),
+        ("profile", "GET", "/api/users/me/", None, "user", False, 1),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every endpoint in products, cart, orders and users URLs and "
+        "report throughput, p50/p95/p99 latency and SQL queries per request "
+        "(from the Server-Timing header). In process, writes are rolled back; "
+        "against --base-url only reads run. --save stores the results as a "
+        "JSON baseline; --compare fails on slower p95s or extra queries. "
+        "Seed the database with seed_bench first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="timed requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--only", help="regex on endpoint names")
+        parser.add_argument("--cached", action="store_true", help="keep the response cache enabled")
+        parser.add_argument("--base-url", help="benchmark a running server instead of in process")
+        parser.add_argument("--concurrency", type=int, default=1, help="client threads (with --base-url)")
+        parser.add_argument("--save", help="write results to this JSON file")
+        parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown ratio")
+
+    def handle(self, *args, **options):
+        ctx = self.context()
+        selected = [e for e in endpoints(ctx) if not options["only"] or re.search(options["only"], e[0])]
+        if options["base_url"]:
+            selected = [e for e in selected if not e[5]]
+        overrides = {"METRICS_SAMPLE_RATE": 1.0}
+        if not options["cached"]:
+            overrides["CACHES"] = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        results = {}
+        with override_settings(**overrides):
+            for name, method, path, body, role, writes, factor in selected:
+                n = max(1, int(options["requests"] * factor))
+                results[name] = self.measure(options, ctx["tokens"].get(role), method, path, body, writes, n)
+                self.report(name, results[name])
+
+        if options["save"]:
+            meta = {"products": ctx["products"], "cached": options["cached"], "requests": options["requests"]}
+            with open(options["save"], "w") as f:
+                json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved baseline to {options['save']}")
+        if options["compare"]:
+            self.compare(options["compare"], results, options["tolerance"])
+
+    def context(self):
+        user = User.objects.filter(username="bench-user-0").first()
+        admin = User.objects.filter(username="bench-admin").first()
+        if user is None or admin is None:
+            raise CommandError("No benchmark dataset: run `manage.py seed_bench` first")
+        wishlisted = list(Wishlist.objects.filter(user=user).values_list("product_id", flat=True))
+        return {
+            "products": Product.objects.count(),
+            "product": Product.objects.order_by("pk").values_list("pk", flat=True).first(),
+            "category": Category.objects.order_by("-product_count").values_list("slug", flat=True).first(),
+            "order": Order.objects.filter(user=user, status="PLACED").order_by("pk").values_list("pk", flat=True).first(),
+            "cart_item": CartItem.objects.filter(cart__user=user).values_list("pk", flat=True).first(),
+            "wishlisted": wishlisted[0],
+            "not_wishlisted": Product.objects.exclude(pk__in=wishlisted).values_list("pk", flat=True).first(),
+            "in_stock": list(Product.objects.filter(stock__gte=50).values_list("pk", flat=True)[:3]),
+            "page": list(Product.objects.order_by("-created_at", "-id").values_list("pk", flat=True)[:24]),
+            "tokens": {
+                role: str(ClaimsTokenObtainPairSerializer.get_token(account).access_token)
+                for role, account in (("user", user), ("admin", admin))
+            },
+        }
+
+    def measure(self, options, token, method, path, body, writes, n):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        counter = itertools.count()
+        if options["base_url"]:
+            send = self.remote_sender(options["base_url"], headers, path)
+        else:
+            send = self.local_sender(headers, method, path, body, writes, counter)
+
+        for _ in range(options["warmup"]):
+            send()
+        statuses, queries, latencies = set(), set(), []
+
+        def one(_):
+            start = time.perf_counter()
+            status, server_timing = send()
+            elapsed = (time.perf_counter() - start) * 1000
+            return elapsed, status, server_timing
+
+        workers = options["concurrency"] if options["base_url"] else 1
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for elapsed, status, server_timing in pool.map(one, range(n)):
+                latencies.append(elapsed)
+                statuses.add(status)
+                match = QUERIES_RE.search(server_timing or "")
+                if match:
+                    queries.add(int(match.group(1)))
+        wall = time.perf_counter() - start
+
+        stats = summarize(latencies)
+        return {
+            "rps": round(n / wall, 1),
+            "p50_ms": round(stats["p50"], 3),
+            "p95_ms": round(stats["p95"], 3),
+            "p99_ms": round(stats["p99"], 3),
+            "queries": max(queries) if queries else None,
+            "status": sorted(statuses),
+        }
+
+    def local_sender(self, headers, method, path, body, writes, counter):
+        client = Client()
+
+        def send():
+            data = body(next(counter)) if callable(body) else body
+            kwargs = {"headers": headers}
+            if isinstance(data, dict) and "file" in data:
+                name, content = data["file"]
+                upload = io.BytesIO(content.encode())
+                upload.name = name
+                kwargs["data"] = {"file": upload}
+            elif data is not None:
+                kwargs.update(data=json.dumps(data), content_type="application/json")
+            with rolled_back() if writes else nullcontext():
+                response = getattr(client, method.lower())(path, **kwargs)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            return response.status_code, response.get("Server-Timing")
+
+        return send
+
+    def remote_sender(self, base_url, headers, path):
+        def send():
+            request = urllib.request.Request(base_url.rstrip("/") + path, headers=headers)
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    return response.status, response.headers.get("Server-Timing")
+            except urllib.error.HTTPError as exc:
+                return exc.code, exc.headers.get("Server-Timing")
+
+        return send
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:26} {result['rps']:8.1f} req/s  p50={result['p50_ms']:8.2f}ms  "
+            f"p95={result['p95_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  "
+            f"queries={result['queries']}  status={','.join(map(str, result['status']))}"
+        )
+
+    def compare(self, path, results, tolerance):
+        with open(path) as f:
+            baseline = json.load(f)["results"]
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result["status"] != before["status"]:
+                regressions.append(f"{name}: status {before['status']} -> {result['status']}")
+            if before["queries"] is not None and (result["queries"] or 0) > before["queries"]:
+                regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+            limit = max(before["p95_ms"] * (1 + tolerance), before["p95_ms"] + NOISE_FLOOR_MS)
+            if result["p95_ms"] > limit:
+                regressions.append(f"{name}: p95 {before['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+        if regressions:
+            raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path}"))
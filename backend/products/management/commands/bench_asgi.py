@@ -0,0 +1,88 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from cart.models import Cart, CartItem
+from products.bench import seed_products
+from products.models import Product
+
+User = get_user_model()
+
+
+def report(label, latencies, elapsed):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"  {label:38} {len(ordered) / elapsed:8.1f} req/s   p99={p99 * 1000:7.1f}ms"
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive ProductListView and CartListView through Django's WSGI and "
+        "ASGI handlers in process (thread pool vs. asyncio tasks) and "
+        "report throughput and p99 latency. Seeds data when missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--products", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        existing = Product.objects.count()
+        if existing < options["products"]:
+            seed_products(options["products"] - existing, seed=existing)
+        user, _ = User.objects.get_or_create(username="bench-asgi")
+        cart, _ = Cart.objects.get_or_create(user=user)
+        for product in Product.objects.all()[:10]:
+            CartItem.objects.get_or_create(cart=cart, product=product)
+        auth = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+        n, concurrency = options["requests"], options["concurrency"]
+        # Compare the views themselves, not the sync views' response cache.
+        no_cache = override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+        )
+        no_cache.enable()
+        targets = [
+            ("product list", "/api/products/?page_size=24", "/api/async/products/?page_size=24", {}),
+            ("cart list", "/api/cart/", "/api/async/cart/", auth),
+        ]
+        for label, sync_url, async_url, headers in targets:
+            self.stdout.write(label)
+            self.stdout.write(report("WSGI (DRF view, threads)", *self.run_wsgi(sync_url, headers, n, concurrency)))
+            self.stdout.write(report("ASGI (async view, tasks)", *self.run_asgi(async_url, headers, n, concurrency)))
+        no_cache.disable()
+
+    def run_wsgi(self, url, headers, n, concurrency):
+        def one(_):
+            client = Client()
+            start = time.perf_counter()
+            client.get(url, headers=headers)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, range(n)))
+        return latencies, time.perf_counter() - start
+
+    def run_asgi(self, url, headers, n, concurrency):
+        async def main():
+            client = AsyncClient()
+            gate = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with gate:
+                    start = time.perf_counter()
+                    await client.get(url, headers=headers)
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(one() for _ in range(n)))
+            return latencies, time.perf_counter() - start
+
+        return asyncio.run(main())
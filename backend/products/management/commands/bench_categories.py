@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.test import Client
+
+from products.bench import seed_products, summarize, timed
+from products.cache import get_cache
+from products.counters import recount_categories
+from products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the category list as the catalog grows: the old Count() "
+        "annotation against the maintained product_count column. Seeds "
+        "products into the configured database: use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client()
+        cache = get_cache()
+
+        def endpoint():
+            cache.clear()
+            client.get("/api/categories/")
+
+        for size in sorted(options["sizes"]):
+            existing = Product.objects.count()
+            if existing < size:
+                seed_products(size - existing, seed=existing)
+                recount_categories()
+            annotated = summarize(timed(
+                lambda: list(Category.objects.annotate(n=Count("products"))), options["repeat"]
+            ))
+            column = summarize(timed(lambda: list(Category.objects.all()), options["repeat"]))
+            view = summarize(timed(endpoint, options["repeat"]))
+            self.stdout.write(
+                f"{size:>9} products  Count() p50={annotated['p50']:.2f}ms"
+                f"  column p50={column['p50']:.2f}ms"
+                f"  /api/categories/ (uncached) p50={view['p50']:.2f}ms"
+            )
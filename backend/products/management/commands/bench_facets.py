@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from products.bench import seed_products, summarize, timed
+from products.cache import get_cache
+from products.facets import grouped_counts, recount_facets
+from products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Time ?facets=1 on the product list as the catalog grows: the "
+        "maintained FacetCount table for the whole catalog against one "
+        "grouped query, and the grouped query under common filters. Seeds "
+        "products into the configured database: use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        client = Client()
+        cache = get_cache()
+
+        def endpoint(query):
+            def get():
+                cache.clear()
+                client.get(f"/api/products/?facets=1{query}")
+            return get
+
+        for size in sorted(options["sizes"]):
+            existing = Product.objects.count()
+            if existing < size:
+                seed_products(size - existing, seed=existing)
+                recount_facets()
+            slug = Category.objects.filter(slug__startswith="bench-category-").values_list("slug", flat=True).first()
+            cases = (
+                ("catalog (FacetCount)", endpoint("")),
+                ("catalog (grouped query)", lambda: grouped_counts(Product.objects.all())),
+                ("category", endpoint(f"&category={slug}")),
+                ("price 10-200", endpoint("&min_price=10&max_price=200")),
+                ("featured", endpoint("&featured=true")),
+            )
+            self.stdout.write(f"{Product.objects.count():>9} products")
+            with override_settings(METRICS_SAMPLE_RATE=0):
+                for label, fn in cases:
+                    stats = summarize(timed(fn, options["repeat"]))
+                    self.stdout.write(f"  {label:24} p50={stats['p50']:9.2f}ms  p95={stats['p95']:9.2f}ms")
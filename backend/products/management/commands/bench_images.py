@@ -0,0 +1,78 @@
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from PIL import Image, ImageDraw
+
+from products.images import FORMATS, VARIANTS, ensure_many, variant_path
+
+
+def make_photo(path, rng, size=(3000, 2000)):
+    """Shapes on a gradient plus sensor-like noise, saved as a camera-size JPEG."""
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(image, "RGBA")
+    for _ in range(30):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        r = rng.randrange(100, 800)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256), 120))
+    image = Image.blend(image, Image.effect_noise(size, 30).convert("RGB"), 0.15)
+    image.save(path, "JPEG", quality=90)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure variant generation throughput (images/s, serial and on a "
+        "process pool) and the bytes a 24-product listing page transfers "
+        "with originals versus each variant. Works in a temporary MEDIA_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=48)
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+
+    def handle(self, *args, **options):
+        root = Path(tempfile.mkdtemp())
+        try:
+            with override_settings(MEDIA_ROOT=root):
+                self.run(root, options)
+        finally:
+            shutil.rmtree(root)
+
+    def run(self, root, options):
+        rng = random.Random(0)
+        (root / "products").mkdir()
+        names = [f"products/photo{i}.jpg" for i in range(options["images"])]
+        for name in names[:8]:
+            make_photo(root / name, rng)
+        for i, name in enumerate(names[8:]):
+            shutil.copy(root / names[i % 8], root / name)
+
+        half = len(names) // 2
+        start = time.perf_counter()
+        ensure_many(names[:half])
+        serial = half / (time.perf_counter() - start)
+
+        context = multiprocessing.get_context("fork")
+        rest = names[half:]
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options["workers"], mp_context=context) as pool:
+            list(pool.map(ensure_many, [[name] for name in rest]))
+        pooled = len(rest) / (time.perf_counter() - start)
+        self.stdout.write(f"generation: {serial:.1f} images/s serial, {pooled:.1f} images/s on {options['workers']} processes")
+        self.stdout.write(f"  ({len(VARIANTS) * len(FORMATS)} files per image)")
+
+        page = names[:24]
+        original = sum((root / name).stat().st_size for name in page)
+        self.stdout.write(f"24-product page, original:  {original / 1024:10,.0f} KiB")
+        for variant in VARIANTS:
+            for fmt in FORMATS:
+                size = sum(variant_path(name, variant, fmt).stat().st_size for name in page)
+                self.stdout.write(
+                    f"24-product page, {variant:5} {fmt:4}: {size / 1024:10,.0f} KiB  ({original / size:,.0f}x smaller)"
+                )
@@ -0,0 +1,58 @@
+import json
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.bench import WORDS, seed_categories
+from products.catalog_io import export_feed, import_feed
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure feed throughput in rows/s: import of new SKUs, re-import "
+        "with new prices and stock, re-import with new text (reindexed), "
+        "and export. Writes to the configured database: use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        slugs = [c.slug for c in seed_categories()]
+        runs = (("import (create)", 0, 0), ("import (prices)", 0, 1), ("import (text)", 1, 2))
+        for label, text_seed, number_seed in runs:
+            path = self.write_feed(options["rows"], slugs, text_seed, number_seed)
+            try:
+                start = time.perf_counter()
+                with open(path) as f:
+                    report = import_feed(f, "jsonl", options["chunk_size"])
+                self.report(label, report.rows, time.perf_counter() - start)
+            finally:
+                os.unlink(path)
+
+        start = time.perf_counter()
+        written = sum(chunk.count("\n") for chunk in export_feed(Product.objects.all(), "csv"))
+        self.report("export (csv)", written - 1, time.perf_counter() - start)
+
+    def write_feed(self, rows, slugs, text_seed, number_seed):
+        text, numbers = random.Random(text_seed), random.Random(number_seed)
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        with os.fdopen(fd, "w") as f:
+            for i in range(rows):
+                f.write(json.dumps({
+                    "sku": f"BENCH-{i:08d}",
+                    "name": " ".join(text.choice(WORDS) for _ in range(3)),
+                    "description": " ".join(text.choice(WORDS) for _ in range(20)),
+                    "price": f"{numbers.randint(100, 100000) / 100:.2f}",
+                    "stock": numbers.randint(0, 500),
+                    "category": text.choice(slugs),
+                }) + "\n")
+        return path
+
+    def report(self, label, rows, elapsed):
+        self.stdout.write(f"{label:18} {rows} rows in {elapsed:.2f}s  {rows / elapsed:,.0f} rows/s")
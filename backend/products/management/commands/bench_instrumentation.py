@@ -0,0 +1,54 @@
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from config.instrumentation import registry
+from products.bench import seed_products, summarize, timed
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the overhead of config.instrumentation on ProductListView: "
+        "median latency with the middleware off, sampling every request, "
+        "and at 10% sampling. Seeds data when missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--url", default="/api/products/?page_size=24")
+
+    def handle(self, *args, **options):
+        existing = Product.objects.count()
+        if existing < options["products"]:
+            seed_products(options["products"] - existing, seed=existing)
+
+        without = [m for m in settings.MIDDLEWARE if m != "config.instrumentation.InstrumentationMiddleware"]
+        modes = [
+            ("off", {"MIDDLEWARE": without}),
+            ("sampled 100%", {"METRICS_SAMPLE_RATE": 1.0}),
+            ("sampled 10%", {"METRICS_SAMPLE_RATE": 0.1}),
+        ]
+        # Time the view itself, not the response cache.
+        dummy_cache = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        samples = {label: [] for label, _ in modes}
+        # Interleave the modes so drift in machine load hits them equally.
+        for _ in range(options["rounds"]):
+            for label, overrides in modes:
+                with override_settings(CACHES=dummy_cache, **overrides):
+                    client = Client()
+                    client.get(options["url"])  # build the handler outside the timing
+                    samples[label] += timed(lambda: client.get(options["url"]), options["requests"])
+        registry.reset()
+
+        baseline = statistics.median(samples["off"])
+        for label, _ in modes:
+            stats = summarize(samples[label])
+            overhead = (stats["p50"] / baseline - 1) * 100
+            self.stdout.write(
+                f"{label:14} p50={stats['p50']:.3f}ms p95={stats['p95']:.3f}ms  overhead {overhead:+.1f}%"
+            )
@@ -0,0 +1,48 @@
+from functools import reduce
+from operator import and_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from products.bench import seed_products, summarize, timed
+from products.models import Product
+from products.search import reindex_products, search_products
+
+
+def icontains_search(query):
+    # What DRF SearchFilter builds for search_fields = ['name', 'description']
+    terms = query.split()
+    return Product.objects.filter(reduce(and_, (
+        Q(name__icontains=t) | Q(description__icontains=t) for t in terms
+    )))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare token-index search with the icontains scan at growing "
+        "catalog sizes. Seeds products into the configured database: "
+        "run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--limit", type=int, default=24, help="rows fetched per query")
+
+    def handle(self, *args, **options):
+        # common prefix, multi-term, rare model number, no match
+        queries = ["lea", "wireless head", "48213", "xyzzy"]
+        limit = options["limit"]
+        for size in sorted(options["sizes"]):
+            existing = Product.objects.count()
+            if existing < size:
+                seed_products(size - existing, seed=existing)
+                reindex_products()
+            self.stdout.write(f"\n{size} products")
+            for query in queries:
+                scan = summarize(timed(lambda: list(icontains_search(query)[:limit]), options["repeat"]))
+                index = summarize(timed(lambda: list(search_products(Product.objects.all(), query)[:limit]), options["repeat"]))
+                self.stdout.write(
+                    f"  {query!r:24} icontains p50={scan['p50']:.1f}ms p95={scan['p95']:.1f}ms"
+                    f" | index p50={index['p50']:.1f}ms p95={index['p95']:.1f}ms"
+                )
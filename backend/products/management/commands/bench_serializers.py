@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from products.bench import seed_products, summarize, timed
+from products.models import Product
+from products.representations import product_rows, products_data
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ProductSerializer with the .values() fast path at several "
+        "row counts, end to end and serialization only. Seeds products "
+        "into the configured database when it has too few."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000])
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        existing = Product.objects.count()
+        if existing < max(options["rows"]):
+            seed_products(max(options["rows"]) - existing, seed=existing)
+        request = APIRequestFactory().get("/api/products/")
+        context = {"request": request}
+        repeat = options["repeat"]
+
+        for n in options["rows"]:
+            queryset = Product.objects.select_related("category").order_by("id")[:n]
+            instances = list(queryset)
+            rows = list(product_rows(Product.objects.order_by("id")[:n]))
+
+            results = {
+                "serializer (query+render)": timed(
+                    lambda: ProductSerializer(queryset.all(), many=True, context=context).data, repeat),
+                "fast path (query+render)": timed(
+                    lambda: products_data(product_rows(Product.objects.order_by("id")[:n]), request), repeat),
+                "serializer (render only)": timed(
+                    lambda: ProductSerializer(instances, many=True, context=context).data, repeat),
+                "fast path (render only)": timed(lambda: products_data(rows, request), repeat),
+            }
+            self.stdout.write(f"\n{n} rows")
+            for label, samples in results.items():
+                stats = summarize(samples)
+                self.stdout.write(f"  {label:28} p50={stats['p50']:8.2f}ms  p95={stats['p95']:8.2f}ms")
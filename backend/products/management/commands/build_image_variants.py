@@ -0,0 +1,33 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from products.images import ensure_many
+from products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = "Generate missing resized variants for existing product and category images across a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+        parser.add_argument("--chunk-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        names = []
+        for model in (Category, Product):
+            names += model.objects.exclude(image="").exclude(image=None).values_list("image", flat=True)
+        size = options["chunk_size"]
+        chunks = [names[i:i + size] for i in range(0, len(names), size)]
+
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        written = 0
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=options["workers"], mp_context=context) as pool:
+            for done, count in enumerate(pool.map(ensure_many, chunks), start=1):
+                written += count
+                self.stdout.write(f"{min(done * size, len(names))}/{len(names)} images")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} variant files for {len(names)} images"))
@@ -0,0 +1,24 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from products.catalog_io import FORMATS, export_feed
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Stream the product catalog out as CSV or JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file-format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", default="-", help="file path, or - for stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        out = sys.stdout if options["output"] == "-" else open(options["output"], "w", encoding="utf-8", newline="")
+        try:
+            for chunk in export_feed(Product.objects.all(), options["file_format"], options["chunk_size"]):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
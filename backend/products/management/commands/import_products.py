@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog_io import FORMATS, guess_format, import_feed
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or JSONL product feed into the catalog, upserting by SKU."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="feed file, or - for stdin")
+        parser.add_argument("--file-format", choices=FORMATS, help="defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--show-errors", type=int, default=20, help="row errors to print")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["file_format"] or guess_format(path)
+        start = time.perf_counter()
+
+        def progress(report):
+            rate = report.rows / (time.perf_counter() - start)
+            self.stdout.write(
+                f"{report.rows} rows  created={report.created} updated={report.updated}"
+                f" errors={report.error_count}  {rate:.0f} rows/s"
+            )
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        except OSError as exc:
+            raise CommandError(exc)
+        with stream:
+            report = import_feed(stream, fmt, options["chunk_size"], on_progress=progress)
+
+        for error in report.errors[:options["show_errors"]]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.rows} rows in {elapsed:.1f}s ({report.rows / max(elapsed, 1e-9):.0f} rows/s): "
+            f"{report.created} created, {report.updated} updated, {report.error_count} errors"
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.counters import recount_categories
+
+
+class Command(BaseCommand):
+    help = "Recompute Category.product_count; with --check only report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="report drifted categories and exit non-zero instead of fixing them",
+        )
+
+    def handle(self, *args, **options):
+        drift = recount_categories(fix=not options["check"])
+        for category, stored, actual in drift:
+            self.stdout.write(f"{category.slug}: stored={stored} actual={actual}")
+        if options["check"] and drift:
+            raise CommandError(f"{len(drift)} categories have drifted product counts")
+        verb = "Fixed" if drift else "No drift in"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drift) or 'any'} categories"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.facets import recount_facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the FacetCount table; with --check only report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="report drifted facet counts and exit non-zero instead of fixing them",
+        )
+
+    def handle(self, *args, **options):
+        drift = recount_facets(fix=not options["check"])
+        for key, stored, actual in drift:
+            self.stdout.write(f"{key}: stored={stored} actual={actual}")
+        if options["check"] and drift:
+            raise CommandError(f"{len(drift)} facet counts have drifted")
+        verb = "Fixed" if drift else "No drift in"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drift) or 'any'} facet counts"))
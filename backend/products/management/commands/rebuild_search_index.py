@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.search import reindex_products
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search token index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = reindex_products(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} products"))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import backfill
+from products.bench import seed_products, seed_shopping, seed_users
+from products.counters import recount_categories
+from products.facets import recount_facets
+from products.models import Product
+from products.search import reindex_products
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a deterministic benchmark dataset: products, users with carts, "
+        "wishlists and order histories. Tops up to the requested size, so it "
+        "can be re-run to grow a dataset. Writes to the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="10k", help="number of products")
+        parser.add_argument("--products", type=int, help="overrides --scale")
+        parser.add_argument("--users", type=int, help="defaults to one per 100 products")
+        parser.add_argument("--cart-items", type=int, default=5)
+        parser.add_argument("--wishlist-items", type=int, default=5)
+        parser.add_argument("--orders", type=int, default=3, help="orders per user")
+
+    def handle(self, *args, **options):
+        target = options["products"] or SCALES[options["scale"]]
+        start = time.perf_counter()
+
+        existing = Product.objects.count()
+        if existing < target:
+            last_pk = Product.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+            seed_products(target - existing, seed=existing)
+            # bulk_create skipped the signals maintaining these.
+            reindex_products(Product.objects.filter(pk__gt=last_pk))
+            recount_categories()
+            recount_facets()
+        self.stdout.write(f"products: {Product.objects.count()}")
+
+        users = seed_users(options["users"] or max(target // 100, 10))
+        seeded = seed_shopping(
+            users, cart_items=options["cart_items"], wishlist_items=options["wishlist_items"],
+            orders=options["orders"],
+        )
+        self.stdout.write(f"users: {len(users)} ({seeded} new carts, wishlists and order histories)")
+        if seeded:
+            backfill()  # the seeded orders skipped the sales rollups
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {time.perf_counter() - start:.1f}s"))
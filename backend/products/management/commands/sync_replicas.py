@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary onto the SQLite files standing in for "
+        "DATABASE_REPLICAS (see SQLITE_REPLICAS). Real replicas are kept "
+        "in sync by the database server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("aliases", nargs="*", help="replicas to refresh (default: all)")
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError("No DATABASE_REPLICAS configured; set SQLITE_REPLICAS=<n>")
+        unknown = set(aliases) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(f"Not a replica: {', '.join(sorted(unknown))}")
+        if any(connections[alias].vendor != "sqlite" for alias in [DEFAULT_DB_ALIAS, *aliases]):
+            raise CommandError("sync_replicas only copies SQLite files")
+
+        source = sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict["NAME"])
+        try:
+            for alias in aliases:
+                # The alias opens its file read-only; write through a plain path.
+                path = str(connections[alias].settings_dict["NAME"]).removeprefix("file:").split("?")[0]
+                connections[alias].close()
+                start = time.perf_counter()
+                target = sqlite3.connect(path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: {path} in {(time.perf_counter() - start) * 1000:.0f}ms")
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Synced {len(aliases)} replicas"))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:43
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of products.search's tokenizer as of this migration.
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return [t[:64] for t in TOKEN_RE.findall((text or "").lower())]
+
+
+def product_tokens(name, description):
+    weights = {}
+    for token in set(tokenize(name)):
+        weights[token] = weights.get(token, 0) + 3
+    for token in set(tokenize(description)):
+        weights[token] = weights.get(token, 0) + 1
+    return weights
+
+
+def index_existing_products(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    SearchToken = apps.get_model("products", "SearchToken")
+    tokens = [
+        SearchToken(product_id=product.pk, token=token, weight=weight)
+        for product in Product.objects.only("id", "name", "description").iterator()
+        for token, weight in product_tokens(product.name, product.description).items()
+    ]
+    SearchToken.objects.bulk_create(tokens, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'product'], name='searchtoken_token_idx')],
+                'unique_together': {('product', 'token')},
+            },
+        ),
+        migrations.RunPython(index_existing_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:53
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_products(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    categories = list(Category.objects.annotate(n=Count("products")))
+    for category in categories:
+        category.product_count = category.n
+    Category.objects.bulk_update(categories, ["product_count"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_searchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_products, migrations.RunPython.noop),
+    ]
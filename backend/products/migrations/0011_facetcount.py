@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:52
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, Count, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+
+# Frozen copy of products.facets' buckets and grouping as of this migration.
+PRICE_BUCKETS = tuple(Decimal(bound) for bound in (10, 25, 50, 100, 250, 500, 1000))
+
+
+def count_facets(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    FacetCount = apps.get_model("products", "FacetCount")
+    bucket = Case(
+        *[When(price__lt=bound, then=Value(i)) for i, bound in enumerate(PRICE_BUCKETS)],
+        default=Value(len(PRICE_BUCKETS)), output_field=IntegerField(),
+    )
+    rows = (
+        Product.objects.order_by()
+        .values_list(Coalesce("category_id", 0), bucket, "featured", "trending")
+        .annotate(n=Count("pk"))
+    )
+    FacetCount.objects.bulk_create([
+        FacetCount(category_id=category_id, price_bucket=price_bucket, featured=featured, trending=trending, count=n)
+        for category_id, price_bucket, featured, trending, n in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_product_reserved'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_id', models.BigIntegerField()),
+                ('price_bucket', models.PositiveSmallIntegerField()),
+                ('featured', models.BooleanField()),
+                ('trending', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('category_id', 'price_bucket', 'featured', 'trending')},
+            },
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
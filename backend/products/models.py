@@ -14,6 +14,8 @@ class Category(models.Model):
     )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by products.signals; `manage.py rebuild_category_counts` repairs drift.
+    product_count = models.PositiveIntegerField(default=0, editable=False)
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ["name"]
@@ -22,11 +24,19 @@ class Category(models.Model):
         return self.name
     
     
+# Attributes that place a product in a FacetCount row.
+FACET_FIELDS = ("category_id", "price", "featured", "trending")
+
+
 class Product(models.Model):
+    # Supplier key used by bulk feed upserts (products.catalog_io).
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
+    # Sum of the active StockHolds on this product (inventory.holds).
+    reserved = models.PositiveIntegerField(default=0, editable=False)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -34,9 +44,83 @@ class Product(models.Model):
     featured = models.BooleanField(default=False)
     trending = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # keyset pagination (see products.pagination)
+            models.Index(fields=["-created_at", "-id"], name="product_created_id_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], name="product_cat_created_id_idx"),
+            # price range filters, with and without a category
+            models.Index(fields=["price"], name="product_price_idx"),
+            models.Index(fields=["category", "price"], name="product_cat_price_idx"),
+            # the flags are rare, so partial indexes stay small
+            models.Index(fields=["-created_at", "-id"], condition=models.Q(featured=True), name="product_featured_idx"),
+            models.Index(fields=["-created_at", "-id"], condition=models.Q(trending=True), name="product_trending_idx"),
+        ]
+
     def __str__(self):
         return self.name
-    
+
+    def save(self, *args, **kwargs):
+        # `reserved` only moves through conditional UPDATEs; a full save of
+        # an instance loaded earlier (admin forms) must not write it back.
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != "reserved" and f.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored category so post_save can see moves.
+        if "category_id" in instance.__dict__:
+            instance._loaded_category_id = instance.category_id
+        # ...and the stored facet values, for products.facets.
+        if all(name in instance.__dict__ for name in FACET_FIELDS):
+            instance._loaded_facet = tuple(instance.__dict__[name] for name in FACET_FIELDS)
+        return instance
+
+    def facet_values(self):
+        return tuple(getattr(self, name) for name in FACET_FIELDS)
+
+
+class SearchToken(models.Model):
+    """Inverted index row: one token of a product's name/description."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ("product", "token")
+        indexes = [
+            models.Index(fields=["token", "product"], name="searchtoken_token_idx"),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class FacetCount(models.Model):
+    """
+    Products per (category, price bucket, featured, trending), maintained
+    by products.signals so unfiltered facet counts never scan the catalog.
+    category_id 0 is uncategorized; see products.facets for the buckets.
+    """
+    category_id = models.BigIntegerField()
+    price_bucket = models.PositiveSmallIntegerField()
+    featured = models.BooleanField()
+    trending = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("category_id", "price_bucket", "featured", "trending")
+
+    def __str__(self):
+        return f"{self.count} in {self.category_id}/{self.price_bucket}/{self.featured}/{self.trending}"
+
+
 class Wishlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="wishlist")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="wishlisted_by")
@@ -44,3 +128,6 @@ class Wishlist(models.Model):
 
     class Meta:
         unique_together = ("user", "product")
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="wishlist_user_created_idx"),
+        ]
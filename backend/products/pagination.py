@@ -0,0 +1,54 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id).
+
+    Opt-in: a plain list is returned unless the client sends a `cursor`
+    or `page_size` query param, so existing callers keep working.
+    Ranked searches (ordered by `search_rank`, see products.search) page
+    by `offset` instead: the keyset would re-order them by date.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    offset_query_param = "offset"
+    offset = None  # set for ranked pages
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        if queryset.query.order_by[:1] == ("-search_rank",):
+            return self.paginate_ranked(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_ranked(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.offset = max(int(request.query_params.get(self.offset_query_param, 0)), 0)
+        except ValueError:
+            self.offset = 0
+        rows = list(queryset[self.offset:self.offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def ranked_link(self, offset):
+        url = replace_query_param(self.request.build_absolute_uri(), self.page_size_query_param, self.page_size)
+        if offset:
+            return replace_query_param(url, self.offset_query_param, offset)
+        return remove_query_param(url, self.offset_query_param)
+
+    def get_next_link(self):
+        if self.offset is None:
+            return super().get_next_link()
+        return self.ranked_link(self.offset + self.page_size) if self.has_next else None
+
+    def get_previous_link(self):
+        if self.offset is None:
+            return super().get_previous_link()
+        return self.ranked_link(max(self.offset - self.page_size, 0)) if self.offset else None
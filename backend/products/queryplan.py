@@ -0,0 +1,35 @@
+from django.db.models import Prefetch
+
+
+def prefetch_lookups(serializer_class):
+    """Prefetch objects for the to-many relations a serializer declares."""
+    lookups = []
+    for name, nested in getattr(serializer_class, "prefetch_related_fields", {}).items():
+        related = nested.Meta.model._default_manager.all()
+        lookups.append(Prefetch(name, queryset=plan_queryset(related, nested)))
+    return lookups
+
+
+def plan_queryset(queryset, serializer_class):
+    """
+    Apply the joins and prefetches a serializer declares.
+
+    Serializers list to-one paths in `select_related_fields` and to-many
+    relations in `prefetch_related_fields` ({relation: nested serializer}),
+    so the number of queries no longer grows with the number of rows.
+    """
+    select = getattr(serializer_class, "select_related_fields", ())
+    if select:
+        queryset = queryset.select_related(*select)
+    lookups = prefetch_lookups(serializer_class)
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    return queryset
+
+
+class QueryPlanMixin:
+    """Generic-view mixin running every queryset through plan_queryset."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return plan_queryset(queryset, self.get_serializer_class())
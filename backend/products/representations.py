@@ -0,0 +1,119 @@
+"""
+Read-only fast path for hot list endpoints.
+
+Builds response dicts straight from `.values()` rows, skipping DRF's
+per-field machinery. Output matches ProductSerializer/CategorySerializer
+(and the cart/order item serializers nesting them) key for key; the
+tests compare the two.
+"""
+from django.core.files.storage import default_storage
+
+from .images import variant_urls
+
+CATEGORY_FIELDS = ("id", "name", "slug", "description", "image", "product_count")
+PRODUCT_FIELDS = ("id", "name", "description", "price", "stock", "image", "featured", "trending")
+
+
+def media_url(name, request=None):
+    # Same rules as DRF's ImageField: absolute when a request is at hand.
+    if not name:
+        return None
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def category_columns(prefix=""):
+    return tuple(prefix + field for field in CATEGORY_FIELDS)
+
+
+def product_columns(prefix=""):
+    # created_at is fetched for cursor pagination but not rendered.
+    return (
+        tuple(prefix + field for field in PRODUCT_FIELDS)
+        + (prefix + "created_at",)
+        + category_columns(prefix + "category__")
+    )
+
+
+def category_from_row(row, request=None, prefix=""):
+    if row[prefix + "id"] is None:
+        return None
+    return {
+        "id": row[prefix + "id"],
+        "name": row[prefix + "name"],
+        "slug": row[prefix + "slug"],
+        "description": row[prefix + "description"],
+        "image": media_url(row[prefix + "image"], request),
+        "image_variants": variant_urls(row[prefix + "image"], request),
+        "product_count": row[prefix + "product_count"],
+    }
+
+
+def product_from_row(row, request=None, prefix=""):
+    if row[prefix + "id"] is None:
+        return None
+    data = {
+        "id": row[prefix + "id"],
+        "name": row[prefix + "name"],
+        "description": row[prefix + "description"],
+        "price": f"{row[prefix + 'price']:.2f}",
+        "stock": row[prefix + "stock"],
+        "image": media_url(row[prefix + "image"], request),
+        "image_variants": variant_urls(row[prefix + "image"], request),
+        "category": category_from_row(row, request, prefix + "category__"),
+        "featured": row[prefix + "featured"],
+        "trending": row[prefix + "trending"],
+    }
+    # Only listings asked for `?with_wishlist=1` annotate it (products.wishlist).
+    if "is_wishlisted" in row:
+        data["is_wishlisted"] = row["is_wishlisted"]
+    return data
+
+
+def product_rows(queryset, wishlisted=None):
+    if wishlisted is None:
+        return queryset.values(*product_columns())
+    return queryset.annotate(is_wishlisted=wishlisted).values(*product_columns(), "is_wishlisted")
+
+
+def category_rows(queryset):
+    return queryset.values(*category_columns())
+
+
+def cart_item_rows(queryset):
+    return queryset.values("id", "quantity", *product_columns("product__"))
+
+
+def order_item_rows(queryset):
+    return queryset.values("id", "quantity", "price", *product_columns("product__"))
+
+
+def products_data(rows, request=None):
+    return [product_from_row(row, request) for row in rows]
+
+
+def categories_data(rows, request=None):
+    return [category_from_row(row, request) for row in rows]
+
+
+def cart_items_data(rows, request=None):
+    return [
+        {
+            "id": row["id"],
+            "product": product_from_row(row, request, "product__"),
+            "quantity": row["quantity"],
+        }
+        for row in rows
+    ]
+
+
+def order_items_data(rows, request=None):
+    return [
+        {
+            "id": row["id"],
+            "product": product_from_row(row, request, "product__"),
+            "quantity": row["quantity"],
+            "price": f"{row['price']:.2f}",
+        }
+        for row in rows
+    ]
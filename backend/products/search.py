@@ -0,0 +1,103 @@
+import re
+
+from django.db.models import OuterRef, Q, Subquery, Sum
+from rest_framework.filters import SearchFilter
+
+from .models import Product, SearchToken
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TOKEN_LENGTH = 64
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+# Shorter terms match whole tokens only; a one-letter prefix selects half the catalog.
+MIN_PREFIX_LENGTH = 2
+# Upper bound for prefix range scans; keeps `token LIKE 'abc%'` index friendly.
+PREFIX_END = "\U0010ffff"
+
+
+def tokenize(text):
+    return [t[:MAX_TOKEN_LENGTH] for t in TOKEN_RE.findall((text or "").lower())]
+
+
+def product_tokens(name, description):
+    """Map each distinct token to its weight (name hits rank above description)."""
+    weights = {}
+    for token in set(tokenize(name)):
+        weights[token] = weights.get(token, 0) + NAME_WEIGHT
+    for token in set(tokenize(description)):
+        weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+    return weights
+
+
+def build_tokens(products):
+    return [
+        SearchToken(product_id=product.pk, token=token, weight=weight)
+        for product in products
+        for token, weight in product_tokens(product.name, product.description).items()
+    ]
+
+
+def index_product(product):
+    SearchToken.objects.filter(product_id=product.pk).delete()
+    SearchToken.objects.bulk_create(build_tokens([product]))
+
+
+def reindex_products(queryset=None, batch_size=2000):
+    """Rebuild index rows for `queryset` (all products by default), in batches."""
+    queryset = (queryset if queryset is not None else Product.objects.all()).only("id", "name", "description")
+    total = 0
+    batch = []
+    for product in queryset.order_by("pk").iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            total += reindex_batch(batch)
+            batch = []
+    if batch:
+        total += reindex_batch(batch)
+    return total
+
+
+def reindex_batch(products):
+    SearchToken.objects.filter(product_id__in=[p.pk for p in products]).delete()
+    SearchToken.objects.bulk_create(build_tokens(products), batch_size=2000)
+    return len(products)
+
+
+def prefix_match(term):
+    if len(term) < MIN_PREFIX_LENGTH:
+        return Q(token=term)
+    return Q(token__gte=term, token__lt=term + PREFIX_END)
+
+
+def search_products(queryset, query):
+    """
+    Filter `queryset` to products matching every term of `query` as a
+    word prefix, annotated with `search_rank` and ordered best first.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return queryset
+
+    any_term = Q()
+    for term in terms:
+        match = prefix_match(term)
+        any_term |= match
+        queryset = queryset.filter(
+            pk__in=SearchToken.objects.filter(match).values("product_id")
+        )
+
+    rank = (
+        SearchToken.objects.filter(any_term, product=OuterRef("pk"))
+        .values("product")
+        .annotate(total=Sum("weight"))
+        .values("total")
+    )
+    return queryset.annotate(search_rank=Subquery(rank)).order_by("-search_rank", "-id")
+
+
+class ProductSearchFilter(SearchFilter):
+    """Drop-in replacement for SearchFilter backed by the token index."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        return search_products(queryset, query)
@@ -1,18 +1,31 @@
 from rest_framework import serializers
+from .images import variant_urls
 from .models import Product, Category, Wishlist
+from .wishlist import bump_wishlist
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """URLs of the resized variants of an image field (see products.images)."""
+
+    def to_representation(self, value):
+        return variant_urls(value.name, self.context.get("request"))
+
 
 class CategorySerializer(serializers.ModelSerializer):
     product_count = serializers.IntegerField(read_only=True)
+    image_variants = ImageVariantsField(source="image")
     class Meta:
         model = Category
-        fields = ["id", "name", "slug", "description", "image","product_count"]
+        fields = ["id", "name", "slug", "description", "image", "image_variants", "product_count"]
 
 class ProductSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
+    image_variants = ImageVariantsField(source="image")
+    select_related_fields = ("category",)
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'stock', 'image', 'category', 'featured', 'trending']
+        fields = ['id', 'name', 'description', 'price', 'stock', 'image', 'image_variants', 'category', 'featured', 'trending']
 
 class WishlistCreateSerializer(serializers.ModelSerializer):
     product_id = serializers.PrimaryKeyRelatedField(
@@ -33,11 +46,14 @@ class WishlistCreateSerializer(serializers.ModelSerializer):
             user=user,
             product=product
         )
+        if created:
+            bump_wishlist(user.pk)
 
         return wishlist
 
 class WishlistSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
+    select_related_fields = ("product__category",)
 
     class Meta:
         model = Wishlist
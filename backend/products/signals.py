@@ -0,0 +1,107 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_versions
+from .counters import adjust_product_count
+from .facets import move as move_facets, uncategorize
+from .images import VARIANTS, schedule_variants, variant_path
+from .models import FACET_FIELDS, Category, Product, Wishlist
+from .search import index_product
+from .wishlist import bump_wishlist
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    # Saves that only touch e.g. stock don't change the indexed text.
+    if update_fields is not None and not {"name", "description"} & set(update_fields):
+        return
+    index_product(instance)
+
+
+@receiver(pre_save, sender=Product)
+def remember_stored_category(sender, instance, **kwargs):
+    # Instances built by hand (or with category deferred) don't know what
+    # is stored; from_db records it for everything loaded normally.
+    if instance.pk is None or hasattr(instance, "_loaded_category_id"):
+        return
+    instance._loaded_category_id = (
+        Product.objects.filter(pk=instance.pk).values_list("category_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_category_counts(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {"category", "category_id"} & set(update_fields):
+        return
+    if created:
+        adjust_product_count(instance.category_id, 1)
+    elif instance._loaded_category_id != instance.category_id:
+        adjust_product_count(instance._loaded_category_id, -1)
+        adjust_product_count(instance.category_id, 1)
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_delete, sender=Product)
+def decrement_category_count(sender, instance, **kwargs):
+    adjust_product_count(instance.category_id, -1)
+
+
+@receiver(pre_save, sender=Product)
+def remember_stored_facet(sender, instance, **kwargs):
+    if instance.pk is None or hasattr(instance, "_loaded_facet"):
+        return
+    instance._loaded_facet = Product.objects.filter(pk=instance.pk).values_list(*FACET_FIELDS).first()
+
+
+@receiver(post_save, sender=Product)
+def update_facet_counts(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {"category", *FACET_FIELDS} & set(update_fields):
+        return
+    values = instance.facet_values()
+    move_facets(None if created else instance._loaded_facet, values)
+    instance._loaded_facet = values
+
+
+@receiver(post_delete, sender=Product)
+def remove_facet_count(sender, instance, **kwargs):
+    move_facets(instance.facet_values(), None)
+
+
+@receiver(post_delete, sender=Category)
+def uncategorize_facet_counts(sender, instance, **kwargs):
+    uncategorize(instance.pk)
+
+
+# Bump after commit: a request between the write and the commit would
+# otherwise cache the old rows under the new version.
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_responses(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_versions, "products", f"product:{instance.pk}"))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_versions, "categories"))
+
+
+@receiver(pre_delete, sender=Product)
+def invalidate_wishlists(sender, instance, **kwargs):
+    # The cascade deletes the wishlist rows without going through the views.
+    for user_id in Wishlist.objects.filter(product=instance).values_list("user_id", flat=True):
+        bump_wishlist(user_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+def generate_image_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "image" not in update_fields:
+        return
+    name = instance.image.name
+    # The largest variant is written first; if it exists so do the rest.
+    if name and not variant_path(name, max(VARIANTS, key=VARIANTS.get), "webp").exists():
+        schedule_variants(name)
@@ -0,0 +1,7 @@
+from jobs.queue import task
+from .images import ensure_many
+
+
+@task("products.image_variants", priority=100)
+def image_variants(names):
+    ensure_many(names)
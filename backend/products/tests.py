@@ -1,3 +1,687 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory
+
+from config import instrumentation
+from config.instrumentation import RequestTimings, registry, timed_serialization
+from config import replicas
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+from .bench import seed_products
+from .cache import get_cache
+from .catalog_io import export_feed, import_feed
+from .images import variant_path
+from .counters import recount_categories
+from .facets import recount_facets
+from .models import Category, Product, Wishlist
+from .representations import categories_data, category_rows, product_rows, products_data
+from .search import reindex_products
+from .serializers import CategorySerializer, ProductSerializer
+
+User = get_user_model()
+
+
+class QueryCountMixin:
+    """
+    Asserts that an endpoint runs the same number of queries however
+    many rows it returns: `grow` adds rows between two identical requests.
+    """
+
+    def count_queries(self, url):
+        get_cache().clear()  # measure the uncached path
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, grow):
+        grow()
+        small = self.count_queries(url)
+        for _ in range(3):
+            grow()
+        self.assertEqual(self.count_queries(url), small, url)
+
+
+class ExplainMixin:
+    """
+    Runs EXPLAIN on every query an endpoint executes and fails on a full
+    table scan or on sorting the whole result in a temp b-tree. Seed
+    enough rows (and ANALYZE) for the planner to behave as in production.
+    """
+
+    def query_plans(self, url):
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                cursor.execute(connection.ops.explain_query_prefix() + " " + sql)
+                plans.append((sql, [str(row[-1]) for row in cursor.fetchall()]))
+        return plans
+
+    def assertIndexed(self, url, allow_scan=(), allow_sort=False):
+        if connection.vendor != "sqlite":
+            self.skipTest("plan assertions are written against SQLite's EXPLAIN QUERY PLAN")
+        for sql, plan in self.query_plans(url):
+            for step in plan:
+                full_scan = step.startswith("SCAN ") and " USING " not in step
+                if full_scan and step.split()[1] not in allow_scan:
+                    self.fail(f"{url}: full table scan ({step})\n{sql}")
+                if "TEMP B-TREE FOR ORDER BY" in step and not allow_sort:
+                    self.fail(f"{url}: sorts in a temp b-tree ({step})\n{sql}")
+
+
+def make_product(category, **kwargs):
+    kwargs.setdefault("name", "Product")
+    kwargs.setdefault("price", 10)
+    kwargs.setdefault("stock", 100)
+    return Product.objects.create(category=category, **kwargs)
+
+
+class ProductQueryCountTests(QueryCountMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.category = Category.objects.create(name="Shoes", slug="shoes")
+
+    def add_products(self):
+        category = Category.objects.create(
+            name=f"Cat {Category.objects.count()}", slug=f"cat-{Category.objects.count()}"
+        )
+        make_product(category)
+        make_product(self.category)
+
+    def test_product_list(self):
+        self.assertConstantQueries("/api/products/", self.add_products)
+
+    def test_product_list_paginated(self):
+        self.assertConstantQueries("/api/products/?page_size=50", self.add_products)
+
+    def test_category_products(self):
+        self.assertConstantQueries("/api/products/category/shoes/", self.add_products)
+
+    def test_wishlist(self):
+        self.client.force_authenticate(self.user)
+
+        def grow():
+            self.add_products()
+            Wishlist.objects.create(user=self.user, product=Product.objects.latest("id"))
+
+        self.assertConstantQueries("/api/products/wishlist/", grow)
+
+    def test_product_list_with_wishlist_flags(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        def grow():
+            self.add_products()
+            Wishlist.objects.create(user=self.user, product=Product.objects.latest("id"))
+
+        url = "/api/products/?with_wishlist=1&page_size=50"
+        self.client.get(url)  # warms the token blacklist check
+        self.assertConstantQueries(url, grow)
+
+
+class CategoryCountTests(TestCase):
+    def setUp(self):
+        self.shoes = Category.objects.create(name="Shoes", slug="shoes")
+        self.hats = Category.objects.create(name="Hats", slug="hats")
+
+    def counts(self):
+        return dict(Category.objects.values_list("slug", "product_count"))
+
+    def test_counts_follow_creates_moves_and_deletes(self):
+        boot, sandal = make_product(self.shoes), make_product(self.shoes)
+        cap = make_product(self.hats)
+        self.assertEqual(self.counts(), {"shoes": 2, "hats": 1})
+
+        sandal.category = self.hats
+        sandal.save()
+        self.assertEqual(self.counts(), {"shoes": 1, "hats": 2})
+        boot.category = self.hats
+        boot.save(update_fields=["category"])
+        self.assertEqual(self.counts(), {"shoes": 0, "hats": 3})
+        cap.category = self.shoes
+        cap.save(update_fields=["price"])  # the move isn't saved
+        self.assertEqual(self.counts(), {"shoes": 0, "hats": 3})
+
+        # A hand-built instance looks up what is stored.
+        Product(pk=boot.pk, category=self.shoes, name="Boot", price=1, created_at=boot.created_at).save()
+        self.assertEqual(self.counts(), {"shoes": 1, "hats": 2})
+        sandal.delete()
+        self.assertEqual(self.counts(), {"shoes": 1, "hats": 1})
+
+        self.shoes.delete()
+        self.assertEqual(self.counts(), {"hats": 1})
+        self.assertIsNone(Product.objects.get(pk=boot.pk).category_id)
+        self.assertEqual(recount_categories(fix=False), [])
+
+    def test_cached_product_detail_follows_the_count(self):
+        get_cache().clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            boot = make_product(self.shoes)
+        url = f"/api/products/{boot.pk}/"
+        self.assertEqual(self.client.get(url).json()["category"]["product_count"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product(self.shoes)
+        self.assertEqual(self.client.get(url).json()["category"]["product_count"], 2)
+
+    def test_rebuild_command_reports_and_fixes_drift(self):
+        make_product(self.shoes)
+        Category.objects.filter(pk=self.shoes.pk).update(product_count=5)
+        out = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_category_counts", "--check", stdout=out)
+        self.assertIn("shoes: stored=5 actual=1", out.getvalue())
+        self.assertEqual(self.counts()["shoes"], 5)
+        call_command("rebuild_category_counts", stdout=out)
+        self.assertEqual(self.counts(), {"shoes": 1, "hats": 0})
+        call_command("rebuild_category_counts", "--check", stdout=out)
+
+
+class WishlistMembershipTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="alice", password="pass")
+        self.products = [make_product(None) for _ in range(12)]
+
+    def test_ids_and_bitset_revalidate_by_version(self):
+        self.client.force_authenticate(self.user)
+        first, last = self.products[0].pk, self.products[10].pk
+        for product in (self.products[10], self.products[0]):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post("/api/products/wishlist/add/", {"product_id": product.pk}, format="json")
+
+        response = self.client.get("/api/products/wishlist/ids/")
+        self.assertEqual((response.json()["ids"], response.json()["count"]), ([first, last], 2))
+        bitset = self.client.get("/api/products/wishlist/ids/?encoding=bitset").json()
+        bits = int.from_bytes(base64.b64decode(bitset["bitset"]), "little")
+        self.assertEqual((bitset["encoding"], bitset["base"], bits), ("bitset", first, 1 | 1 << (last - first)))
+
+        etag = response["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get("/api/products/wishlist/ids/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/products/wishlist/remove/{first}/")
+        response = self.client.get("/api/products/wishlist/ids/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()["ids"]), (200, [last]))
+
+    def test_deleting_a_wishlisted_product_changes_the_version(self):
+        for product in self.products[:2]:
+            Wishlist.objects.create(user=self.user, product=product)
+        self.client.force_authenticate(self.user)
+        etag = self.client.get("/api/products/wishlist/ids/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].delete()
+        response = self.client.get("/api/products/wishlist/ids/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.json()["ids"]), (200, [self.products[1].pk]))
+
+    def test_sparse_wishlists_get_ids_instead_of_a_bitset(self):
+        far = make_product(None, pk=10_000_000)
+        for product in (self.products[0], far):
+            Wishlist.objects.create(user=self.user, product=product)
+        self.client.force_authenticate(self.user)
+        data = self.client.get("/api/products/wishlist/ids/?encoding=bitset").json()
+        self.assertEqual((data["encoding"], data["ids"]), ("ids", [self.products[0].pk, far.pk]))
+        self.assertNotIn("bitset", data)
+
+    def test_wishlist_flags_bypass_the_shared_cache(self):
+        Wishlist.objects.create(user=self.user, product=self.products[3])
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        flags = {
+            row["id"]: row["is_wishlisted"]
+            for row in self.client.get("/api/products/?with_wishlist=1", HTTP_AUTHORIZATION=f"Bearer {token}").json()
+        }
+        self.assertEqual([pk for pk, flag in flags.items() if flag], [self.products[3].pk])
+        anonymous = self.client.get("/api/products/?with_wishlist=1").json()
+        self.assertFalse(any(row["is_wishlisted"] for row in anonymous))
+        self.assertNotIn("is_wishlisted", self.client.get("/api/products/").json()[0])
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.category = Category.objects.create(name="Shoes", slug="shoes")
+        self.product = make_product(self.category, name="Boot")
+
+    def test_repeat_request_is_served_from_cache_and_revalidates(self):
+        first = self.client.get("/api/products/")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/products/")
+        self.assertEqual(first.content, second.content)
+        not_modified = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_product_save_invalidates_list_and_detail(self):
+        self.client.get("/api/products/")
+        self.client.get(f"/api/products/{self.product.id}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Sandal"
+            self.product.save()
+        self.assertEqual(self.client.get("/api/products/").json()[0]["name"], "Sandal")
+        self.assertEqual(self.client.get(f"/api/products/{self.product.id}/").json()["name"], "Sandal")
+
+
+class ProductQueryPlanTests(ExplainMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_products(3000)
+        reindex_products()
+        recount_categories()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_paginated_listing(self):
+        for query in ["", "&featured=true", "&trending=true", "&category=bench-category-3"]:
+            self.assertIndexed(f"/api/products/?page_size=24{query}")
+
+    def test_filtered_listing(self):
+        self.assertIndexed("/api/products/?category=bench-category-3", allow_sort=True)
+        self.assertIndexed("/api/products/?min_price=990&max_price=1000", allow_sort=True)
+        self.assertIndexed("/api/products/?category=bench-category-3&max_price=10", allow_sort=True)
+        self.assertIndexed("/api/products/category/bench-category-3/?page_size=24")
+
+    def test_search(self):
+        # ranking orders all matches, so a sort is expected
+        self.assertIndexed("/api/products/?search=wirel", allow_sort=True)
+
+    def test_detail_and_categories(self):
+        self.assertIndexed(f"/api/products/{Product.objects.first().pk}/")
+        # the category menu reads the small category table in full
+        self.assertIndexed("/api/categories/", allow_scan={"products_category"}, allow_sort=True)
+
+    def test_wishlist(self):
+        user = User.objects.create_user(username="alice", password="pass")
+        Wishlist.objects.bulk_create(Wishlist(user=user, product=p) for p in Product.objects.all()[:50])
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.assertIndexed("/api/products/wishlist/")
+        self.assertIndexed("/api/products/wishlist/count/")
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def search(self, query, **params):
+        return [row["id"] for row in self.client.get("/api/products/", {"search": query, **params}).json()]
+
+    def test_terms_match_word_prefixes(self):
+        boot = make_product(None, name="Leather Boots")
+        hat = make_product(None, name="Hat", description="goes with boots")
+        cap = make_product(None, name="B cap")
+        self.assertEqual(self.search("boo"), [boot.pk, hat.pk])
+        self.assertEqual(self.search("leath boo"), [boot.pk])
+        self.assertEqual(self.search("b"), [cap.pk])  # one letter: whole tokens only
+        self.assertEqual(self.search("bootz"), [])
+
+    def test_name_hits_rank_above_description_hits(self):
+        in_description = make_product(None, name="Hat", description="red")
+        in_name = make_product(None, name="Red scarf")
+        in_both = make_product(None, name="Red boot", description="red leather")
+        self.assertEqual(self.search("red"), [in_both.pk, in_name.pk, in_description.pk])
+
+    def test_ranked_pages_keep_the_ranking(self):
+        ranked = [make_product(None, name="Red" if i % 2 else "Hat", description="red") for i in range(5)]
+        expected = self.search("red")
+        self.assertEqual(expected[:2], [ranked[3].pk, ranked[1].pk])
+        page = self.client.get("/api/products/", {"search": "red", "page_size": 2}).json()
+        ids = [row["id"] for row in page["results"]]
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            ids += [row["id"] for row in page["results"]]
+        self.assertEqual(ids, expected)
+        self.assertIsNotNone(page["previous"])
+
+    def test_edits_reindex_the_product(self):
+        product = make_product(None, name="Boot", description="leather")
+        product.name = "Sandal"
+        product.save()
+        self.assertEqual((self.search("boot"), self.search("sandal")), ([], [product.pk]))
+        Product.objects.get(pk=product.pk).save(update_fields=["price"])
+        self.assertEqual(self.search("sandal"), [product.pk])
+        product.description = "canvas"
+        product.save(update_fields=["description"])
+        self.assertEqual((self.search("leather"), self.search("canvas")), ([], [product.pk]))
+
+
+class AsyncCatalogTests(TestCase):
+    """The async twins under /api/async/ answer like the sync views."""
+
+    def setUp(self):
+        get_cache().clear()
+        shoes = Category.objects.create(name="Shoes", slug="shoes")
+        self.boot = make_product(shoes, name="Red boot", featured=True)
+        make_product(shoes, name="Sandal", price=30)
+        make_product(None, name="Red cap")
+
+    async def test_responses_match_the_sync_views(self):
+        client = AsyncClient()
+        for path in (
+            "", "?search=red", "?category=shoes&min_price=20", "?page_size=2", f"{self.boot.pk}/",
+            "categories/", "category/shoes/", "category/shoes/?featured=1",
+        ):
+            with self.subTest(path=path):
+                expected = await sync_to_async(self.client.get)(f"/api/products/{path}")
+                response = await client.get(f"/api/async/products/{path}")
+                self.assertEqual(response.status_code, 200)
+                # Pagination links point back at each endpoint.
+                self.assertEqual(json.loads(response.content.replace(b"/api/async/", b"/api/")), expected.json())
+        self.assertEqual((await client.get("/api/async/products/999/")).status_code, 404)
+
+
+class RepresentationTests(TestCase):
+    """The fast read path must render exactly what the serializers do."""
+
+    def setUp(self):
+        self.request = APIRequestFactory().get("/")
+        self.category = Category.objects.create(name="Shoes", slug="shoes", image="categories/c.png")
+        make_product(self.category, name="Boot", price="12.5", image="products/boot.jpg", featured=True)
+        make_product(None, name="Loose", description="no category")
+
+    def test_products(self):
+        queryset = Product.objects.order_by("id")
+        expected = ProductSerializer(queryset, many=True, context={"request": self.request}).data
+        actual = products_data(product_rows(queryset), self.request)
+        self.assertEqual(json.loads(json.dumps(expected)), actual)
+        self.assertEqual(ProductSerializer(queryset, many=True).data, products_data(product_rows(queryset)))
+
+    def test_categories(self):
+        queryset = Category.objects.all()
+        expected = CategorySerializer(queryset, many=True, context={"request": self.request}).data
+        self.assertEqual(json.loads(json.dumps(expected)), categories_data(category_rows(queryset), self.request))
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        self.shoes = Category.objects.create(name="Shoes", slug="shoes")
+        self.hats = Category.objects.create(name="Hats", slug="hats")
+        self.boot = make_product(self.shoes, price="120", featured=True)
+        make_product(self.shoes, price="8")
+        make_product(self.hats, price="30", trending=True)
+        make_product(None, price="5000")
+
+    def test_saves_and_deletes_keep_the_counts(self):
+        self.boot.price = "9.99"
+        self.boot.save()
+        moved = Product.objects.get(price="30")
+        moved.category = self.shoes
+        moved.save(update_fields=["category"])
+        # Built by hand: the stored values are looked up before the save.
+        Product(pk=self.boot.pk, price="20", category=self.hats).save(update_fields=["price", "category", "featured"])
+        Product.objects.get(price="8").delete()
+        self.shoes.delete()
+        self.assertEqual(recount_facets(fix=False), [])
+
+    def test_facets_of_the_catalog_and_of_a_filtered_listing(self):
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as ctx:
+            catalog = self.client.get("/api/products/?facets=1").json()
+        self.assertFalse([q for q in ctx.captured_queries if "products_product" in q["sql"]])
+        self.assertEqual((catalog["total"], catalog["featured"], catalog["trending"]), (4, 1, 1))
+        self.assertEqual(
+            [(c["slug"], c["count"]) for c in catalog["categories"]], [("shoes", 2), (None, 1), ("hats", 1)]
+        )
+        self.assertEqual([p["count"] for p in catalog["price"]], [1, 0, 1, 0, 1, 0, 0, 1])
+        self.assertEqual((catalog["price"][-1]["min"], catalog["price"][-1]["max"]), ("1000", None))
+
+        filtered = self.client.get("/api/products/?facets=1&min_price=10&max_price=200").json()
+        self.assertEqual((filtered["total"], filtered["featured"]), (2, 1))
+        self.assertEqual([(c["slug"], c["count"]) for c in filtered["categories"]], [("shoes", 1), ("hats", 1)])
+        hats = self.client.get("/api/products/category/hats/?facets=1").json()
+        self.assertEqual((hats["total"], hats["trending"]), (1, 1))
+
+
+class CatalogFeedTests(TestCase):
+    def setUp(self):
+        self.shoes = Category.objects.create(name="Shoes", slug="shoes")
+        self.hats = Category.objects.create(name="Hats", slug="hats")
+
+    def test_import_upserts_by_sku_and_keeps_counts_and_index(self):
+        feed = (
+            "sku,name,description,price,stock,category,featured\n"
+            "A1,Red boot,leather,10.5,3,shoes,true\n"
+            "A2,Cap,,5,1,hats,\n"
+            "A3,Bad price,,abc,1,,\n"
+        )
+        report = import_feed(io.StringIO(feed), "csv")
+        self.assertEqual((report.rows, report.created, report.updated, report.error_count), (3, 2, 0, 1))
+        self.assertEqual(report.errors[0]["line"], 4)
+
+        report = import_feed(io.StringIO('{"sku": "A1", "name": "Blue boot", "price": 11, "category": "hats"}\n{oops\n'), "jsonl")
+        self.assertEqual((report.created, report.updated, report.error_count), (0, 1, 1))
+        boot = Product.objects.get(sku="A1")
+        self.assertEqual((boot.name, boot.category_id, boot.featured), ("Blue boot", self.hats.id, False))
+        self.assertEqual(recount_categories(fix=False), [])
+        self.assertEqual(recount_facets(fix=False), [])
+        self.assertEqual(self.client.get("/api/products/?search=blue").json()[0]["id"], boot.id)
+        self.assertEqual(self.client.get("/api/products/?search=red").json(), [])
+
+    def test_non_finite_prices_are_row_errors(self):
+        prices = ["NaN", "sNaN", "Infinity", "-inf", "1"]
+        feed = "".join(f'{{"sku": "N{i}", "name": "x", "price": "{price}"}}\n' for i, price in enumerate(prices))
+        report = import_feed(io.StringIO(feed), "jsonl")
+        self.assertEqual((report.created, report.error_count), (1, 4))
+        self.assertEqual({error["line"] for error in report.errors}, {1, 2, 3, 4})
+
+    def test_export_round_trips(self):
+        make_product(self.shoes, sku="A1", name="Boot", price="12.50")
+        make_product(None, sku="A2", name="Loose")
+        for fmt in ("csv", "jsonl"):
+            feed = "".join(export_feed(Product.objects.all(), fmt))
+            report = import_feed(io.StringIO(feed), fmt)
+            self.assertEqual((report.rows, report.updated, report.error_count), (2, 2, 0))
+
+    def test_endpoints_require_staff(self):
+        self.assertEqual(self.client.get("/api/products/export/").status_code, 401)
+        admin = User.objects.create_user(username="admin", password="pass", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = io.BytesIO(b'{"sku": "A1", "name": "Boot", "price": "3"}\n')
+        upload.name = "feed.jsonl"
+        response = client.post("/api/products/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.json()["created"], 1)
+        response = client.get("/api/products/export/?file_format=jsonl")
+        self.assertIn(b'"sku": "A1"', b"".join(response.streaming_content))
+
+        upload = io.BytesIO('{"sku": "A2", "name": "Bo\u00eete", "price": "3"}\n'.encode("latin-1"))
+        upload.name = "feed.jsonl"
+        response = client.post("/api/products/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = override_settings(MEDIA_ROOT=self.media, JOBS_EAGER=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self):
+        buffer = io.BytesIO()
+        Image.new("RGBA", (2000, 1000), (255, 0, 0, 128)).save(buffer, "PNG")
+        with self.captureOnCommitCallbacks(execute=True):
+            return make_product(None, image=SimpleUploadedFile("boot.png", buffer.getvalue()))
+
+    def test_upload_generates_variants(self):
+        product = self.upload()
+        with Image.open(variant_path(product.image.name, "card", "webp")) as card:
+            self.assertEqual(card.size, (480, 240))
+        variants = self.client.get(f"/api/products/{product.id}/").json()["image_variants"]
+        self.assertEqual(
+            variants["thumb"]["jpeg"], f"http://testserver/media/variants/thumb/{product.image.name}.jpeg"
+        )
+
+    def test_missing_variant_is_generated_on_request(self):
+        product = self.upload()
+        path = variant_path(product.image.name, "large", "jpeg")
+        path.unlink()
+        response = self.client.get(f"/media/variants/large/{product.image.name}.jpeg")
+        self.assertEqual(response.status_code, 200)
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) as large:
+            self.assertEqual(large.size, (1200, 600))
+        self.assertTrue(path.exists())
+        self.assertEqual(self.client.get(f"/media/variants/huge/{product.image.name}.jpeg").status_code, 404)
+        self.assertEqual(self.client.get("/media/variants/card/invoices/1/x.pdf.jpeg").status_code, 404)
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        get_cache().clear()
+        make_product(Category.objects.create(name="Shoes", slug="shoes"))
+
+    @override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"])
+    def test_metrics_grouped_by_url_name(self):
+        response = self.client.get("/api/products/")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="1 queries", serialize;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.client.get("/api/products/wishlist/")
+
+        metrics = self.client.get("/api/metrics/?format=json").json()
+        self.assertEqual(metrics["product-list"]["requests"], {"200": 1})
+        self.assertEqual(metrics["product-list"]["db_queries"]["sum"], 1)
+        self.assertEqual(metrics["product-list"]["response_size_bytes"]["sum"], len(response.content))
+        self.assertEqual(metrics["api/products/wishlist/"]["requests"], {"401": 1})
+        text = self.client.get("/api/metrics/").content.decode()
+        self.assertIn('django_request_duration_seconds_count{route="product-list"} 1', text)
+
+    def test_serialization_is_timed(self):
+        timings = RequestTimings()
+        token = instrumentation._current.set(timings)
+        try:
+            with timed_serialization():
+                products_data(product_rows(Product.objects.all()), None)
+                with timed_serialization():  # nested blocks count once
+                    time.sleep(0.01)
+        finally:
+            instrumentation._current.reset(token)
+        self.assertEqual(timings.queries, 1)
+        self.assertGreaterEqual(timings.serialize, 0.01)
+        # Generic DRF views time serializer .data too.
+        response = self.client.get(f"/api/products/{Product.objects.get().pk}/")
+        self.assertGreater(float(re.search(r"serialize;dur=([\d.]+)", response["Server-Timing"])[1]), 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_recorded(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/products/"))
+        self.assertEqual(registry.as_dict(), {})
+
+    def test_metrics_endpoint_is_staff_only_by_default(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        user = User.objects.create_user(username="ops", password="pass")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 200)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Catalog reads against a SQLite copy of the test database."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.dir, "replica.sqlite3")
+        # Registered after the runner's database checks; MIRROR keeps it out of the flushes.
+        connections.settings["replica"] = connections.configure_settings({
+            "default": connections.settings["default"],
+            "replica": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": f"file:{cls.path}?mode=ro",
+                "TEST": {"MIRROR": "default"},
+            },
+        })["replica"]
+        cls.databases = {"default", "replica"}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        connections.settings.pop("replica")
+        shutil.rmtree(cls.dir)
+
+    def setUp(self):
+        get_cache().clear()
+        connections["replica"].close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        settings = override_settings(DATABASE_REPLICAS=["replica"])
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.product = make_product(None, name="Old")
+
+    def sync(self):
+        call_command("sync_replicas", stdout=io.StringIO())
+
+    def name(self):
+        return self.client.get(f"/api/products/{self.product.pk}/").json()["name"]
+
+    def test_lagging_replica_reads_are_not_cached_under_new_versions(self):
+        self.sync()
+        self.product.name = "New"
+        self.product.save()
+        self.assertEqual(self.name(), "Old")  # the replica lags behind
+        self.sync()
+        self.assertEqual(self.name(), "New")
+        with override_settings(REPLICA_STICKY_SECONDS=0):
+            self.assertEqual(self.name(), "New")
+        Product.objects.filter(pk=self.product.pk).update(name="Uncached")
+        self.sync()
+        self.assertEqual(self.name(), "New")
+
+    def test_users_read_their_writes(self):
+        user = User.objects.create_user(username="alice", password="pass")
+        self.sync()
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post("/api/products/wishlist/add/", {"product_id": self.product.pk}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(client.get("/api/products/wishlist/ids/").json()["ids"], [self.product.pk])
+
+        get_cache().delete(f"{replicas.PIN_PREFIX}{user.pk}")
+        self.assertEqual(client.get("/api/products/wishlist/ids/").json()["ids"], [])
+
+    def test_middleware_chain_is_not_adapted_under_asgi(self):
+        # An adapted middleware would run every async view through a thread;
+        # Django only logs the adaptation under DEBUG.
+        with override_settings(DEBUG=True), self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+    def test_unhealthy_replicas_fall_back_to_the_primary(self):
+        self.addCleanup(replicas._down_until.clear)
+        self.assertEqual(self.name(), "Old")  # no replica file: refuses to connect
+        self.assertIn("replica", replicas._down_until)
+
+        replicas._down_until.clear()
+        get_cache().clear()
+        sqlite3.connect(self.path).close()  # reachable, but missing the tables
+        self.assertEqual(self.name(), "Old")
+        self.assertIn("replica", replicas._down_until)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ProductListView, ProductDetailView, CategoryListView, CategoryProductsView, WishlistListView, WishlistCreateView, WishlistDeleteView, WishlistCountView
+from .views import ProductListView, ProductDetailView, CategoryListView, CategoryProductsView, WishlistListView, WishlistCreateView, WishlistDeleteView, WishlistCountView, WishlistIdsView, ProductImportView, ProductExportView
 
 urlpatterns = [
     path('', ProductListView.as_view(), name='product-list'),
@@ -10,4 +10,7 @@ urlpatterns = [
     path("wishlist/add/", WishlistCreateView.as_view()),
     path("wishlist/remove/<int:product_id>/", WishlistDeleteView.as_view()),
     path("wishlist/count/", WishlistCountView.as_view()),
+    path("wishlist/ids/", WishlistIdsView.as_view(), name="wishlist-ids"),
+    path("import/", ProductImportView.as_view(), name="product-import"),
+    path("export/", ProductExportView.as_view(), name="product-export"),
 ]
@@ -1,75 +1,132 @@
+import io
+
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+from PIL import Image
 from rest_framework.generics import ListAPIView, RetrieveAPIView, CreateAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
 from .models import Product, Category, Wishlist
 from .serializers import ProductSerializer, CategorySerializer, WishlistCreateSerializer, WishlistSerializer
-from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny
 from .models import Product, Category
 from .serializers import ProductSerializer, CategorySerializer
-from rest_framework.filters import SearchFilter
-from django.db.models import Count
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from .cache import CachedResponseMixin
+from .facets import facets
+from .catalog_io import FORMATS, export_feed, guess_format, import_feed
+from . import images
+from .pagination import ProductCursorPagination
+from .search import ProductSearchFilter
+from .queryplan import QueryPlanMixin
+from config.instrumentation import TimedSerializationMixin, timed_serialization
+from config.replicas import ReplicaReadsMixin
+from .representations import categories_data, category_rows, product_rows, products_data
+from .wishlist import bitset_fits, bump_wishlist, encode_bitset, optional_user_id, wishlist_version, wishlisted
 
 
-class ProductListView(ListAPIView):
-    serializer_class = ProductSerializer
-    filter_backends = [SearchFilter]
-    search_fields = ['name', 'description']
-    authentication_classes = []
-    permission_classes = [AllowAny]
+def filter_products(queryset, params):
+    """Apply the catalog query-string filters (shared with products.async_views)."""
+    category = params.get("category")
+    min_price = params.get("min_price")
+    max_price = params.get("max_price")
+    trending = params.get("trending")
+    featured = params.get("featured")
+
+    if category:
+        queryset = queryset.filter(category__slug=category)
+
+    if min_price:
+        queryset = queryset.filter(price__gte=min_price)
+
+    if max_price:
+        queryset = queryset.filter(price__lte=max_price)
     
+    if trending in ["true", "1", "True"]:
+        queryset = queryset.filter(trending=True)
 
-    def get_queryset(self):
-        queryset = Product.objects.all()
+    if featured in ["true", "1", "True"]:
+        queryset = queryset.filter(featured=True)
+
+    return queryset
 
-        category = self.request.query_params.get("category")
-        min_price = self.request.query_params.get("min_price")
-        max_price = self.request.query_params.get("max_price")
-        trending = self.request.query_params.get("trending")
-        featured = self.request.query_params.get("featured")
 
-        if category:
-            queryset = queryset.filter(category__slug=category)
+class ProductRowsMixin:
+    """
+    Lists through products.representations instead of ProductSerializer.
+    `?with_wishlist=1` adds `is_wishlisted` to every product for the
+    bearer token's user (false when anonymous); such responses are
+    per user, so they skip the catalog cache (see `uncached_params`).
+    `?facets=1` returns the facet counts of the filtered listing instead
+    of its products (products.facets).
+    """
+    wishlist_param = "with_wishlist"
+    facets_param = "facets"
 
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.facets_param) in ("1", "true", "True"):
+            queryset = self.filter_queryset(self.get_queryset())
+            # No WHERE clause: the whole catalog, counted in FacetCount.
+            return Response(facets(queryset, filtered=bool(queryset.query.where)))
+        flag = None
+        if request.query_params.get(self.wishlist_param) in ("1", "true", "True"):
+            flag = wishlisted(optional_user_id(request))
+        rows = product_rows(self.filter_queryset(self.get_queryset()), flag)
+        page = self.paginate_queryset(rows)
+        with timed_serialization():
+            data = products_data(rows if page is None else page, request)
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        if flag is not None:
+            patch_cache_control(response, private=True)
+        return response
 
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-        
-        if trending in ["true", "1", "True"]:
-            queryset = queryset.filter(trending=True)
 
-        if featured in ["true", "1", "True"]:
-            queryset = queryset.filter(featured=True)
+class ProductListView(CachedResponseMixin, ReplicaReadsMixin, ProductRowsMixin, QueryPlanMixin, ListAPIView):
+    serializer_class = ProductSerializer
+    filter_backends = [ProductSearchFilter]
+    search_fields = ['name', 'description']
+    pagination_class = ProductCursorPagination
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    uncached_params = ("with_wishlist",)
 
-        return queryset
+    def get_queryset(self):
+        return filter_products(Product.objects.all(), self.request.query_params)
 
 
-class ProductDetailView(RetrieveAPIView):
+class ProductDetailView(CachedResponseMixin, ReplicaReadsMixin, QueryPlanMixin, TimedSerializationMixin, RetrieveAPIView):
     queryset = Product.objects.all()
+    cache_dependencies = ("product:{pk}", "categories")
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
     authentication_classes = []
 
-class CategoryListView(ListAPIView):
+class CategoryListView(CachedResponseMixin, ReplicaReadsMixin, ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
     authentication_classes = []
-    def get_queryset(self):
-        return Category.objects.annotate(
-            product_count=Count("products")  # related_name
-        )
+
+    def list(self, request, *args, **kwargs):
+        rows = category_rows(self.filter_queryset(self.get_queryset()))
+        with timed_serialization():
+            data = categories_data(rows, request)
+        return Response(data)
 
 # List products by category slug
-class CategoryProductsView(ListAPIView):
+class CategoryProductsView(CachedResponseMixin, ReplicaReadsMixin, ProductRowsMixin, QueryPlanMixin, ListAPIView):
     serializer_class = ProductSerializer
-    filter_backends = [SearchFilter]
+    filter_backends = [ProductSearchFilter]
     search_fields = ['name', 'description']
+    pagination_class = ProductCursorPagination
     permission_classes = [AllowAny]
     authentication_classes = []
+    uncached_params = ("with_wishlist",)
 
     def get_queryset(self):
         slug = self.kwargs.get("slug")
@@ -87,27 +144,118 @@ class WishlistCreateView(CreateAPIView):
     def get_serializer_context(self):
         return {"request": self.request}
 
-class WishlistListView(ListAPIView):
+class WishlistListView(ReplicaReadsMixin, QueryPlanMixin, TimedSerializationMixin, ListAPIView):
     serializer_class = WishlistSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user).select_related("product")
+        return Wishlist.objects.filter(user=self.request.user).order_by("-created_at")
     
 class WishlistDeleteView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, product_id):
-        Wishlist.objects.filter(
+        deleted, _ = Wishlist.objects.filter(
             user=request.user,
             product_id=product_id
         ).delete()
+        if deleted:
+            bump_wishlist(request.user.pk)
 
         return Response({"message": "Removed from wishlist"})
 
-class WishlistCountView(APIView):
+class WishlistCountView(ReplicaReadsMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         count = Wishlist.objects.filter(user=request.user).count()
-        return Response({"count": count})
\ No newline at end of file
+        return Response({"count": count})
+
+
+class WishlistIdsView(ReplicaReadsMixin, APIView):
+    """
+    Ids of the user's wishlisted products, sorted, or with
+    `?encoding=bitset` as base64 bits over ids from `base` (see
+    products.wishlist.encode_bitset). Sparse wishlists get ids anyway;
+    `encoding` in the response says which. The ETag is the wishlist
+    version: revalidating an unchanged wishlist costs one cache read and
+    gets a 304.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        encoding = request.query_params.get("encoding", "ids")
+        if encoding not in ("ids", "bitset"):
+            return Response({"error": "encoding must be ids or bitset"}, status=400)
+        version = wishlist_version(request.user.pk)
+        etag = f'"{version}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            ids = list(
+                Wishlist.objects.filter(user=request.user).order_by("product_id").values_list("product_id", flat=True)
+            )
+            if not bitset_fits(ids):
+                encoding = "ids"
+            data = {"version": version, "count": len(ids), "encoding": encoding}
+            if encoding == "bitset":
+                data["base"], data["bitset"] = encode_bitset(ids)
+            else:
+                data["ids"] = ids
+            response = Response(data)
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ProductImportView(APIView):
+    """Upsert products from an uploaded CSV/JSONL feed (multipart field `file`)."""
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Upload a feed in the `file` field"}, status=400)
+        fmt = request.data.get("file_format") or guess_format(upload.name)
+        if fmt not in FORMATS:
+            return Response({"error": f"file_format must be one of {FORMATS}"}, status=400)
+        # Large uploads are spooled to disk by Django; this reads them line by line.
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+        try:
+            report = import_feed(stream, fmt)
+        except UnicodeDecodeError:
+            # Decoded as it is read, so chunks before the bad bytes are kept.
+            return Response({"error": "The feed must be UTF-8 text"}, status=400)
+        return Response(report.as_dict())
+
+
+class ProductExportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        fmt = request.query_params.get("file_format", "csv")
+        if fmt not in FORMATS:
+            return Response({"error": f"file_format must be one of {FORMATS}"}, status=400)
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(export_feed(Product.objects.all(), fmt), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="products.{fmt}"'
+        return response
+
+
+@require_safe
+def image_variant(request, variant, path):
+    """
+    Fallback for a variant file that doesn't exist yet: generate it, then
+    serve it. Once written, the web server finds the file under MEDIA_ROOT
+    and this view is no longer reached for it.
+    """
+    name, _, fmt = path.rpartition(".")
+    if variant not in images.VARIANTS or fmt not in images.FORMATS or not images.is_source(name):
+        raise Http404
+    try:
+        images.ensure_variants(name, only=[(variant, fmt)])
+    except (OSError, Image.DecompressionBombError):
+        raise Http404
+    response = FileResponse(open(images.variant_path(name, variant, fmt), "rb"), content_type=f"image/{fmt}")
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
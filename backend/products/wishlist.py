@@ -0,0 +1,77 @@
+"""
+Compact wishlist membership for product listings.
+
+Listings mark wishlisted products from the sorted ids (or a bitset) of
+the user's wishlist, fetched once and revalidated by version, instead of
+the full nested wishlist. Versions live with the catalog versions
+(products.cache) and are bumped after every add or remove commits.
+"""
+import base64
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import ClaimsJWTAuthentication
+from .cache import bump_versions, get_versions
+from .models import Wishlist
+
+_jwt = ClaimsJWTAuthentication()
+
+
+def version_key(user_id):
+    return f"wishlist:{user_id}"
+
+
+def wishlist_version(user_id):
+    version, = get_versions([version_key(user_id)])
+    return f"{version:.6f}"
+
+
+def bump_wishlist(user_id):
+    transaction.on_commit(partial(bump_versions, version_key(user_id)))
+
+
+# A bitset grows with the id span: sparser than this, the ids are smaller.
+BITSET_MAX_BYTES_PER_ID = 4
+
+
+def bitset_fits(ids):
+    """Whether the bitset of sorted `ids` takes at most BITSET_MAX_BYTES_PER_ID per id."""
+    return not ids or (ids[-1] - ids[0] + 8) // 8 <= BITSET_MAX_BYTES_PER_ID * len(ids)
+
+
+def encode_bitset(ids):
+    """
+    (base, base64 bytes) where bit i (little-endian, byte i // 8, bit
+    i % 8) stands for id `base + i`. Dense wishlists of nearby products
+    take one bit per id in the span.
+    """
+    if not ids:
+        return None, ""
+    base = min(ids)
+    bits = 0
+    for pk in ids:
+        bits |= 1 << (pk - base)
+    span = max(ids) - base + 1
+    return base, base64.b64encode(bits.to_bytes((span + 7) // 8, "little")).decode()
+
+
+def optional_user_id(request):
+    """
+    The bearer token's user id, or None. The catalog views skip
+    authentication, so a missing or bad token just means anonymous here.
+    """
+    try:
+        result = _jwt.authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0].pk if result else None
+
+
+def wishlisted(user_id):
+    """`is_wishlisted` annotation: one EXISTS per row on the (user, product) index."""
+    if user_id is None:
+        return Value(False)
+    return Exists(Wishlist.objects.filter(user_id=user_id, product=OuterRef("pk")))
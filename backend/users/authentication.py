@@ -0,0 +1,76 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+User = get_user_model()
+
+# Claims copied into every token by ClaimsTokenObtainPairSerializer.
+USER_CLAIMS = ("username", "is_staff")
+REFRESH_JTI_CLAIM = "rjti"
+
+
+class RevocationCache:
+    """
+    Short-TTL, per-process memo of "is this refresh token blacklisted?".
+    A revoked session keeps working for at most `ttl` seconds.
+    """
+
+    def __init__(self, ttl, max_entries=10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        now = time.monotonic()
+        entry = self._entries.get(jti)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+            self._entries[jti] = (revoked, now + self.ttl)
+        return revoked
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+revocations = RevocationCache(ttl=getattr(settings, "JWT_REVOCATION_CACHE_TTL", 30))
+
+
+def user_from_claims(token):
+    """
+    A users.User built from token claims without a query. It is a real,
+    saved-state instance, so it works in ORM filters and FK assignments;
+    any other field is deferred and loaded from the database on access.
+    """
+    names = ["id", *USER_CLAIMS]
+    values = [token[api_settings.USER_ID_CLAIM], *(token[claim] for claim in USER_CLAIMS)]
+    return User.from_db("default", names, values)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without the per-request user query.
+
+    The user comes from the token's claims; is_active is enforced when
+    tokens are issued and refreshed rather than on every request. Tokens
+    issued before the claims existed fall back to the stock database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in (api_settings.USER_ID_CLAIM, *USER_CLAIMS)):
+            return super().get_user(validated_token)
+        jti = validated_token.get(REFRESH_JTI_CLAIM)
+        if jti and revocations.is_revoked(jti):
+            raise InvalidToken("Token has been revoked")
+        return user_from_claims(validated_token)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from cart.views import CartListView
+from products.bench import summarize, timed
+from products.views import WishlistCountView
+from users.authentication import ClaimsJWTAuthentication
+from users.serializers import ClaimsTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request queries and latency of WishlistCountView and "
+        "CartListView under simplejwt's JWTAuthentication and "
+        "ClaimsJWTAuthentication."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username="bench-auth")
+        access = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        client = Client(headers={"Authorization": f"Bearer {access}"})
+        views = {"wishlist count": (WishlistCountView, "/api/products/wishlist/count/"),
+                 "cart list": (CartListView, "/api/cart/")}
+
+        for label, (view, url) in views.items():
+            original = view.authentication_classes
+            for backend in (JWTAuthentication, ClaimsJWTAuthentication):
+                view.authentication_classes = [backend]
+                client.get(url)  # warm up
+                with CaptureQueriesContext(connection) as ctx:
+                    client.get(url)
+                queries = len(ctx.captured_queries)
+                stats = summarize(timed(lambda: client.get(url), options["repeat"]))
+                self.stdout.write(
+                    f"{label:15} {backend.__name__:24} queries={queries}"
+                    f"  p50={stats['p50']:.2f}ms  p95={stats['p95']:.2f}ms"
+                )
+            view.authentication_classes = original
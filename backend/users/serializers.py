@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import REFRESH_JTI_CLAIM, USER_CLAIMS
 
 User = get_user_model()
 
@@ -23,3 +25,15 @@ class RegisterSerializer(serializers.ModelSerializer):
         )
         return user
 
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Embeds the claims ClaimsJWTAuthentication builds request.user from."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        # Copied into access tokens so they die with their refresh token.
+        token[REFRESH_JTI_CLAIM] = token["jti"]
+        return token
@@ -1,3 +1,31 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .authentication import revocations
+
+User = get_user_model()
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        revocations.clear()
+        User.objects.create_user(username="alice", password="pass", email="a@example.com")
+        self.client = APIClient()
+        tokens = self.client.post("/api/token/", {"username": "alice", "password": "pass"}).data
+        self.refresh = tokens["refresh"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+    def test_authenticated_requests_skip_the_user_query(self):
+        self.client.get("/api/products/wishlist/count/")  # warms the revocation cache
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/products/wishlist/count/")
+        self.assertEqual(response.data, {"count": 0})
+
+    def test_profile_still_loads_the_full_user(self):
+        self.assertEqual(self.client.get("/api/users/me/").data["email"], "a@example.com")
+
+    def test_blacklisted_session_is_rejected(self):
+        self.client.post("/api/token/blacklist/", {"refresh": self.refresh})
+        revocations.clear()
+        self.assertEqual(self.client.get("/api/cart/").status_code, 401)
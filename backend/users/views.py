@@ -3,6 +3,7 @@ from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from .models import User
 from .serializers import RegisterSerializer, UserProfileSerializer
 
 class RegisterView(APIView):
@@ -19,5 +20,7 @@ class ProfileView(APIView):
     permission_classes = [IsAuthenticated]  
 
     def get(self, request):
-        serializer = UserProfileSerializer(request.user)
+        # request.user only carries token claims; load the full row here.
+        user = User.objects.get(pk=request.user.pk)
+        serializer = UserProfileSerializer(user)
         return Response(serializer.data)
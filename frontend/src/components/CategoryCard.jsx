@@ -1,6 +1,7 @@
 import { Link } from "react-router-dom";
 import { ArrowRight, Sparkles, Zap, ShoppingBag, Flame, TrendingUp, ChevronRight } from "lucide-react";
 import { useState } from "react";
+import { variantSrc, variantSrcSet } from "../utils/images";
 
 export default function CategoryCard({ category }) {
   const [isHovered, setIsHovered] = useState(false);
@@ -91,7 +92,10 @@ export default function CategoryCard({ category }) {
         {/* Image */}
         <div className="relative h-56 overflow-hidden">
           <img
-            src={category.image || "https://via.placeholder.com/400x300?text=Category"}
+            src={variantSrc(category) || "https://via.placeholder.com/400x300?text=Category"}
+            srcSet={variantSrcSet(category)}
+            sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+            loading="lazy"
             alt={category.name}
             className="w-full h-full object-cover transform transition-all duration-700 group-hover:scale-110 group-hover:brightness-105"
           />
@@ -3,6 +3,8 @@ import { ShoppingBag, Heart, Loader2, Sparkles, TrendingUp, Zap, Star, Eye, Arro
 import { useState, useEffect, useRef } from "react";
 import api from "../utils/axios";
 import { useAuth } from "../context/AuthContext";
+import { variantSrc, variantSrcSet } from "../utils/images";
+import { fetchWishlistIds } from "../utils/wishlist";
 
 export default function ProductCard({ product }) {
   const { user } = useAuth();
@@ -29,19 +31,21 @@ export default function ProductCard({ product }) {
 
   useEffect(() => {
     setGlowColor(getGlowColor());
-    if (user) {
+    if (user && product.is_wishlisted !== undefined) {
+      // Listings fetched with ?with_wishlist=1 already carry the flag.
+      setIsWishlisted(product.is_wishlisted);
+      setChecking(false);
+    } else if (user) {
       checkWishlistStatus();
     } else {
       setChecking(false);
     }
-  }, [user, product.id]);
+  }, [user, product.id, product.is_wishlisted]);
 
   const checkWishlistStatus = async () => {
     try {
-      const response = await api.get("/wishlist/");
-      const wishlistItems = response.data;
-      const isInWishlist = wishlistItems.some(item => item.product.id === product.id);
-      setIsWishlisted(isInWishlist);
+      const ids = await fetchWishlistIds();
+      setIsWishlisted(ids.has(product.id));
     } catch (error) {
       console.error("Error checking wishlist status:", error);
     } finally {
@@ -140,7 +144,10 @@ export default function ProductCard({ product }) {
         <Link to={`/products/${product.id}`} className="block">
           <div className="relative overflow-hidden">
             <img
-              src={product.image || "https://via.placeholder.com/300"}
+              src={variantSrc(product) || "https://via.placeholder.com/300"}
+              srcSet={variantSrcSet(product)}
+              sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+              loading="lazy"
               alt={product.name}
               className="w-full h-64 object-cover transform transition-all duration-500 group-hover:scale-110 group-hover:brightness-105"
             />
@@ -3,12 +3,13 @@ import { useAuth } from "../../context/AuthContext";
 import { useCart } from "../../context/CartContext";
 import { useState, useEffect, useRef } from "react";
 import api from "../../utils/axios";
+import { fetchWishlistIds } from "../../utils/wishlist";
 import { useTranslation } from "react-i18next";
 import { Search, ShoppingCart, User, ChevronDown, Package, Heart, Menu, X, Sparkles, Zap, Home, Shirt, ChefHat, Brush, ShoppingBag, Trophy, BookOpen } from "lucide-react";
 
 export default function Navbar() {
   const { user, logout } = useAuth();
-  const { cart } = useCart();
+  const { summary } = useCart();
   const navigate = useNavigate();
   const [categories, setCategories] = useState([]);
   const [wishlistCount, setWishlistCount] = useState(0); 
@@ -54,8 +55,8 @@ export default function Navbar() {
         return;
       }
       try {
-        const res = await api.get("/wishlist/count/");
-        setWishlistCount(res.data.count);
+        const ids = await fetchWishlistIds();
+        setWishlistCount(ids.size);
       } catch (e) {
         console.error(e);
       }
@@ -71,7 +72,7 @@ export default function Navbar() {
   const [query, setQuery] = useState("");
   const [showMobileSearch, setShowMobileSearch] = useState(false);
 
-  const cartCount = Array.isArray(cart) ? cart.reduce((sum, item) => sum + (item.quantity || 0), 0) : 0;
+  const cartCount = summary.total_quantity;
 
   const handleSearch = (e) => {
     e.preventDefault();
@@ -4,20 +4,49 @@ import { useAuth } from "./AuthContext";
 import { useNavigate } from "react-router-dom";
 
 const CartContext = createContext();
+const EMPTY_SUMMARY = { item_count: 0, total_quantity: 0, subtotal: "0.00" };
+const SUMMARY_POLL_MS = 30000;
 
 export const CartProvider = ({ children }) => {
   const { user } = useAuth();
   const navigate = useNavigate();
   const [cart, setCart] = useState([]);
+  const [cartLoaded, setCartLoaded] = useState(false);
+  const [summary, setSummary] = useState(EMPTY_SUMMARY);
 
+  // The header badge only needs the summary; the browser revalidates it
+  // with the ETag, so polling is a 304 while the cart is unchanged.
   useEffect(() => {
-    if (user) fetchCart();
-    else setCart([]);
+    if (!user) {
+      setCart([]);
+      setCartLoaded(false);
+      setSummary(EMPTY_SUMMARY);
+      return;
+    }
+    fetchSummary();
+    const timer = setInterval(fetchSummary, SUMMARY_POLL_MS);
+    window.addEventListener("focus", fetchSummary);
+    return () => {
+      clearInterval(timer);
+      window.removeEventListener("focus", fetchSummary);
+    };
   }, [user]);
 
+  const fetchSummary = async () => {
+    const res = await api.get("cart/summary/");
+    setSummary(res.data);
+  };
+
+  // Full items are loaded by the pages that show them.
   const fetchCart = async () => {
     const res = await api.get("cart/");
     setCart(res.data);
+    setCartLoaded(true);
+  };
+
+  const refresh = () => {
+    fetchSummary();
+    if (cartLoaded) fetchCart();
   };
 
   const addToCart = async (product, quantity = 1) => {
@@ -32,7 +61,7 @@ export const CartProvider = ({ children }) => {
         quantity:quantity,
       });
 
-      fetchCart(); // keep state in sync
+      refresh(); // keep state in sync
       return { success: true };
     }
     catch (error) {
@@ -43,20 +72,21 @@ export const CartProvider = ({ children }) => {
 
   const removeFromCart = async (itemId) => {
     await api.delete(`cart/remove/${itemId}/`);
-    fetchCart();
+    refresh();
   };
   
   const clearCart = async () => {
     await api.post("cart/clear/");
     setCart([]);
+    setSummary(EMPTY_SUMMARY);
   }
 
   const updateQuantity = async (itemId, quantity) => {
     await api.put(`cart/update/${itemId}/`, { quantity });
-    fetchCart();
+    refresh();
   }
   return (
-    <CartContext.Provider value={{ cart, addToCart, removeFromCart, clearCart, updateQuantity }}>
+    <CartContext.Provider value={{ cart, summary, fetchCart, addToCart, removeFromCart, clearCart, updateQuantity }}>
       {children}
     </CartContext.Provider>
   );
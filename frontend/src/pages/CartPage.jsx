@@ -1,10 +1,15 @@
+import { useEffect } from "react";
 import { useCart } from "../context/CartContext";
 import CartItem from "../components/cart/CartItem";
 import { ShoppingBag, ArrowRight, Truck, Shield, CreditCard } from "lucide-react";
 import { Link } from "react-router-dom";
 
 export default function CartPage() {
-  const { cart, clearCart } = useCart();
+  const { cart, clearCart, fetchCart } = useCart();
+
+  useEffect(() => {
+    fetchCart();
+  }, []);
 
   const totalPrice = cart.reduce((sum, item) => sum + (item.product.price * item.quantity), 0);
   const shipping = totalPrice > 999 ? 0 : 99;
@@ -4,6 +4,7 @@ import { Link } from "react-router-dom";
 import api from "../utils/axios";
 import ProductCard from "../components/ProductCard";
 import { ArrowLeft, Filter, Grid, List, ShoppingBag, Loader2 } from "lucide-react";
+import { variantSrc, variantSrcSet } from "../utils/images";
 
 export default function CategoryProductsPage() {
   const { slug } = useParams();
@@ -211,7 +212,10 @@ export default function CategoryProductsPage() {
                     <div className="flex flex-col md:flex-row">
                       <div className="md:w-1/4">
                         <img
-                          src={product.image}
+                          src={variantSrc(product)}
+                          srcSet={variantSrcSet(product)}
+                          sizes="(min-width: 768px) 25vw, 100vw"
+                          loading="lazy"
                           alt={product.name}
                           className="w-full h-48 md:h-full object-cover"
                         />
@@ -1,11 +1,18 @@
-import { useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useCart } from "../context/CartContext";
 import axios from "../utils/axios";
 import { useNavigate } from "react-router-dom";
 import { ShoppingBag, MapPin, Phone, CreditCard, ArrowRight, Shield, Truck, Lock, CheckCircle } from "lucide-react";
 
 export default function CheckoutPage() {
-  const { cart, clearCart } = useCart();
+  const { cart, clearCart, fetchCart } = useCart();
+
+  useEffect(() => {
+    fetchCart();
+    // Hold the cart's stock while the form is filled in; if part of it has
+    // sold out meanwhile, placing the order reports which items.
+    axios.post("/cart/checkout/").catch((err) => console.warn("Checkout hold failed:", err.response?.data));
+  }, []);
   const navigate = useNavigate();
 
   const [address, setAddress] = useState("");
@@ -14,6 +21,8 @@ export default function CheckoutPage() {
   const [paymentMethod, setPaymentMethod] = useState("cod");
   const [orderSuccess, setOrderSuccess] = useState(false);
   const [orderId, setOrderId] = useState(null);
+  // Reused when the response was lost, so a retry can't place a second order.
+  const idempotencyKey = useRef(crypto.randomUUID());
   
   const totalPrice = cart.reduce(
     (sum, item) => sum + item.product.price * item.quantity,
@@ -69,7 +78,9 @@ export default function CheckoutPage() {
         })),
       };
 
-      const res = await axios.post("/orders/", payload);
+      const res = await axios.post("/orders/", payload, {
+        headers: { "Idempotency-Key": idempotencyKey.current },
+      });
       console.log("Order response:", res);
 
       if (res.status === 201) {
@@ -84,6 +95,10 @@ export default function CheckoutPage() {
       }
     } catch (err) {
       console.error(err);
+      if (err.response) {
+        // The server answered: a corrected order is a new request.
+        idempotencyKey.current = crypto.randomUUID();
+      }
       const errorDiv = document.createElement("div");
       errorDiv.className = "fixed top-4 right-4 bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded-lg shadow-lg z-50";
       errorDiv.innerHTML = `
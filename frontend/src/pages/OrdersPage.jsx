@@ -6,16 +6,19 @@ import { Package, Truck, CheckCircle, XCircle, Clock, Search } from "lucide-reac
 export default function OrdersPage() {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState(null);
   const [filter, setFilter] = useState("all");
 
   useEffect(() => {
     fetchOrders();
   }, []);
 
-  const fetchOrders = async () => {
+  // Summaries (no items) a page at a time; details load on the order page.
+  const fetchOrders = async (url = "/orders/?page_size=20") => {
     try {
-      const res = await axios.get("/orders/");
-      setOrders(res.data);
+      const res = await axios.get(url);
+      setOrders((previous) => (url === next ? [...previous, ...res.data.results] : res.data.results));
+      setNext(res.data.next);
     } catch (error) {
       console.error("Error fetching orders:", error);
     } finally {
@@ -151,7 +154,7 @@ export default function OrdersPage() {
                   <div className="grid md:grid-cols-3 gap-6">
                     <div>
                       <p className="text-sm text-gray-600 mb-1">Items</p>
-                      <p className="font-semibold">{order.items?.length || 0} items</p>
+                      <p className="font-semibold">{order.item_count} items</p>
                     </div>
                     <div>
                       <p className="text-sm text-gray-600 mb-1">Total Amount</p>
@@ -163,25 +166,6 @@ export default function OrdersPage() {
                     </div>
                   </div>
 
-                  {/* Items Preview */}
-                  <div className="mt-6 pt-6 border-t border-gray-100">
-                    <p className="text-sm text-gray-600 mb-3">Items in this order:</p>
-                    <div className="flex gap-2">
-                      {order.items?.slice(0, 3).map((item, index) => (
-                        <div key={index} className="flex items-center gap-2 bg-gray-50 rounded-xl px-3 py-2">
-                          <div className="w-8 h-8 bg-gradient-to-r from-blue-200 to-purple-200 rounded"></div>
-                          <span className="text-sm font-medium">{item.product?.name}</span>
-                          <span className="text-sm text-gray-500">×{item.quantity}</span>
-                        </div>
-                      ))}
-                      {order.items?.length > 3 && (
-                        <div className="flex items-center justify-center w-10 h-10 bg-gray-100 rounded-xl">
-                          <span className="text-sm font-bold text-gray-600">+{order.items.length - 3}</span>
-                        </div>
-                      )}
-                    </div>
-                  </div>
-
                   <div className="mt-6 pt-6 border-t border-gray-100 flex justify-end">
                     <span className="text-blue-600 hover:text-blue-800 font-semibold flex items-center gap-2">
                       View Details
@@ -193,6 +177,14 @@ export default function OrdersPage() {
                 </div>
               </Link>
             ))}
+            {next && (
+              <button
+                onClick={() => fetchOrders(next)}
+                className="w-full py-4 rounded-xl bg-white shadow text-blue-600 font-semibold hover:shadow-lg transition-all"
+              >
+                Load more orders
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -14,6 +14,7 @@ const Products = () => {
   const [showFilters, setShowFilters] = useState(false);
   const [categories, setCategories] = useState([]);
   const [selectedCategory, setSelectedCategory] = useState("");
+  const [categoryCounts, setCategoryCounts] = useState({});
 
   const search = searchParams.get("search") || "";
   const { addToCart } = useCart();
@@ -23,6 +24,10 @@ const Products = () => {
     fetchCategories();
   }, [search, selectedCategory, minPrice, maxPrice]);
 
+  useEffect(() => {
+    fetchCategoryCounts();
+  }, [search, minPrice, maxPrice]);
+
   const fetchProducts = async () => {
     try {
       setLoading(true);
@@ -41,6 +46,22 @@ const Products = () => {
     }
   };
 
+  // Matches per category under the other filters, so each button shows
+  // what picking it would list.
+  const fetchCategoryCounts = async () => {
+    try {
+      const params = new URLSearchParams({ facets: "1" });
+      if (search) params.append("search", search);
+      if (minPrice) params.append("min_price", minPrice);
+      if (maxPrice) params.append("max_price", maxPrice);
+
+      const res = await api.get(`/products/?${params.toString()}`);
+      setCategoryCounts(Object.fromEntries(res.data.categories.map((c) => [c.slug, c.count])));
+    } catch (error) {
+      console.error("Error fetching facet counts:", error);
+    }
+  };
+
   const fetchCategories = async () => {
     try {
       const res = await api.get("/categories/");
@@ -175,6 +196,7 @@ const Products = () => {
                       className={`w-full text-left px-4 py-3 rounded-xl transition-all duration-200 ${selectedCategory === category.slug ? 'bg-blue-50 text-blue-700 border border-blue-200' : 'hover:bg-gray-50 text-gray-700'}`}
                     >
                       {category.name}
+                      <span className="float-right text-sm text-gray-400">{categoryCounts[category.slug] ?? 0}</span>
                     </button>
                   ))}
                 </div>
@@ -33,8 +33,8 @@ export default function ProfilePage() {
 
   const fetchOrders = async () => {
     try {
-      const res = await axios.get("/orders/");
-      setOrders(res.data.slice(0, 5));
+      const res = await axios.get("/orders/?page_size=5");
+      setOrders(res.data.results);
     } catch (error) {
       console.error("Error fetching orders:", error);
     } finally {
@@ -209,10 +209,10 @@ export default function ProfilePage() {
                       </div>
                       <div className="flex justify-between items-center">
                         <div>
-                          <p className="text-gray-700">{order.items?.length || 0} items</p>
+                          <p className="text-gray-700">{order.item_count} items</p>
                           <div className="flex items-center gap-2 mt-2">
                             <MapPin size={16} className="text-gray-400" />
-                            <p className="text-sm text-gray-600">{order.shipping_address?.substring(0, 40)}...</p>
+                            <p className="text-sm text-gray-600">{order.shipping_address}...</p>
                           </div>
                         </div>
                         <div className="text-right">
@@ -3,6 +3,7 @@ import { Link } from "react-router-dom";
 import { Heart, ShoppingBag, X, ShoppingCart, Star, Eye, Loader2, CheckCircle, XCircle } from "lucide-react";
 import api from "../utils/axios";
 import { useCart } from "../context/CartContext"; 
+import { variantSrc, variantSrcSet } from "../utils/images";
 
 export default function WishlistPage() {
   const [wishlistItems, setWishlistItems] = useState([]);
@@ -235,7 +236,10 @@ export default function WishlistPage() {
                   {/* Image Section */}
                   <div className="relative">
                     <img
-                      src={item.product.image}
+                      src={variantSrc(item.product)}
+                      srcSet={variantSrcSet(item.product)}
+                      sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                      loading="lazy"
                       alt={item.product.name}
                       className="w-full h-48 object-cover group-hover:scale-105 transition-transform duration-500"
                     />
@@ -0,0 +1,15 @@
+// Resized image variants served by the backend (products.images).
+const WIDTHS = { thumb: 160, card: 480, large: 1200 };
+
+// JPEG `src` for browsers without WebP, falling back to the original.
+export const variantSrc = (item, variant = "card") =>
+  item?.image_variants?.[variant]?.jpeg || item?.image;
+
+// WebP `srcSet` so the browser picks the smallest variant that fits.
+export const variantSrcSet = (item) => {
+  const variants = item?.image_variants;
+  if (!variants) return undefined;
+  return Object.entries(WIDTHS)
+    .map(([name, width]) => `${variants[name].webp} ${width}w`)
+    .join(", ");
+};
@@ -0,0 +1,16 @@
+import api from "./axios";
+
+// Ids of the user's wishlisted products (`/wishlist/ids/`), shared by every
+// card on a page: concurrent callers wait on the same request, and the
+// browser revalidates it with the ETag so an unchanged wishlist is a 304.
+let pending = null;
+
+export const fetchWishlistIds = () => {
+  pending ??= api
+    .get("/wishlist/ids/")
+    .then((res) => new Set(res.data.ids))
+    .finally(() => {
+      pending = null;
+    });
+  return pending;
+};